@@ -1,12 +1,23 @@
 # ai_call.py
 import json
+import os
 import requests
 import time
 import random
+from contextlib import contextmanager
+from ai.circuit_breaker import CircuitBreaker, AdaptiveTimeout, backoff_delay
+from ai.scheduler import SCHEDULER, INTERACTIVE, RequestExpired
+from ai.tracing import TRACER, model_fields
 
 # Set to True to use mock responses instead of real AI service
 USE_MOCK = False
 
+# Base URL of the Ollama server (override with OLLAMA_URL, e.g. to use ai.mock_server)
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+
+# How long Ollama keeps the model loaded after each request
+KEEP_ALIVE = "10m"
+
 def get_mock_response(difficulty, board_state):
     """Generate mock AI responses for testing without the AI service"""
     # Simple mock responses based on difficulty
@@ -41,7 +52,142 @@ def get_mock_response(difficulty, board_state):
     # Choose a random response from the appropriate difficulty level
     return random.choice(mock_responses[difficulty_key])
 
-def ai_call(state: str, prompt: str, model: str = "llama2", max_retries: int = 2) -> str:
+def _build_prompt(state, prompt):
+    """Combine the prompt and game state into the text sent to the model"""
+    return f"{prompt.strip()}\n\nState:\n{state.strip()}\n\nAI:"
+
+def _fallback_message(prompt):
+    """General tip returned when every attempt to reach the AI has failed"""
+    fallbacks = {
+        "Beginner": "Consider developing your pieces toward the center of the board and watching for threats to your pieces.",
+        "Intermediate": "Look for pieces that aren't defended and consider how you might improve your position.",
+        "Hardcore": "Sometimes the best move isn't the most obvious one. Think about long-term positional advantages."
+    }
+    
+    # Try to extract difficulty from prompt
+    difficulty = "Beginner"  # Default
+    if "intermediate" in prompt.lower():
+        difficulty = "Intermediate"
+    elif "hardcore" in prompt.lower() or "advanced" in prompt.lower():
+        difficulty = "Hardcore"
+        
+    return f"Error: Failed to get response from AI. Here's a general tip: {fallbacks[difficulty]}"
+
+def _probe_backend():
+    """Cheap health check used by the circuit breaker while it is open"""
+    response = requests.get(f'{OLLAMA_URL}/api/tags', timeout=1)
+    return response.ok
+
+# Fail fast while the backend is down instead of waiting out every timeout
+BREAKER = CircuitBreaker(failure_threshold=3, probe=_probe_backend)
+
+# Seconds allowed to open a connection; read timeouts adapt to observed latency
+CONNECT_TIMEOUT = 2
+RESPONSE_TIMEOUT = AdaptiveTimeout()     # full response, used by ai_call
+FIRST_TOKEN_TIMEOUT = AdaptiveTimeout()  # first streamed chunk, used by ai_call_stream
+
+def _wait_before_retry(attempt, cancel_event=None):
+    """Back off before a retry; returns False if the retry should not happen"""
+    delay = backoff_delay(attempt)
+    if cancel_event is None:
+        time.sleep(delay)
+    elif cancel_event.wait(delay):
+        return False
+    # Stop retrying as soon as the breaker has opened
+    return BREAKER.allow_request()
+
+# Returned when the scheduler drops a request that waited past its deadline
+EXPIRED_MESSAGE = "Error: The AI request expired while waiting for the backend."
+
+class ModelNotFound(Exception):
+    """The backend answered, but doesn't have the requested model installed"""
+
+def _raise_for_status(response, model):
+    """Like response.raise_for_status(), but a missing model raises ModelNotFound
+
+    Ollama answers 404 for a model that isn't installed. The backend itself
+    is healthy, so this must not count as a failure towards the breaker.
+    """
+    if response.status_code == 404:
+        raise ModelNotFound(model)
+    response.raise_for_status()
+
+def _model_not_found_message(model):
+    return f"Error: The AI model '{model}' is not installed. Install it with: ollama pull {model}"
+
+@contextmanager
+def _backend_slot(priority, deadline=None, cancel_event=None, schedule_key=None):
+    """Wait until the scheduler admits this request, tracing the time spent queued"""
+    queued = time.perf_counter()
+    with SCHEDULER.slot(priority, deadline, cancel_event, schedule_key):
+        TRACER.record("ai.queue_wait", time.perf_counter() - queued, priority=priority)
+        yield
+
+def _request_body(model, full_prompt, stream, options, keep_alive, response_format=None):
+    """JSON body for /api/generate"""
+    body = {
+        'model': model,
+        'prompt': full_prompt,
+        'stream': stream,
+        'keep_alive': keep_alive or KEEP_ALIVE
+    }
+    if options:
+        body['options'] = options
+    if response_format:
+        # "json" makes Ollama constrain the output to valid JSON
+        body['format'] = response_format
+    return body
+
+def list_models():
+    """Names of the models installed in Ollama, or None if they can't be listed"""
+    if USE_MOCK:
+        return None
+    try:
+        response = requests.get(f'{OLLAMA_URL}/api/tags', timeout=CONNECT_TIMEOUT)
+        response.raise_for_status()
+        return [model['name'] for model in response.json().get('models', [])]
+    except (requests.exceptions.RequestException, ValueError, KeyError, TypeError):
+        return None
+
+def warm_up(model: str = "llama2", keep_alive: str = None, timeout: float = 120) -> bool:
+    """Ask Ollama to load the model so the first real hint doesn't pay for it
+    
+    An empty prompt makes Ollama load the model and return without generating,
+    so the request doesn't take a scheduler slot that a hint could use. It is
+    skipped while the circuit breaker is open, and its outcome counts towards
+    the breaker like any other request.
+    
+    Returns:
+        True if the model is loaded
+    """
+    if USE_MOCK:
+        return True
+    if not BREAKER.available():
+        return False
+    try:
+        with TRACER.span("ai.warm_up", model=model) as span:
+            response = requests.post(
+                f'{OLLAMA_URL}/api/generate',
+                json={'model': model, 'prompt': '', 'stream': False, 'keep_alive': keep_alive or KEEP_ALIVE},
+                timeout=(CONNECT_TIMEOUT, timeout)
+            )
+            _raise_for_status(response, model)
+            span.update(model_fields(response.json()))
+        BREAKER.record_success()
+        return True
+    except ModelNotFound:
+        BREAKER.record_success()
+        print(f"AI warm-up skipped: model '{model}' is not installed")
+        return False
+    except (requests.exceptions.RequestException, ValueError) as e:
+        BREAKER.record_failure()
+        print(f"AI warm-up failed: {e}")
+        return False
+
+def ai_call(state: str, prompt: str, model: str = "llama2", max_retries: int = 2,
+            options: dict = None, keep_alive: str = None, response_format: str = None,
+            priority: str = INTERACTIVE, deadline: float = None, schedule_key=None,
+            on_model_missing=None) -> str:
     """Call AI with retry mechanism and better error handling
     
     Args:
@@ -49,6 +195,13 @@ def ai_call(state: str, prompt: str, model: str = "llama2", max_retries: int = 2
         prompt: The prompt to send to the AI
         model: AI model to use (default: llama2)
         max_retries: Maximum number of retries on failure
+        options: Ollama generation options such as num_predict, num_ctx, temperature
+        keep_alive: How long to keep the model loaded afterwards (default: KEEP_ALIVE)
+        response_format: Set to "json" to ask for a JSON response
+        priority: Scheduler class: INTERACTIVE, PREFETCH or BATCH
+        deadline: time.monotonic() after which a still-queued request is dropped
+        schedule_key: Identifies the request to SCHEDULER.promote while it is queued
+        on_model_missing: Called with model if the backend doesn't have it installed
         
     Returns:
         AI response or fallback message
@@ -56,55 +209,195 @@ def ai_call(state: str, prompt: str, model: str = "llama2", max_retries: int = 2
     # If mock mode is enabled, return mock responses instead of calling the API
     if USE_MOCK:
         return get_mock_response(prompt, state)
+    
+    # Backend is known to be down, answer with the fallback right away
+    if not BREAKER.allow_request():
+        return _fallback_message(prompt)
         
-    full_prompt = f"{prompt.strip()}\n\nState:\n{state.strip()}\n\nAI:"
+    full_prompt = _build_prompt(state, prompt)
     
     for attempt in range(max_retries + 1):
+        read_timeout = RESPONSE_TIMEOUT.timeout()
         try:
-            response = requests.post(
-                'http://localhost:11434/api/generate',
-                json={
-                    'model': model,
-                    'prompt': full_prompt,
-                    'stream': False
-                },
-                timeout=10  # Add timeout to prevent hanging
-            )
-            response.raise_for_status()
-            data = response.json()
+            with _backend_slot(priority, deadline, schedule_key=schedule_key):
+                # Time spent queued doesn't count towards the response timeout
+                start = time.perf_counter()
+                with TRACER.span("ai_call.request", model=model, attempt=attempt,
+                                 prompt_chars=len(full_prompt)) as span:
+                    response = requests.post(
+                        f'{OLLAMA_URL}/api/generate',
+                        json=_request_body(model, full_prompt, False, options, keep_alive, response_format),
+                        timeout=(CONNECT_TIMEOUT, read_timeout)  # Add timeout to prevent hanging
+                    )
+                    _raise_for_status(response, model)
+                    data = response.json()
+                    span.update(model_fields(data))
+            BREAKER.record_success()
+            RESPONSE_TIMEOUT.observe(time.perf_counter() - start)
             return data.get('response', 'No response from AI.').strip()
         
+        except ModelNotFound:
+            # Retrying won't install it
+            BREAKER.record_success()
+            if on_model_missing is not None:
+                on_model_missing(model)
+            return _model_not_found_message(model)
+        
+        except RequestExpired:
+            # Never sent, so it can't count as the breaker's half-open trial
+            BREAKER.release_trial()
+            return EXPIRED_MESSAGE
+        
         except requests.exceptions.Timeout:
-            if attempt < max_retries:
-                time.sleep(1)  # Wait a bit before retrying
+            BREAKER.record_failure()
+            RESPONSE_TIMEOUT.observe_timeout(read_timeout)
+            if attempt < max_retries and _wait_before_retry(attempt):
                 continue
             return "Error: The AI service took too long to respond. Please try again."
             
         except requests.exceptions.ConnectionError:
-            if attempt < max_retries:
-                time.sleep(1)
+            BREAKER.record_failure()
+            if attempt < max_retries and _wait_before_retry(attempt):
                 continue
             return "Error: Could not connect to the AI service. Is it running?"
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
+            BREAKER.record_failure()
             print(f"AI call failed (attempt {attempt+1}/{max_retries+1}): {e}")
-            if attempt < max_retries:
-                time.sleep(1)
+            if attempt < max_retries and _wait_before_retry(attempt):
                 continue
             
             # Provide fallback hint when all retries fail
-            fallbacks = {
-                "Beginner": "Consider developing your pieces toward the center of the board and watching for threats to your pieces.",
-                "Intermediate": "Look for pieces that aren't defended and consider how you might improve your position.",
-                "Hardcore": "Sometimes the best move isn't the most obvious one. Think about long-term positional advantages."
-            }
-            
-            # Try to extract difficulty from prompt
-            difficulty = "Beginner"  # Default
-            if "intermediate" in prompt.lower():
-                difficulty = "Intermediate"
-            elif "hardcore" in prompt.lower() or "advanced" in prompt.lower():
-                difficulty = "Hardcore"
-                
-            return f"Error: Failed to get response from AI. Here's a general tip: {fallbacks[difficulty]}"
+            return _fallback_message(prompt)
 
+def ai_call_stream(state: str, prompt: str, model: str = "llama2", max_retries: int = 2, cancel_event=None,
+                   options: dict = None, keep_alive: str = None, response_format: str = None,
+                   priority: str = INTERACTIVE, deadline: float = None, schedule_key=None,
+                   on_model_missing=None):
+    """Stream the AI response, yielding text as soon as each chunk arrives
+    
+    Ollama sends one JSON object per line while generating, so the first words
+    can be shown after the first-token latency instead of the full generation time.
+    Retries only happen before any text has been yielded; once output has started
+    a failure ends the stream with an error note.
+    
+    Args:
+        state: The game state representation
+        prompt: The prompt to send to the AI
+        model: AI model to use (default: llama2)
+        max_retries: Maximum number of retries on failure
+        cancel_event: Optional threading.Event; once set, the stream stops
+            reading and closes the connection, and pending retries are skipped
+        options: Ollama generation options such as num_predict, num_ctx, temperature
+        keep_alive: How long to keep the model loaded afterwards (default: KEEP_ALIVE)
+        response_format: Set to "json" to ask for a JSON response
+        priority: Scheduler class: INTERACTIVE, PREFETCH or BATCH
+        deadline: time.monotonic() after which a still-queued request is dropped
+        schedule_key: Identifies the request to SCHEDULER.promote while it is queued
+        on_model_missing: Called with model, before the error message is
+            yielded, if the backend doesn't have it installed
+        
+    Yields:
+        Pieces of the AI response, or a single fallback message
+    """
+    # Mock mode streams the canned response word by word
+    if USE_MOCK:
+        for word in get_mock_response(prompt, state).split():
+            yield word + " "
+        return
+    
+    # Backend is known to be down, answer with the fallback right away
+    if not BREAKER.allow_request():
+        yield _fallback_message(prompt)
+        return
+        
+    full_prompt = _build_prompt(state, prompt)
+    
+    for attempt in range(max_retries + 1):
+        started = False
+        read_timeout = FIRST_TOKEN_TIMEOUT.timeout()
+        try:
+            with _backend_slot(priority, deadline, cancel_event, schedule_key):
+                # Time spent queued doesn't count towards the first-token timeout
+                start = time.perf_counter()
+                with requests.post(
+                    f'{OLLAMA_URL}/api/generate',
+                    json=_request_body(model, full_prompt, True, options, keep_alive, response_format),
+                    timeout=(CONNECT_TIMEOUT, read_timeout),
+                    stream=True
+                ) as response:
+                    # Headers are back: connection setup plus server queueing
+                    TRACER.record("ai_stream.connect", time.perf_counter() - start, model=model, attempt=attempt)
+                    _raise_for_status(response, model)
+                    first_chunk = True
+                    for line in response.iter_lines(chunk_size=None):
+                        if cancel_event is not None and cancel_event.is_set():
+                            BREAKER.record_success()
+                            TRACER.record("ai_stream.total", time.perf_counter() - start, model=model, cancelled=True)
+                            return
+                        if not line:
+                            continue
+                        if first_chunk:
+                            # The backend is answering; this is the latency that matters for timeouts
+                            first_chunk = False
+                            BREAKER.record_success()
+                            FIRST_TOKEN_TIMEOUT.observe(time.perf_counter() - start)
+                            TRACER.record("ai_stream.first_token", time.perf_counter() - start, model=model)
+                        data = json.loads(line)
+                        text = data.get('response', '')
+                        if text:
+                            # Drop leading whitespace the model tends to emit first
+                            if not started:
+                                text = text.lstrip()
+                            if text:
+                                started = True
+                                yield text
+                        if data.get('done'):
+                            # The final chunk carries the model's own timing fields
+                            TRACER.record("ai_stream.total", time.perf_counter() - start, model=model,
+                                          prompt_chars=len(full_prompt), **model_fields(data))
+                            break
+            if not started:
+                yield 'No response from AI.'
+            return
+        
+        except RequestExpired:
+            # Never sent, so it can't count as the breaker's half-open trial
+            BREAKER.release_trial()
+            # Cancelled while queued needs no message; the caller has moved on
+            if cancel_event is None or not cancel_event.is_set():
+                yield EXPIRED_MESSAGE
+            return
+        
+        except ModelNotFound:
+            # Retrying won't install it
+            BREAKER.record_success()
+            if on_model_missing is not None:
+                on_model_missing(model)
+            yield _model_not_found_message(model)
+            return
+        
+        except (requests.exceptions.RequestException, ValueError) as e:
+            BREAKER.record_failure()
+            TRACER.record("ai_stream.total", time.perf_counter() - start, model=model, error=type(e).__name__)
+            if isinstance(e, requests.exceptions.Timeout) and not started:
+                FIRST_TOKEN_TIMEOUT.observe_timeout(read_timeout)
+            if started:
+                # Part of the answer is already on screen, keep it and say it was cut short
+                yield "\n\nError: The AI response was interrupted."
+                return
+            if attempt < max_retries:
+                # Wait before retrying, unless cancelled or the breaker has opened
+                if _wait_before_retry(attempt, cancel_event):
+                    continue
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+            
+            if isinstance(e, requests.exceptions.Timeout):
+                yield "Error: The AI service took too long to respond. Please try again."
+            elif isinstance(e, requests.exceptions.ConnectionError):
+                yield "Error: Could not connect to the AI service. Is it running?"
+            else:
+                print(f"AI stream failed (attempt {attempt+1}/{max_retries+1}): {e}")
+                yield _fallback_message(prompt)
+            return
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+from collections import deque
+
+from ai.metrics import percentile
+
+def backoff_delay(attempt, base=0.25, cap=4.0):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class AdaptiveTimeout:
+    """Timeout that follows the latencies observed so far
+
+    Until enough samples exist the default is used. After that the timeout is
+    a multiple of the observed p99, clamped between minimum and maximum, so a
+    backend that usually answers in one second is not waited on for ten.
+    """
+    def __init__(self, default=10.0, minimum=3.0, maximum=10.0, multiplier=2.0, window=50, min_samples=5):
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def observe(self, latency):
+        with self.lock:
+            self.samples.append(latency)
+
+    def observe_timeout(self, timeout):
+        """Record a timed-out call so the next timeout grows instead of shrinking"""
+        self.observe(min(self.maximum, timeout * self.multiplier))
+
+    def timeout(self):
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return self.default
+            p99 = percentile(list(self.samples), 99)
+        return max(self.minimum, min(self.maximum, p99 * self.multiplier))
+
+class CircuitBreaker:
+    """Fail fast while the AI backend is down
+
+    After failure_threshold consecutive failures the circuit opens and requests
+    are refused immediately. A background thread probes the backend with
+    exponential backoff; once a probe succeeds the circuit is half-open and
+    the next real request decides whether it closes again or re-opens.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, probe=None, probe_base_delay=0.5, probe_max_delay=10.0):
+        self.failure_threshold = failure_threshold
+        # Callable returning True if the backend looks healthy
+        self.probe = probe
+        self.probe_base_delay = probe_base_delay
+        self.probe_max_delay = probe_max_delay
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+        self.probe_thread = None
+        # Called after the circuit closes again, e.g. to re-read the backend's state
+        self.on_close = None
+
+        # Statistics
+        self.rejected = 0
+        self.times_opened = 0
+
+    def available(self):
+        """True unless the circuit is open"""
+        return self.state != self.OPEN
+
+    def allow_request(self):
+        """Return True if a request may go to the backend now"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                # Let exactly one trial request through
+                self.trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            recovered = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+        if recovered and self.on_close is not None:
+            self.on_close()
+
+    def release_trial(self):
+        """Give up a half-open trial that never reached the backend, e.g. one
+        the scheduler dropped, so the next request can be the trial instead"""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        """Open the circuit and start probing for recovery (lock must be held)"""
+        if self.state != self.OPEN:
+            self.times_opened += 1
+        self.state = self.OPEN
+        if self.probe and (self.probe_thread is None or not self.probe_thread.is_alive()):
+            self.probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+            self.probe_thread.start()
+
+    def _probe_loop(self):
+        """Probe the backend with backoff until it answers, then half-open the circuit"""
+        attempt = 0
+        while self.state == self.OPEN:
+            time.sleep(self.probe_base_delay + backoff_delay(attempt, self.probe_base_delay, self.probe_max_delay))
+            attempt += 1
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                with self.lock:
+                    if self.state == self.OPEN:
+                        self.state = self.HALF_OPEN
+                        self.trial_in_flight = False
+                return
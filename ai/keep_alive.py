@@ -0,0 +1,59 @@
+import threading
+
+import ai.aiCall as aiCall
+
+class ModelKeepAlive:
+    """Keeps the hint model loaded in Ollama while a game is active
+
+    Loads the model in the background as soon as start() is called, so the
+    first hint doesn't pay for model loading, then refreshes Ollama's
+    keep_alive periodically until stop(). switch() moves on to another
+    model. Once stopped, Ollama unloads the model after the usual keep_alive
+    period.
+
+    resolve_model, if given, is called on the background thread to choose
+    the first model, for a choice that has to wait for the backend (such as
+    which models are installed). A switch() made meanwhile takes precedence.
+    """
+    def __init__(self, model="llama2", interval=240, keep_alive=None, resolve_model=None):
+        self.model = model
+        self.resolve_model = resolve_model
+        # Seconds between refreshes; must be shorter than keep_alive
+        self.interval = interval
+        self.keep_alive = keep_alive
+        # Set once the model has been loaded
+        self.warmed = threading.Event()
+        self.stop_event = threading.Event()
+        # Set to refresh straight away instead of waiting for the interval
+        self.wake_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="model-keep-alive", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def switch(self, model):
+        """Keep model loaded from now on, loading it right away"""
+        self.resolve_model = None
+        if model != self.model:
+            self.model = model
+            self.warmed.clear()
+            self.wake_event.set()
+
+    def _run(self):
+        resolve_model = self.resolve_model
+        if resolve_model is not None:
+            model = resolve_model()
+            if self.resolve_model is not None:
+                self.model = model
+        while not self.stop_event.is_set():
+            # Don't ping a backend the circuit breaker knows is down
+            if aiCall.BREAKER.available() and aiCall.warm_up(self.model, self.keep_alive):
+                self.warmed.set()
+            self.wake_event.wait(self.interval)
+            self.wake_event.clear()
@@ -0,0 +1,118 @@
+"""Load test for ai_call against a real or stand-in Ollama server
+
+Usage:
+    python -m ai.load_test --start-server --latency 0.3 --concurrency 1,4,16 --requests 50
+    python -m ai.load_test --url http://localhost:11434 --stream --concurrency 1,2
+
+Reports p50/p95/p99 latency and throughput for each concurrency level. With
+--stream it drives ai_call_stream and also reports time to first token.
+--background N keeps N batch requests running throughout, to check that the
+scheduler keeps interactive latency down under load.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ai.aiCall as aiCall
+from ai.metrics import latency_summary, format_summary
+from ai.mock_server import StandInServer, add_config_arguments, config_from_args
+from ai.scheduler import SCHEDULER, PRIORITY_ORDER, INTERACTIVE, BATCH
+
+TEST_STATE = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b - - 0 1"
+TEST_PROMPT = "Analyze this chess position and give a direct, simple hint about the best move."
+
+def timed_call(model, stream, priority=INTERACTIVE):
+    """Make one AI call and return (latency, time to first token, failed)"""
+    start = time.perf_counter()
+    if stream:
+        first_token = None
+        pieces = []
+        for piece in aiCall.ai_call_stream(TEST_STATE, TEST_PROMPT, model=model, priority=priority):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            pieces.append(piece)
+        text = "".join(pieces)
+    else:
+        text = aiCall.ai_call(TEST_STATE, TEST_PROMPT, model=model, priority=priority)
+        first_token = None
+    latency = time.perf_counter() - start
+    return latency, first_token, "Error:" in text
+
+def run_level(concurrency, requests_count, model, stream, priority=INTERACTIVE):
+    """Run requests_count calls with the given concurrency and return the results"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: timed_call(model, stream, priority), range(requests_count)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _, failed in results if not failed]
+    first_tokens = [ttft for _, ttft, failed in results if ttft is not None and not failed]
+    return {
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "errors": sum(1 for _, _, failed in results if failed),
+        "latency": latency_summary(latencies),
+        "first_token": latency_summary(first_tokens) if stream else None
+    }
+
+def background_load(count, model, stop_event):
+    """Start count threads making batch calls until stop_event is set"""
+    def loop():
+        while not stop_event.is_set():
+            aiCall.ai_call(TEST_STATE, TEST_PROMPT, model=model, priority=BATCH)
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test ai_call at several concurrency levels")
+    parser.add_argument("--url", help="Ollama base URL (defaults to OLLAMA_URL)")
+    parser.add_argument("--start-server", action="store_true", help="run the stand-in server in-process")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="requests per concurrency level")
+    parser.add_argument("--model", default="llama2")
+    parser.add_argument("--stream", action="store_true", help="use ai_call_stream instead of ai_call")
+    parser.add_argument("--priority", choices=PRIORITY_ORDER, default=INTERACTIVE, help="scheduler class")
+    parser.add_argument("--background", type=int, default=0,
+                        help="batch requests kept running alongside, to measure interactive latency under load")
+    parser.add_argument("--slots", type=int,
+                        help="requests the scheduler sends at once (default: largest level plus --background)")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    # Keep one slot for interactive requests only when there is background load to keep them from
+    SCHEDULER.configure(args.slots or max(levels, default=1) + args.background,
+                        reserved=1 if args.background else 0)
+
+    server = None
+    if args.start_server:
+        server = StandInServer(config_from_args(args)).start()
+        aiCall.OLLAMA_URL = server.url
+    elif args.url:
+        aiCall.OLLAMA_URL = args.url
+    aiCall.USE_MOCK = False
+
+    print(f"Load testing {aiCall.OLLAMA_URL} ({'stream' if args.stream else 'non-stream'}, {args.priority})")
+    stop_background = threading.Event()
+    background = background_load(args.background, args.model, stop_background)
+    try:
+        for level in levels:
+            result = run_level(level, args.requests, args.model, args.stream, args.priority)
+            print(f"concurrency={level:<3} {result['throughput']:.2f} req/s, {result['errors']} errors, "
+                  f"latency {format_summary(result['latency'])}")
+            if result["first_token"]:
+                print(f"{'':16}first token {format_summary(result['first_token'])}")
+        print(SCHEDULER.report())
+    finally:
+        stop_background.set()
+        for thread in background:
+            thread.join()
+        if server:
+            server.stop()
+
+if __name__ == "__main__":
+    main()
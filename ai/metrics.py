@@ -0,0 +1,28 @@
+import math
+
+def percentile(values, pct):
+    """Return the pct-th percentile (0-100) of values using the nearest-rank method"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def latency_summary(latencies):
+    """Summarize a list of latencies (seconds) as count, mean, p50/p95/p99 and max"""
+    if not latencies:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(latencies),
+        "mean": sum(latencies) / len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies)
+    }
+
+def format_summary(summary):
+    """Format a latency_summary result in milliseconds for console reports"""
+    return (f"n={summary['count']} mean={summary['mean'] * 1000:.0f}ms "
+            f"p50={summary['p50'] * 1000:.0f}ms p95={summary['p95'] * 1000:.0f}ms "
+            f"p99={summary['p99'] * 1000:.0f}ms max={summary['max'] * 1000:.0f}ms")
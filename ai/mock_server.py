@@ -0,0 +1,180 @@
+"""Local stand-in for the Ollama /api/generate endpoint
+
+Usage:
+    python -m ai.mock_server --port 11435 --latency 0.5 --tokens-per-second 30 --error-rate 0.05
+    OLLAMA_URL=http://127.0.0.1:11435 python main.py
+
+Unlike USE_MOCK in ai.aiCall, this exercises the real HTTP client path:
+connection setup, streaming and non-streaming responses, timeouts and errors.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Words the stand-in "generates", one token each
+HINT_WORDS = ("Consider developing your knight toward the center while keeping an eye on "
+              "undefended pieces and the safety of your king before launching an attack").split()
+
+class StandInConfig:
+    """Behaviour of the stand-in server"""
+    def __init__(self, latency=0.2, jitter=0.0, tokens=30, tokens_per_second=50.0,
+                 error_rate=0.0, hang_rate=0.0):
+        # Seconds before the first token (model load and prompt evaluation)
+        self.latency = latency
+        # Random extra latency of up to this many seconds
+        self.jitter = jitter
+        # Tokens per response and how fast they are produced
+        self.tokens = tokens
+        self.tokens_per_second = tokens_per_second
+        # Fraction of requests that fail with HTTP 500
+        self.error_rate = error_rate
+        # Fraction of requests that never answer, to exercise client timeouts
+        self.hang_rate = hang_rate
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "llama2"}]})
+        else:
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400, "invalid JSON")
+            return
+
+        config = self.server.config
+        start = time.perf_counter()
+
+        roll = random.random()
+        if roll < config.hang_rate:
+            time.sleep(3600)
+            return
+        if roll < config.hang_rate + config.error_rate:
+            self._send_json({"error": "stand-in failure"}, status=500)
+            return
+
+        time.sleep(config.latency + random.uniform(0, config.jitter))
+        # An empty prompt is Ollama's way of loading a model without generating
+        tokens = [] if not request.get("prompt") else \
+            [(" " if i else "") + HINT_WORDS[i % len(HINT_WORDS)] for i in range(config.tokens)]
+        token_delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        model = request.get("model", "llama2")
+
+        if request.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                time.sleep(token_delay)
+                self._write_chunk({"model": model, "response": token, "done": False})
+            self._write_chunk(self._final_fields(model, "", len(tokens), start))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(token_delay * len(tokens))
+            self._send_json(self._final_fields(model, "".join(tokens), len(tokens), start))
+
+    def _final_fields(self, model, text, token_count, start):
+        """Last response object, with timing fields in nanoseconds like Ollama"""
+        total = int((time.perf_counter() - start) * 1e9)
+        config = self.server.config
+        return {
+            "model": model,
+            "response": text,
+            "done": True,
+            "total_duration": total,
+            "load_duration": 0,
+            "prompt_eval_count": 0,
+            "prompt_eval_duration": int(config.latency * 1e9),
+            "eval_count": token_count,
+            "eval_duration": max(0, total - int(config.latency * 1e9))
+        }
+
+    def _write_chunk(self, data):
+        body = (json.dumps(data) + "\n").encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+        self.wfile.flush()
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class StandInServer:
+    """Run the stand-in server on a background thread"""
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = config or StandInConfig()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def add_config_arguments(parser):
+    """Command-line options for StandInConfig, shared with ai.load_test"""
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--tokens", type=int, default=30, help="tokens per response")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="generation speed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+
+def config_from_args(args):
+    return StandInConfig(latency=args.latency, jitter=args.jitter, tokens=args.tokens,
+                         tokens_per_second=args.tokens_per_second, error_rate=args.error_rate,
+                         hang_rate=args.hang_rate)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ollama generate API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = StandInServer(config_from_args(args), args.host, args.port)
+    print(f"Stand-in Ollama listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
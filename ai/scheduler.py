@@ -0,0 +1,163 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from ai.metrics import latency_summary, format_summary
+
+# Priority classes, most urgent first
+INTERACTIVE = "interactive"  # a player is waiting for this hint
+PREFETCH = "prefetch"        # speculative work the player may never see
+BATCH = "batch"              # offline tools such as bulk hint generation
+PRIORITY_ORDER = [INTERACTIVE, PREFETCH, BATCH]
+
+class RequestExpired(Exception):
+    """A request was dropped before it reached the backend"""
+
+class _Ticket:
+    def __init__(self, priority, deadline, key, seq):
+        self.priority = priority
+        self.deadline = deadline
+        self.key = key
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.admitted_as = None
+
+class RequestScheduler:
+    """Decides which queued AI request goes to the backend next
+
+    At most max_concurrent requests run at once, and each priority class has
+    its own limit on top of that. reserved slots are kept free for
+    interactive requests, so prefetches and batch jobs can never take the
+    whole backend. Waiting requests are admitted most urgent class first,
+    oldest first within a class. A request still queued at its deadline, or
+    whose cancel_event is set, is dropped without ever being sent.
+    """
+    def __init__(self, max_concurrent=2, class_limits=None, reserved=1):
+        self.max_concurrent = max_concurrent
+        self.class_limits = class_limits or self._default_limits(max_concurrent)
+        self.reserved = min(reserved, max_concurrent - 1)
+        self.waiting = []
+        self.running = dict.fromkeys(PRIORITY_ORDER, 0)
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+
+        # Statistics per class
+        self.admitted = dict.fromkeys(PRIORITY_ORDER, 0)
+        self.dropped = dict.fromkeys(PRIORITY_ORDER, 0)
+        self.max_depth = dict.fromkeys(PRIORITY_ORDER, 0)
+        self.waits = {priority: deque(maxlen=500) for priority in PRIORITY_ORDER}
+
+    @staticmethod
+    def _default_limits(max_concurrent):
+        # One prefetch at a time; the other classes may use every slot
+        return {INTERACTIVE: max_concurrent, PREFETCH: 1, BATCH: max_concurrent}
+
+    def configure(self, max_concurrent, reserved=1):
+        """Change the number of slots and how many are kept for interactive requests
+
+        For tools that own the backend, such as bulk hint generation, which
+        pass reserved=0 so batch requests can use every slot.
+        """
+        with self.cond:
+            self.max_concurrent = max(1, max_concurrent)
+            self.class_limits = self._default_limits(self.max_concurrent)
+            self.reserved = max(0, min(reserved, self.max_concurrent - 1))
+            self._admit()
+
+    def _can_run(self, priority):
+        total = sum(self.running.values())
+        limit = self.max_concurrent if priority == INTERACTIVE else self.max_concurrent - self.reserved
+        return total < limit and self.running[priority] < self.class_limits[priority]
+
+    def _admit(self):
+        """Admit waiting tickets while slots are free; called with the lock held"""
+        admitted = False
+        for ticket in sorted(self.waiting, key=lambda t: (PRIORITY_ORDER.index(t.priority), t.seq)):
+            if self._can_run(ticket.priority):
+                self.waiting.remove(ticket)
+                ticket.admitted_as = ticket.priority
+                self.running[ticket.priority] += 1
+                self.admitted[ticket.priority] += 1
+                self.waits[ticket.priority].append(time.monotonic() - ticket.enqueued)
+                admitted = True
+        if admitted:
+            self.cond.notify_all()
+
+    def acquire(self, priority=INTERACTIVE, deadline=None, cancel_event=None, key=None):
+        """Wait for a slot and return the ticket holding it
+
+        deadline is a time.monotonic() value. Raises RequestExpired if it
+        passes, or cancel_event is set, before a slot is free.
+        """
+        with self.cond:
+            ticket = _Ticket(priority, deadline, key, next(self.counter))
+            self.waiting.append(ticket)
+            depth = sum(1 for t in self.waiting if t.priority == priority)
+            self.max_depth[priority] = max(self.max_depth[priority], depth)
+            self._admit()
+            while ticket.admitted_as is None:
+                # promote() may have replaced the deadline meanwhile
+                deadline = ticket.deadline
+                now = time.monotonic()
+                expired = deadline is not None and now >= deadline
+                if expired or (cancel_event is not None and cancel_event.is_set()):
+                    self.waiting.remove(ticket)
+                    self.dropped[ticket.priority] += 1
+                    raise RequestExpired("deadline passed" if expired else "cancelled")
+                # Wake up now and then to notice cancellation
+                timeout = 0.1 if deadline is None else min(0.1, deadline - now)
+                self.cond.wait(timeout)
+            return ticket
+
+    def release(self, ticket):
+        with self.cond:
+            self.running[ticket.admitted_as] -= 1
+            self._admit()
+
+    @contextmanager
+    def slot(self, priority=INTERACTIVE, deadline=None, cancel_event=None, key=None):
+        """Hold a backend slot for the enclosed block"""
+        ticket = self.acquire(priority, deadline, cancel_event, key)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def promote(self, key, priority, deadline=None):
+        """Raise the priority of queued requests with this key
+
+        Used when a player joins a prefetch that is still waiting, so they
+        don't wait behind background work for their own hint. The promoted
+        requests take the new deadline (none by default) in place of the
+        background one.
+        """
+        with self.cond:
+            for ticket in self.waiting:
+                if ticket.key == key and PRIORITY_ORDER.index(priority) < PRIORITY_ORDER.index(ticket.priority):
+                    ticket.priority = priority
+                    ticket.deadline = deadline
+            self._admit()
+            self.cond.notify_all()
+
+    def queue_depths(self):
+        """Number of requests waiting in each class"""
+        with self.cond:
+            return {priority: sum(1 for t in self.waiting if t.priority == priority) for priority in PRIORITY_ORDER}
+
+    def report(self):
+        """Summarize admissions, drops, queue depth and queue wait per class"""
+        lines = [f"Scheduler: {self.max_concurrent} concurrent, {self.reserved} reserved for interactive"]
+        for priority in PRIORITY_ORDER:
+            if not self.admitted[priority] and not self.dropped[priority]:
+                continue
+            lines.append(f"  {priority}: {self.admitted[priority]} admitted, {self.dropped[priority]} dropped, "
+                         f"max queue {self.max_depth[priority]}, "
+                         f"wait {format_summary(latency_summary(list(self.waits[priority])))}")
+        return "\n".join(lines)
+
+# Shared by every AI call in the process. Match OLLAMA_NUM_PARALLEL, the
+# number of requests the Ollama server itself runs at once.
+SCHEDULER = RequestScheduler(max_concurrent=max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "2"))))
@@ -0,0 +1,145 @@
+import threading
+import time
+
+class _Flight:
+    """One underlying call and everything it has produced so far"""
+    def __init__(self):
+        self.chunks = []
+        self.result = None
+        self.done = False
+        self.subscribers = 0
+        self.idle_since = None
+        self.cancel_event = threading.Event()
+        self.cond = threading.Condition()
+
+class SingleFlight:
+    """Coalesce identical in-flight calls so they share one result
+
+    While a call for a key is running, further calls with the same key wait
+    for it instead of starting their own. Streams are shared chunk by chunk,
+    and the underlying stream is cancelled once every subscriber has gone
+    away for longer than the grace period, whether or not it has produced
+    anything yet, so a request still queued or waiting for its first token
+    gives up its place.
+    """
+    def __init__(self, grace_period=0.5):
+        self.grace_period = grace_period
+        self.flights = {}
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.calls = 0   # underlying calls actually made
+        self.saved = 0   # requests served by joining a call already in flight
+
+    def call(self, key, fn):
+        """Run fn() once for concurrent callers with the same key and return its result"""
+        key = ("call", key)
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self.flights[key] = flight
+                self.calls += 1
+            else:
+                self.saved += 1
+
+        if not leader:
+            with flight.cond:
+                while not flight.done:
+                    flight.cond.wait()
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        finally:
+            with self.lock:
+                del self.flights[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def stream(self, key, start, cancel_event=None):
+        """Yield the chunks of a shared stream
+
+        start(cancel_event) must return an iterator of chunks; it is only
+        called when no stream for key is in flight. cancel_event detaches this
+        subscriber without affecting the others.
+        """
+        key = ("stream", key)
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self.flights[key] = flight
+                self.calls += 1
+                threading.Thread(target=self._pump, args=(key, flight, start), daemon=True).start()
+            else:
+                self.saved += 1
+            with flight.cond:
+                flight.subscribers += 1
+                flight.idle_since = None
+
+        try:
+            index = 0
+            while True:
+                with flight.cond:
+                    while index >= len(flight.chunks) and not flight.done:
+                        if cancel_event is not None and cancel_event.is_set():
+                            return
+                        flight.cond.wait(0.1)
+                    if index >= len(flight.chunks):
+                        return
+                    chunk = flight.chunks[index]
+                    index += 1
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield chunk
+        finally:
+            with flight.cond:
+                flight.subscribers -= 1
+                idle_since = None
+                if flight.subscribers == 0 and not flight.done:
+                    idle_since = flight.idle_since = time.monotonic()
+            if idle_since is not None:
+                timer = threading.Timer(self.grace_period, self._abandon_if_idle, args=(key, flight, idle_since))
+                timer.daemon = True
+                timer.start()
+
+    def _abandon_if_idle(self, key, flight, idle_since):
+        """Cancel the flight if nobody has joined it since idle_since"""
+        with self.lock, flight.cond:
+            # Someone joined (and maybe left again, starting a new timer) meanwhile
+            if flight.done or flight.subscribers or flight.idle_since != idle_since:
+                return
+            # Nobody is listening any more: stop the underlying call, and
+            # make sure new requests start a fresh one instead of joining
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            flight.cancel_event.set()
+
+    def _pump(self, key, flight, start):
+        """Drive the underlying stream and publish its chunks to subscribers"""
+        try:
+            for chunk in start(flight.cancel_event):
+                if flight.cancel_event.is_set():
+                    break
+                with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except Exception as e:
+            print(f"Shared stream failed: {e}")
+        finally:
+            with self.lock:
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def report(self):
+        """Summarize how many underlying calls were saved by coalescing"""
+        requests = self.calls + self.saved
+        saved_rate = int((self.saved / requests) * 100) if requests else 0
+        return f"Coalescing: {requests} requests, {self.calls} calls made, {self.saved} saved ({saved_rate}%)"
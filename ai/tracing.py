@@ -0,0 +1,160 @@
+"""Timing spans for the hint pipeline, exported as JSON lines
+
+Tracing is off unless HINT_TRACE_FILE is set (or TRACER.path is assigned):
+    HINT_TRACE_FILE=hint_trace.jsonl python main.py
+    python -m ai.tracing hint_trace.jsonl
+
+Each line is one span: the trace it belongs to (one hint request), the stage
+name, its duration in milliseconds and any extra fields such as the
+eval_count and total_duration reported by Ollama. The report prints latency
+percentiles per stage.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from ai.metrics import percentile
+
+# Timing fields Ollama reports in nanoseconds, and the counts that go with them
+MODEL_DURATION_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+MODEL_COUNT_FIELDS = ("prompt_eval_count", "eval_count")
+
+def model_fields(data):
+    """Pick the model-reported timing fields out of an Ollama response, in ms"""
+    fields = {}
+    for name in MODEL_DURATION_FIELDS:
+        if name in data:
+            fields[name + "_ms"] = round(data[name] / 1e6, 2)
+    for name in MODEL_COUNT_FIELDS:
+        if name in data:
+            fields[name] = data[name]
+    return fields
+
+class Tracer:
+    """Records timing spans to a JSON lines file"""
+    def __init__(self, path=None):
+        self.path = path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def new_trace(self):
+        """Start a new trace on this thread and return its id"""
+        trace_id = uuid.uuid4().hex[:12]
+        self.local.trace_id = trace_id
+        return trace_id
+
+    def current_trace(self):
+        return getattr(self.local, "trace_id", None)
+
+    def set_trace(self, trace_id):
+        """Continue an existing trace on this thread (e.g. in a worker)"""
+        self.local.trace_id = trace_id
+
+    @contextmanager
+    def span(self, name, **fields):
+        """Time the enclosed block; the yielded dict can be given extra fields"""
+        if not self.enabled:
+            yield fields
+            return
+        start = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as e:
+            fields["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, **fields)
+
+    def record(self, name, duration, **fields):
+        """Write one span with a duration in seconds"""
+        if not self.enabled:
+            return
+        span = {
+            "trace": self.current_trace(),
+            "name": name,
+            "ts": round(time.time(), 3),
+            "duration_ms": round(duration * 1000, 2),
+            "thread": threading.current_thread().name
+        }
+        span.update(fields)
+        line = json.dumps(span) + "\n"
+        try:
+            with self.lock:
+                with open(self.path, 'a') as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"Could not write trace: {e}")
+
+# Shared tracer for the game, the hint manager and the AI client
+TRACER = Tracer(os.environ.get("HINT_TRACE_FILE"))
+
+def load_spans(path):
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def summarize(spans):
+    """Group spans by stage and compute percentiles of duration and model fields"""
+    values = defaultdict(lambda: defaultdict(list))
+    for span in spans:
+        stage = values[span["name"]]
+        stage["duration_ms"].append(span["duration_ms"])
+        for name in MODEL_DURATION_FIELDS:
+            if name + "_ms" in span:
+                stage[name + "_ms"].append(span[name + "_ms"])
+        for name in MODEL_COUNT_FIELDS:
+            if name in span:
+                stage[name].append(span[name])
+        if "error" in span:
+            stage["errors"].append(1)
+
+    summary = {}
+    for stage, fields in values.items():
+        summary[stage] = {"count": len(fields["duration_ms"]), "errors": len(fields.pop("errors", []))}
+        for field, data in fields.items():
+            summary[stage][field] = {
+                "p50": percentile(data, 50),
+                "p95": percentile(data, 95),
+                "p99": percentile(data, 99)
+            }
+    return summary
+
+def format_report(summary):
+    lines = [f"{'stage':<28}{'count':>7}{'errors':>8}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}"]
+    for stage in sorted(summary):
+        data = summary[stage]
+        duration = data["duration_ms"]
+        lines.append(f"{stage:<28}{data['count']:>7}{data['errors']:>8}"
+                     f"{duration['p50']:>11.1f}{duration['p95']:>11.1f}{duration['p99']:>11.1f}")
+        for field in sorted(data):
+            if field in ("count", "errors", "duration_ms"):
+                continue
+            value = data[field]
+            lines.append(f"  {field:<26}{'':>15}{value['p50']:>11.1f}{value['p95']:>11.1f}{value['p99']:>11.1f}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a hint pipeline trace file")
+    parser.add_argument("trace", help="JSON lines file written with HINT_TRACE_FILE")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary = summarize(load_spans(args.trace))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_report(summary))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Generate hints for many positions offline, e.g. for curated lesson sets
+
+Usage:
+    python -m chess.bulk_hints positions.jsonl -o hints.jsonl --concurrency 4
+
+Each input line is either a JSON object with a "board" field (and optional
+"id", "difficulty" and "type" fields), a FEN string, or a plain board with
+rows separated by "/". Results are appended to the output file as JSON lines as soon as
+each hint is ready, so an interrupted run keeps everything finished so far.
+
+With --bundle, each position gets all nine difficulty/type variants from a
+single AI call instead of one hint.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai.aiCall import ai_call
+from ai.scheduler import SCHEDULER, BATCH
+from ai.metrics import latency_summary, format_summary
+from chess.hint_manager import HintManager, PROMPT_VERSION, GENERATION_OPTIONS, BUNDLE_OPTIONS, parse_bundle
+from chess.fen import is_fen
+
+def read_positions(path, on_error=None):
+    """Yield position dicts from the input file one line at a time
+
+    A JSON line that can't be parsed, or has no "board" field, is reported
+    on stderr and skipped; on_error, if given, is called with its line number.
+    """
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    position = json.loads(line)
+                    if not isinstance(position, dict) or "board" not in position:
+                        raise ValueError("no \"board\" field")
+                except ValueError as e:
+                    print(f"Line {line_no}: skipped, {e}", file=sys.stderr)
+                    if on_error is not None:
+                        on_error(line_no)
+                    continue
+            elif is_fen(line):
+                position = {"board": line}
+            else:
+                position = {"board": "\n".join(line.split("/"))}
+            position.setdefault("id", line_no)
+            yield position
+
+class BulkHintRunner:
+    """Runs hint generation for a stream of positions with bounded concurrency"""
+    def __init__(self, hint_manager, output, concurrency=4, difficulty=None, hint_type=None,
+                 model=None, fill_cache=False, bundle=False):
+        self.hint_manager = hint_manager
+        self.output = output
+        self.concurrency = concurrency
+        self.difficulty = difficulty or hint_manager.current_difficulty
+        self.hint_type = hint_type or hint_manager.current_hint_type
+        # None routes each hint to a model like the game does
+        self.model = model
+        self.fill_cache = fill_cache
+        self.bundle = bundle
+
+        self.write_lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+        self.hints = 0
+
+    def generate(self, position):
+        """Build the adaptive prompt and call the AI for one position"""
+        if self.bundle:
+            return self.generate_bundle(position)
+        board_state = position["board"]
+        difficulty = position.get("difficulty", self.difficulty)
+        hint_type = position.get("type", self.hint_type)
+
+        game_phase = self.hint_manager.determine_game_phase(board_state)
+        prompt = self.hint_manager._create_adaptive_prompt(board_state, game_phase, difficulty, hint_type)
+
+        router = self.hint_manager.model_router
+        model = self.model or router.route(difficulty, hint_type, game_phase)
+
+        start = time.perf_counter()
+        tried = set()
+        while True:
+            tried.add(model)
+            hint = ai_call(board_state, prompt, model=model, options=GENERATION_OPTIONS[difficulty], priority=BATCH,
+                           on_model_missing=router.mark_missing)
+            if self.model or router.is_installed(model):
+                break
+            # Not installed after all; fall back like the game does
+            fallback = router.route(difficulty, hint_type, game_phase)
+            if fallback in tried:
+                break
+            model = fallback
+        latency = time.perf_counter() - start
+
+        result = {
+            "id": position["id"],
+            "board": board_state,
+            "difficulty": difficulty,
+            "type": hint_type,
+            "game_phase": game_phase,
+            "model": model,
+            "hint": hint,
+            "latency_ms": round(latency * 1000, 1)
+        }
+        failed = "Error:" in hint
+
+        self._record([result], latency, failed)
+
+    def generate_bundle(self, position):
+        """Call the AI once for all difficulty and hint type variants of a position"""
+        board_state = position["board"]
+        game_phase = self.hint_manager.determine_game_phase(board_state)
+        prompt = self.hint_manager._create_bundle_prompt(board_state, game_phase)
+
+        model = self.model or self.hint_manager.model
+
+        start = time.perf_counter()
+        response = ai_call(board_state, prompt, model=model, options=BUNDLE_OPTIONS, response_format="json",
+                           priority=BATCH)
+        latency = time.perf_counter() - start
+
+        hints = parse_bundle(response, self.hint_manager.difficulty_levels, self.hint_manager.hint_types)
+        results = [{
+            "id": position["id"],
+            "board": board_state,
+            "difficulty": difficulty,
+            "type": hint_type,
+            "game_phase": game_phase,
+            "model": model,
+            "hint": hint,
+            "latency_ms": round(latency * 1000, 1)
+        } for (difficulty, hint_type), hint in hints.items()]
+        if not results:
+            print(f"Position {position['id']}: no usable hints in bundle response", file=sys.stderr)
+        self._record(results, latency, not results)
+
+    def skip(self, line_no):
+        """Count an input line that couldn't be read as a failed position"""
+        with self.write_lock:
+            self.errors += 1
+
+    def _record(self, results, latency, failed):
+        """Append results to the output and, if asked, to the hint cache"""
+        with self.write_lock:
+            self.latencies.append(latency)
+            if failed:
+                self.errors += 1
+            for result in results:
+                self.output.write(json.dumps(result) + "\n")
+            self.output.flush()
+            self.hints += len(results)
+
+        if self.fill_cache and not failed:
+            for result in results:
+                cache_key = self.hint_manager.hint_cache.make_key(result["board"], result["difficulty"],
+                                                                  result["type"], result["model"], PROMPT_VERSION)
+                self.hint_manager.hint_cache.put(cache_key, result["hint"])
+
+    def run(self, positions):
+        """Process every position, keeping at most 2x concurrency positions in memory"""
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+
+        def task(position):
+            try:
+                self.generate(position)
+            except Exception as e:
+                print(f"Position {position.get('id')} failed: {e}", file=sys.stderr)
+                with self.write_lock:
+                    self.errors += 1
+            finally:
+                slots.release()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for position in positions:
+                slots.acquire()
+                executor.submit(task, position)
+        return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate hints for many positions offline")
+    parser.add_argument("input", help="positions file (JSON lines, FEN or '/'-separated boards)")
+    parser.add_argument("-o", "--output", default="hints.jsonl", help="JSONL file to append results to")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="maximum AI calls in flight")
+    parser.add_argument("--difficulty", choices=["Beginner", "Intermediate", "Hardcore"])
+    parser.add_argument("--type", dest="hint_type", choices=["Direct", "Strategic", "Educational"])
+    parser.add_argument("--model", help="AI model to use (default: routed by difficulty, type and game phase)")
+    parser.add_argument("--fill-cache", action="store_true", help="also store hints in the game's hint cache")
+    parser.add_argument("--bundle", action="store_true",
+                        help="generate every difficulty/type variant per position in one AI call")
+    args = parser.parse_args(argv)
+
+    # No player is waiting, so batch requests may use every slot
+    SCHEDULER.configure(max(1, args.concurrency), reserved=0)
+    hint_manager = HintManager()
+    # Route to installed models only
+    hint_manager.model_router.refresh()
+    with open(args.output, 'a') as output:
+        runner = BulkHintRunner(hint_manager, output, concurrency=max(1, args.concurrency),
+                                difficulty=args.difficulty, hint_type=args.hint_type,
+                                model=args.model, fill_cache=args.fill_cache, bundle=args.bundle)
+        elapsed = runner.run(read_positions(args.input, on_error=runner.skip))
+    hint_manager.close()
+
+    count = runner.hints
+    throughput = count / elapsed if elapsed > 0 else 0.0
+    print(f"Generated {count} hints in {elapsed:.1f}s ({throughput:.2f} hints/s), {runner.errors} errors")
+    print(f"Latency: {format_summary(latency_summary(runner.latencies))}")
+
+if __name__ == "__main__":
+    main()
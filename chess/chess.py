@@ -4,6 +4,8 @@ import random
 
 from .piece import *
 from .utils import *
+from .text_cache import TEXT_CACHE
+from .layers import overlay_surface
 
 import time
 
@@ -52,6 +54,14 @@ class Chess(object):
     def reset(self):
         # clear moves lists
         self.moves = []
+        # number of moves played, used by the UI to notice board changes
+        self.move_count = 0
+        # extra position details needed for FEN; this game has no castling
+        # or en passant moves, so FEN never offers them
+        self.castling = "-"
+        self.en_passant_square = "-"
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
 
         # randomize player turn
         x = random.randint(0, 1)
@@ -59,6 +69,8 @@ class Chess(object):
             self.turn["black"] = 1
         elif(x == 0):
             self.turn["white"] = 1
+        # full moves are counted from whichever side moves first
+        self.first_mover = "black" if self.turn["black"] else "white"
 
         # two dimensonal dictionary containing details about each board location
         # storage format is [piece_name, currently_selected, x_y_coordinate]
@@ -108,23 +120,25 @@ class Chess(object):
                 x = x - 1
 
 
-    # 
-    def play_turn(self):
+    # method to show whose turn it is above the board
+    def draw_turn(self):
         # white color
         white_color = (255, 255, 255)
         # create fonts for texts
-        small_font = pygame.font.SysFont("comicsansms", 20)
+        small_font = TEXT_CACHE.font("comicsansms", 20)
         # create text to be shown on the game menu
         if self.turn["black"]:
-            turn_text = small_font.render("Turn: Black", True, white_color)
+            turn_text = TEXT_CACHE.render(small_font, "Turn: Black", True, white_color)
         elif self.turn["white"]:
-            turn_text = small_font.render("Turn: White", True, white_color)
+            turn_text = TEXT_CACHE.render(small_font, "Turn: White", True, white_color)
         
         # show welcome text
         self.screen.blit(turn_text, 
                       ((self.screen.get_width() - turn_text.get_width()-100) // 2,
                       2))
-        
+
+    # 
+    def play_turn(self):
         # let player with black piece play
         if(self.turn["black"]):
             self.move_piece("black")
@@ -132,59 +146,66 @@ class Chess(object):
         elif(self.turn["white"]):
             self.move_piece("white")
 
-    # method to draw pieces on the chess board
-    def draw_pieces(self):
+    # method to find the highlight color of each square
+    def square_highlights(self):
         transparent_green = (0,194,39,170)
         transparent_blue = (28,21,212,170)
 
-        # create a transparent surface
-        surface = pygame.Surface((self.square_length, self.square_length), pygame.SRCALPHA)
-        surface.fill(transparent_green)
-
-        surface1 = pygame.Surface((self.square_length, self.square_length), pygame.SRCALPHA)
-        surface1.fill(transparent_blue)
-
+        # x, y coordinates -> highlight color
+        highlights = {}
         # loop to change background color of selected piece
         for val in self.piece_location.values():
             for value in val.values() :
-                # name of the piece in the current location
-                piece_name = value[0]
-                # x, y coordinates of the current piece
-                piece_coord_x, piece_coord_y = value[2]
-
                 # change background color of piece if it is selected
                 if value[1] and len(value[0]) > 5:
-                    # if the piece selected is a black piece
+                    # black pieces are highlighted green, white pieces blue
                     if value[0][:5] == "black":
-                        self.screen.blit(surface, self.board_locations[piece_coord_x][piece_coord_y])
-                        if len(self.moves) > 0:
-                            for move in self.moves:
-                                x_coord = move[0]
-                                y_coord = move[1]
-                                if x_coord >= 0 and y_coord >= 0 and x_coord < 8 and y_coord < 8:
-                                    self.screen.blit(surface, self.board_locations[x_coord][y_coord])
-                    # if the piece selected is a white piece
+                        color = transparent_green
                     elif value[0][:5] == "white":
-                        self.screen.blit(surface1, self.board_locations[piece_coord_x][piece_coord_y])
-                        if len(self.moves) > 0:
-                            for move in self.moves:
-                                x_coord = move[0]
-                                y_coord = move[1]
-                                if x_coord >= 0 and y_coord >= 0 and x_coord < 8 and y_coord < 8:
-                                    self.screen.blit(surface1, self.board_locations[x_coord][y_coord])
-        
-        # draw all chess pieces
+                        color = transparent_blue
+                    else:
+                        continue
+                    highlights[tuple(value[2])] = color
+                    for move in self.moves:
+                        x_coord = move[0]
+                        y_coord = move[1]
+                        if x_coord >= 0 and y_coord >= 0 and x_coord < 8 and y_coord < 8:
+                            highlights[(x_coord, y_coord)] = color
+        return highlights
+
+    # method to find what each square shows, to tell which squares need redrawing
+    def square_states(self):
+        highlights = self.square_highlights()
+        states = {}
         for val in self.piece_location.values():
             for value in val.values() :
-                # name of the piece in the current location
-                piece_name = value[0]
-                # x, y coordinates of the current piece
-                piece_coord_x, piece_coord_y = value[2]
-                # check if there is a piece at the square
-                if(len(value[0]) > 1):
-                    # draw piece on the board
-                    self.chess_pieces.draw(self.screen, piece_name, 
-                                            self.board_locations[piece_coord_x][piece_coord_y])
+                coords = tuple(value[2])
+                states[coords] = (value[0], highlights.get(coords))
+        return states
+
+    # method to draw the highlight and piece of one square
+    def draw_square(self, coords, piece_name, highlight):
+        location = self.board_locations[coords[0]][coords[1]]
+        if highlight:
+            # shared transparent surface in the highlight color
+            surface = overlay_surface((self.square_length, self.square_length), highlight)
+            self.screen.blit(surface, location)
+        # check if there is a piece at the square
+        if len(piece_name) > 1:
+            # draw piece on the board
+            self.chess_pieces.draw(self.screen, piece_name, location)
+
+    # method to draw pieces on the chess board
+    def draw_pieces(self, area=None):
+        for coords, (piece_name, highlight) in self.square_states().items():
+            # only squares inside area need drawing
+            if area is None or area.colliderect(self.square_rect(coords)):
+                self.draw_square(coords, piece_name, highlight)
+
+    # method to get the screen rect of a square
+    def square_rect(self, coords):
+        x, y = self.board_locations[coords[0]][coords[1]]
+        return pygame.Rect(x, y, self.square_length, self.square_length)
 
 
     # method to find the possible moves of the selected piece
@@ -219,7 +240,7 @@ class Chess(object):
                             if y_coord < 2:
                                 positions.append([x_coord, y_coord+2])
 
-                        # EM PASSANT
+                        # DIAGONAL CAPTURES
                         # diagonal to the left
                         if x_coord - 1 >= 0 and y_coord + 1 < 8:
                             x = x_coord - 1
@@ -260,7 +281,7 @@ class Chess(object):
                             if y_coord > 5:
                                 positions.append([x_coord, y_coord-2])
 
-                        # EM PASSANT
+                        # DIAGONAL CAPTURES
                         # diagonal to the left
                         if x_coord - 1 >= 0 and y_coord - 1 >= 0:
                             x = x_coord - 1
@@ -505,6 +526,10 @@ class Chess(object):
                     self.piece_location[k][key][1] = False
                     # get the name of the source piece
                     piece_name = self.piece_location[k][key][0]
+                    # track the move clocks for FEN; this game has no castling or en passant
+                    captured_name = self.piece_location[desColChar][desRowNo][0]
+                    self.update_position_details(piece_name, captured_name)
+
                     # move the source piece to the destination piece
                     self.piece_location[desColChar][desRowNo][0] = piece_name
                     
@@ -512,6 +537,8 @@ class Chess(object):
                     # remove source piece from its current position
                     self.piece_location[k][key][0] = ""
 
+                    self.move_count += 1
+
                     # change turn
                     if(self.turn["black"]):
                         self.turn["black"] = 0
@@ -525,6 +552,18 @@ class Chess(object):
                     print("{} moved from {} to {}".format(src_name,  src_location, des_location))
 
 
+    # helper function to keep the FEN move counters in step with a move
+    def update_position_details(self, piece_name, captured_name):
+        # halfmove clock resets on pawn moves and captures
+        if piece_name[6:] == "pawn" or len(captured_name) > 0:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        # full move number goes up once the side that moved second has moved
+        if piece_name[:5] != self.first_mover:
+            self.fullmove_number += 1
+
     # helper function to find diagonal moves
     def diagonal_moves(self, positions, piece_name, piece_coord):
         # reset x and y coordinate values
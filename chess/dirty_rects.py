@@ -0,0 +1,81 @@
+import pygame
+
+def _rect_list(rects):
+    """A region's rects as a list of copies; None means it isn't on screen"""
+    if rects is None:
+        return []
+    if isinstance(rects, pygame.Rect):
+        rects = [rects]
+    return [pygame.Rect(rect) for rect in rects]
+
+def merge_rects(rects):
+    """Combine overlapping rects, so no pixel is redrawn twice in one frame
+
+    Semi-transparent overlays would otherwise be blended onto themselves
+    where two dirty rects meet.
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        # Absorb every rect this one overlaps, starting over as it grows
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+class DirtyTracker:
+    """Remembers what each region of the screen showed in the last frame
+
+    Every frame the caller describes each region by its rect (or rects) and
+    a state value holding everything that affects how it looks. Regions
+    whose state or position changed are dirty both where they were and
+    where they are now; everything else is left as it is on screen.
+    """
+    def __init__(self, screen_rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.regions = {}
+        self.full_redraw = True
+
+        # Statistics
+        self.frames = 0
+        self.redrawn_area = 0
+
+    def invalidate(self):
+        """Redraw the whole screen next frame, e.g. after another screen was shown"""
+        self.full_redraw = True
+
+    def update(self, regions):
+        """Take {name: (rects, state)} for this frame and return the dirty rects"""
+        current = {name: (_rect_list(rects), state) for name, (rects, state) in regions.items()}
+        dirty = []
+        for name, region in current.items():
+            previous = self.regions.get(name)
+            if previous != region:
+                if previous is not None:
+                    dirty.extend(previous[0])
+                dirty.extend(region[0])
+        # Regions gone since last frame leave their old area to repaint
+        for name in self.regions.keys() - current.keys():
+            dirty.extend(self.regions[name][0])
+        self.regions = current
+
+        if self.full_redraw:
+            self.full_redraw = False
+            dirty = [self.screen_rect]
+        dirty = [rect.clip(self.screen_rect) for rect in merge_rects(dirty)]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+
+        self.frames += 1
+        self.redrawn_area += sum(rect.width * rect.height for rect in dirty)
+        return dirty
+
+    def report(self):
+        """Average share of the screen redrawn per frame"""
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        share = self.redrawn_area / (self.frames * screen_area) * 100 if self.frames else 0.0
+        return f"Rendering: {self.frames} frames, {share:.1f}% of the screen redrawn per frame on average"
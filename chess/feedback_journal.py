@@ -0,0 +1,165 @@
+import copy
+import json
+import os
+import queue
+import threading
+
+class FeedbackJournal:
+    """Append-only, write-behind journal for state changed by small events
+
+    append() only queues the event, so callers on the UI thread never wait
+    for disk. A background writer appends each event to the journal as a
+    JSON line and applies it to its own copy of the state; every
+    compact_every events that copy is written as a snapshot (atomically,
+    through a temporary file) and the journal is emptied. recover() loads
+    the snapshot and replays the journal events written after it, skipping
+    a last line cut short by a crash.
+    """
+    def __init__(self, directory, apply_event, default_state, name="hint_feedback", compact_every=50):
+        self.snapshot_path = os.path.join(directory, f"{name}_snapshot.json")
+        self.journal_path = os.path.join(directory, f"{name}.journal")
+        # apply_event(state, event) must be deterministic: it runs once on the
+        # caller's state, once on the writer's copy and again on recovery
+        self.apply_event = apply_event
+        # Called for the initial state when there is no snapshot yet
+        self.default_state = default_state
+        self.compact_every = compact_every
+
+        self.seq = 0
+        # The writer's copy of the state and the last event applied to it
+        self.replica = None
+        self.replica_seq = 0
+        self.queue = queue.Queue()
+        self.thread = None
+
+        # Statistics
+        self.written = 0
+        self.snapshots = 0
+
+    def recover(self):
+        """Load the snapshot, replay the journal and start the writer; returns the state"""
+        state = None
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r') as f:
+                    snapshot = json.load(f)
+                state = snapshot["state"]
+                snapshot_seq = snapshot["seq"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not read feedback snapshot: {e}")
+        if state is None:
+            state = self.default_state()
+
+        self.seq = snapshot_seq
+        replayed = 0
+        for event in self._read_journal():
+            # Events up to the snapshot are already part of it, and an event
+            # written again after a failed append is only applied once
+            if event.get("seq", 0) > self.seq:
+                self.apply_event(state, event)
+                self.seq = event["seq"]
+                replayed += 1
+
+        self.replica = copy.deepcopy(state)
+        self.replica_seq = self.seq
+        self.thread = threading.Thread(target=self._run, name="feedback-journal", daemon=True)
+        self.thread.start()
+        # Fold replayed events into a fresh snapshot straight away
+        if replayed:
+            self.queue.put("snapshot")
+        return state
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A write interrupted by a crash; nothing after it was acknowledged
+                    break
+
+    def append(self, event):
+        """Record an event that the caller has already applied to its own state"""
+        self.seq += 1
+        event["seq"] = self.seq
+        self.queue.put(event)
+
+    def close(self):
+        """Write everything still queued, then a final snapshot if needed"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def _run(self):
+        pending = 0
+        # Events whose write failed, retried ahead of the next ones
+        unwritten = []
+        while True:
+            items = [self.queue.get()]
+            # Write everything queued meanwhile in one go
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            events = unwritten + [item for item in items if isinstance(item, dict)]
+            if events:
+                if self._write_events(events):
+                    pending += len(events)
+                    unwritten = []
+                else:
+                    unwritten = events
+            # Closing only writes a snapshot if something changed since the last one
+            if (None in items and pending) or "snapshot" in items or pending >= self.compact_every:
+                self._snapshot()
+                pending = 0
+            if None in items:
+                if unwritten:
+                    print(f"Lost {len(unwritten)} feedback events that could not be journaled")
+                return
+
+    def _write_events(self, events):
+        """Append events to the journal; returns False if they couldn't be written"""
+        try:
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.journal_path, 'a') as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Could not write feedback journal: {e}")
+            return False
+        # Only journaled events may reach the snapshot, or the journal and
+        # snapshot would disagree about what was acknowledged
+        for event in events:
+            self.apply_event(self.replica, event)
+        self.replica_seq = events[-1]["seq"]
+        self.written += len(events)
+        return True
+
+    def _snapshot(self):
+        """Write the writer's copy of the state atomically and empty the journal"""
+        try:
+            temp_path = self.snapshot_path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({"seq": self.replica_seq, "state": self.replica}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+            # Safe to empty now: every event in it is part of the snapshot
+            open(self.journal_path, 'w').close()
+            self.snapshots += 1
+        except OSError as e:
+            print(f"Could not write feedback snapshot: {e}")
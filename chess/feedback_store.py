@@ -0,0 +1,235 @@
+"""SQLite store for hint feedback and player profiles, shared by many players
+
+Usage:
+    python -m chess.feedback_store feedback.db --by difficulty --player alice
+
+Every feedback event is kept as a row, so effectiveness can be broken down
+by player, difficulty, hint type and game phase with indexed queries instead
+of loading the history into memory. Each player's running totals and
+profile are kept as one JSON row, updated in the same transaction as the
+events that changed them.
+"""
+import argparse
+import copy
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feedback_events (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    time REAL NOT NULL,
+    difficulty TEXT NOT NULL,
+    hint_type TEXT NOT NULL,
+    game_phase TEXT,
+    helpful INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    player_id INTEGER PRIMARY KEY REFERENCES players(id),
+    state TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_player ON feedback_events (player_id, difficulty, hint_type, game_phase, helpful);
+CREATE INDEX IF NOT EXISTS idx_events_difficulty ON feedback_events (difficulty, helpful);
+CREATE INDEX IF NOT EXISTS idx_events_type ON feedback_events (hint_type, helpful);
+CREATE INDEX IF NOT EXISTS idx_events_phase ON feedback_events (game_phase, helpful);
+"""
+
+# Columns effectiveness can be grouped by
+GROUP_COLUMNS = {
+    "difficulty": "difficulty",
+    "type": "hint_type",
+    "phase": "game_phase"
+}
+
+def connect(path):
+    """Open the database, creating the tables and indexes if needed"""
+    conn = sqlite3.connect(path, timeout=30)
+    # WAL lets readers (stats queries, other games) run while a batch is written
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def player_id(conn, name, create=True):
+    """Row id of a player, added on first use"""
+    if create:
+        # Another game may add the same player at the same time; the name is unique
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO players (name, created) VALUES (?, ?)", (name, time.time()))
+    row = conn.execute("SELECT id FROM players WHERE name = ?", (name,)).fetchone()
+    return row[0] if row is not None else None
+
+class FeedbackStore:
+    """Write-behind feedback persistence for one player in a shared database
+
+    Has the same recover() / append() / close() interface as FeedbackJournal.
+    A background thread writes queued events in batches: one transaction
+    inserts the batch's rows and replaces the player's state row, so the two
+    never disagree after a crash.
+    """
+    def __init__(self, path, apply_event, default_state, player="default", batch_size=100):
+        self.path = path
+        self.apply_event = apply_event
+        # Called for the initial state of a player the store hasn't seen
+        self.default_state = default_state
+        self.player = player
+        self.batch_size = batch_size
+
+        self.player_id = None
+        self.replica = None
+        self.queue = queue.Queue()
+        self.thread = None
+
+        # Statistics
+        self.written = 0
+        self.batches = 0
+
+    def recover(self):
+        """Load this player's state and start the writer; returns the state"""
+        conn = connect(self.path)
+        try:
+            self.player_id = player_id(conn, self.player)
+            row = conn.execute("SELECT state FROM profiles WHERE player_id = ?", (self.player_id,)).fetchone()
+        finally:
+            conn.close()
+        state = json.loads(row[0]) if row is not None else self.default_state()
+
+        self.replica = copy.deepcopy(state)
+        self.thread = threading.Thread(target=self._run, name="feedback-store", daemon=True)
+        self.thread.start()
+        return state
+
+    def append(self, event):
+        """Record an event that the caller has already applied to its own state"""
+        self.queue.put(event)
+
+    def close(self):
+        """Write everything still queued"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def _run(self):
+        # sqlite3 connections belong to the thread that opened them
+        conn = connect(self.path)
+        # Events from a batch whose transaction failed, retried with the next one
+        unwritten = []
+        try:
+            while True:
+                events = [self.queue.get()]
+                while len(events) < self.batch_size:
+                    try:
+                        events.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                done = None in events
+                events = unwritten + [event for event in events if event is not None]
+                if events:
+                    unwritten = [] if self._write_batch(conn, events) else events
+                if done:
+                    if unwritten:
+                        print(f"Lost {len(unwritten)} feedback events that could not be written to {self.path}")
+                    return
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, events):
+        """Write a batch in one transaction; returns False if it was rolled back"""
+        # The replica only moves on once the batch is committed, so the state
+        # row never includes events whose rows were rolled back
+        state = copy.deepcopy(self.replica)
+        for event in events:
+            self.apply_event(state, event)
+        rows = [(self.player_id, event.get("time", time.time()), event["difficulty"], event["type"],
+                 event["game_phase"], int(event["helpful"])) for event in events]
+        try:
+            with conn:
+                conn.executemany("INSERT INTO feedback_events (player_id, time, difficulty, hint_type, game_phase, helpful) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("INSERT OR REPLACE INTO profiles (player_id, state, updated) VALUES (?, ?, ?)",
+                             (self.player_id, json.dumps(state), time.time()))
+        except sqlite3.Error as e:
+            print(f"Could not write feedback to {self.path}: {e}")
+            return False
+        self.replica = state
+        self.written += len(events)
+        self.batches += 1
+        return True
+
+def effectiveness(conn, by="difficulty", player=None, since=None):
+    """Helpful and total feedback counts grouped by difficulty, type or phase
+
+    Returns {value: (helpful, total)}, for one player or everyone, optionally
+    only for feedback given after the time.time() value since.
+    """
+    column = GROUP_COLUMNS[by]
+    where, params = [], []
+    if player is not None:
+        pid = player_id(conn, player, create=False)
+        if pid is None:
+            return {}
+        where.append("player_id = ?")
+        params.append(pid)
+    if since is not None:
+        where.append("time >= ?")
+        params.append(since)
+    sql = f"SELECT {column}, SUM(helpful), COUNT(*) FROM feedback_events"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" GROUP BY {column}"
+    return {value: (helpful, total) for value, helpful, total in conn.execute(sql, params)}
+
+def player_totals(conn, limit=None):
+    """(name, helpful, total) for each player with feedback, most feedback first"""
+    sql = ("SELECT players.name, SUM(helpful), COUNT(*) FROM feedback_events "
+           "JOIN players ON players.id = feedback_events.player_id "
+           "GROUP BY player_id ORDER BY COUNT(*) DESC")
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return conn.execute(sql).fetchall()
+
+def load_profile(conn, player):
+    """A player's stored feedback totals and profile, or None"""
+    pid = player_id(conn, player, create=False)
+    if pid is None:
+        return None
+    row = conn.execute("SELECT state FROM profiles WHERE player_id = ?", (pid,)).fetchone()
+    return json.loads(row[0]) if row is not None else None
+
+def _percent(helpful, total):
+    return int((helpful / total) * 100) if total else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show hint effectiveness from a feedback database")
+    parser.add_argument("database", help="SQLite file written by the game (FEEDBACK_DB)")
+    parser.add_argument("--by", choices=sorted(GROUP_COLUMNS), default="difficulty", help="group feedback by")
+    parser.add_argument("--player", help="only this player's feedback (default: everyone)")
+    parser.add_argument("--days", type=float, help="only feedback from the last N days")
+    parser.add_argument("--top", type=int, default=10, help="players to list")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.database)
+    since = time.time() - args.days * 86400 if args.days else None
+    print(f"Effectiveness by {args.by}" + (f" for {args.player}" if args.player else ""))
+    for value, (helpful, total) in sorted(effectiveness(conn, args.by, args.player, since).items(),
+                                          key=lambda item: str(item[0])):
+        print(f"  {value}: {helpful}/{total} helpful ({_percent(helpful, total)}%)")
+    if not args.player:
+        print("Players with the most feedback")
+        for name, helpful, total in player_totals(conn, args.top):
+            print(f"  {name}: {helpful}/{total} helpful ({_percent(helpful, total)}%)")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import re
+
+# FEN letter for each piece type; white pieces are upper case
+PIECE_LETTERS = {
+    "pawn": "p",
+    "knight": "n",
+    "bishop": "b",
+    "rook": "r",
+    "queen": "q",
+    "king": "k"
+}
+LETTER_PIECES = {letter: name for name, letter in PIECE_LETTERS.items()}
+
+FEN_PATTERN = re.compile(r"^([prnbqkPRNBQK1-8]{1,8}/){7}[prnbqkPRNBQK1-8]{1,8}\s+[wb](\s|$)")
+
+# The game has no castling or en passant, so those fields are always "-"
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+def is_fen(text):
+    """True if text looks like a FEN string rather than another board format"""
+    return bool(FEN_PATTERN.match(text.strip()))
+
+def board_to_fen(board, side_to_move="w", castling="-", en_passant="-", halfmove=0, fullmove=1):
+    """Serialize an 8x8 board (row 0 is rank 8) of names like "white_knight" to FEN"""
+    ranks = []
+    for row in board:
+        rank = ""
+        empty = 0
+        for piece in row:
+            if not piece:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            color, piece_type = piece.split("_")
+            letter = PIECE_LETTERS[piece_type]
+            rank += letter.upper() if color == "white" else letter
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+
+    return f"{'/'.join(ranks)} {side_to_move} {castling or '-'} {en_passant or '-'} {halfmove} {fullmove}"
+
+def fen_to_board(fen):
+    """Parse FEN into an 8x8 board (row 0 is rank 8) and a dict of the other fields
+
+    Missing trailing fields get their usual defaults. Raises ValueError for
+    anything that is not a valid piece placement.
+    """
+    fields = fen.strip().split()
+    if not fields:
+        raise ValueError("empty FEN")
+    ranks = fields[0].split("/")
+    if len(ranks) != 8:
+        raise ValueError(f"FEN needs 8 ranks, got {len(ranks)}")
+
+    board = []
+    for rank in ranks:
+        row = []
+        for char in rank:
+            if char.isdigit():
+                row.extend([None] * int(char))
+            elif char.lower() in LETTER_PIECES:
+                color = "white" if char.isupper() else "black"
+                row.append(f"{color}_{LETTER_PIECES[char.lower()]}")
+            else:
+                raise ValueError(f"invalid FEN character {char!r}")
+        if len(row) != 8:
+            raise ValueError(f"FEN rank {rank!r} does not have 8 squares")
+        board.append(row)
+
+    defaults = ["w", "-", "-", "0", "1"]
+    fields = fields[1:] + defaults[len(fields) - 1:]
+    info = {
+        "side_to_move": fields[0],
+        "castling": fields[1],
+        "en_passant": fields[2],
+        "halfmove": int(fields[3]),
+        "fullmove": int(fields[4])
+    }
+    return board, info
+
+def position_key(fen):
+    """FEN without the move clocks, which don't change what a good hint is"""
+    return " ".join(fen.strip().split()[:4])
+
+def count_pieces(fen):
+    """Number of pieces on the board described by fen"""
+    return sum(1 for char in fen.strip().split()[0] if char.isalpha())
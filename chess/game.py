@@ -6,6 +6,12 @@ from chess.chess import Chess
 from chess.utils import Utils
 from chess.hint_manager import HintManager
 from chess.tooltip import ChessTooltip
+from chess.dirty_rects import DirtyTracker
+from chess.text_cache import TEXT_CACHE
+from chess.layers import LayerCache, overlay_surface
+from chess.fen import board_to_fen
+from ai.tracing import TRACER
+from ai.keep_alive import ModelKeepAlive
 import copy
 # Move the button back to the right side
 SUGGEST_BUTTON_RECT = pygame.Rect(660, 100, 140, 40)  # x, y, width, height
@@ -48,6 +54,8 @@ class Game:
         
         # Initialize hint manager and tooltip
         self.hint_manager = HintManager()
+        # Load the hint model in the background and keep it loaded while the game runs
+        self.model_keep_alive = ModelKeepAlive(resolve_model=self.hint_manager.startup_model).start()
         self.tooltip = ChessTooltip(position=(150, 150), size=(450, 250))
         
         # Position for hint UI controls (right side of screen again)
@@ -56,6 +64,15 @@ class Game:
         
         # Flag to track if minimax suggested move is showing
         self.showing_minimax_suggestion = False
+        
+        # Only the parts of the game screen that changed are redrawn each frame
+        self.dirty_tracker = DirtyTracker(self.screen.get_rect())
+        # Screen shown last frame, to redraw everything when it changes
+        self.shown_screen = None
+        # Pre-rendered backgrounds, panels and static screens
+        self.layers = LayerCache()
+        # Whether the menu or winner screen is already on the display
+        self.static_shown = False
 
     def create_starting_board(self):
         # Returns a standard 8x8 chess board setup
@@ -244,38 +261,49 @@ class Game:
             return min_eval, best_move
 
     def save_board_to_file(self,board, filename="board_state.txt"):
+        # save the position as FEN so it can be loaded by other chess tools
         with open(filename, "w") as f:
-            for row in board:
-                f.write(' '.join([piece if piece else '.' for piece in row]) + "\n")
+            f.write(self.board_to_fen(board, self.chess.turn) + "\n")
 
     def suggest_move(self,board, turn):
         color = 'white' if turn['white'] else 'black'
         
-        # Get board representation as a string for AI
-        board_str = self.board_to_string(board)
+        # Each hint request gets its own trace of timing spans
+        trace_id = TRACER.new_trace() if TRACER.enabled else None
+        
+        # Get board representation as FEN for AI
+        with TRACER.span("game.board_to_fen"):
+            board_str = self.board_to_fen(board, turn)
         
         # Store the current board state for feedback processing
         self.current_board_state = board_str
         
         # Use the smart hint system instead of just minimax
         if not self.showing_minimax_suggestion:
-            # Generate hint from AI
-            hint = self.hint_manager.generate_hint(board_str)
-            # Show hint in tooltip
-            self.tooltip.show(hint)
+            # Generate the hint in the background and stream it into the tooltip,
+            # which shows a loading state until the first words arrive
+            with TRACER.span("game.suggest_move"):
+                stream_id = self.tooltip.start_stream(trace_id)
+                def on_done(suggestion):
+                    if suggestion:
+                        self.tooltip.push_chunk(stream_id, suggestion)
+                    self.tooltip.end_stream(stream_id)
+                self.hint_manager.request_hint(
+                    board_str,
+                    on_chunk=lambda chunk: self.tooltip.push_chunk(stream_id, chunk),
+                    on_done=on_done)
             return None  # No move to highlight
         else:
             # Use minimax for move suggestion (original behavior)
             _, move = self.minimax(board, depth=3, alpha=float('-inf'), beta=float('inf'), maximizing=True, color=color)
             return move
 
-    def board_to_string(self, board):
-        """Convert board to string representation for AI"""
-        result = ""
-        for row in board:
-            row_str = ' '.join([piece if piece else '.' for piece in row])
-            result += row_str + "\n"
-        return result
+    def board_to_fen(self, board, turn):
+        """Convert board to FEN, the compact representation sent to the AI"""
+        # black plays when both flags are set, as in Chess.play_turn
+        side_to_move = 'b' if turn['black'] else 'w'
+        return board_to_fen(board, side_to_move, self.chess.castling, self.chess.en_passant_square,
+                            self.chess.halfmove_clock, self.chess.fullmove_number)
 
     def start_game(self):
         """Function containing main game loop""" 
@@ -308,10 +336,12 @@ class Game:
         self.chess = Chess(self.screen, pieces_src, self.board_locations, square_length)
 
         # Font for hint UI
-        self.hint_font = pygame.font.SysFont("Arial", 14)
+        self.hint_font = TEXT_CACHE.font("Arial", 14)
         
         # Track current board state for feedback
         self.current_board_state = ""
+        # Moves seen so far, to notice when the board changes
+        self.last_move_count = 0
 
         # game loop
         while self.running:
@@ -326,13 +356,23 @@ class Game:
                     self.running = False
                 elif key_pressed[K_SPACE]:
                     self.chess.reset()
+                # the window was uncovered; draw the whole screen again
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.shown_screen = None
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     # Check if the hint manager handles the event
                     if self.hint_manager.handle_click(event.pos, self.current_board_state):
+                        # New settings may route hints to another model; load that one instead
+                        board_2d = self.piece_location_to_board(self.chess.piece_location)
+                        self.model_keep_alive.switch(
+                            self.hint_manager.route_model(self.board_to_fen(board_2d, self.chess.turn)))
                         continue
                         
                     # Check if tooltip needs to handle the event
                     self.tooltip.handle_event(event)
+                    # Closing the tooltip cancels a hint that is still generating
+                    if not self.tooltip.show_tooltip:
+                        self.hint_manager.cancel_pending()
                         
                     # Check if suggest button was clicked
                     if SUGGEST_BUTTON_RECT.collidepoint(event.pos):
@@ -346,77 +386,59 @@ class Game:
                         suggested_move = self.suggest_move(board_2d, self.chess.turn)
                         if suggested_move:
                             self.highlighted_move = suggested_move
+            # A hint for a position that no longer exists is not worth waiting for
+            if self.chess.move_count != self.last_move_count:
+                self.last_move_count = self.chess.move_count
+                self.hint_manager.cancel_pending()
+                if self.tooltip.streaming:
+                    self.tooltip.hide()
+                # The next hint request is predictable, so start on it now
+                board_2d = self.piece_location_to_board(self.chess.piece_location)
+                self.hint_manager.prefetch_hint(self.board_to_fen(board_2d, self.chess.turn))
+            # hints finished by worker threads are shown from here, on this thread
+            self.hint_manager.poll_results()
+
             winner = self.chess.winner
 
             if self.menu_showed == False:
+                self.show_screen("menu")
                 self.menu()
             elif len(winner) > 0:
+                self.show_screen("winner")
                 self.declare_winner(winner)
             else:
-                self.game()
-                self.draw_suggest_button()
-                
-                # Draw hint controls
-                self.hint_manager.draw_controls(self.screen, self.hint_font)
-                
-                # Draw tooltip if visible
-                self.tooltip.draw(self.screen)
-                
-                if hasattr(self, 'highlighted_move') and self.highlighted_move:
-                    self.draw_highlighted_move(self.screen, self.highlighted_move)
-
-            # update display
-            pygame.display.flip()
+                self.show_screen("game")
+                self.chess.play_turn()
+                self.tooltip.update()
+                # update only the parts of the display that were redrawn
+                dirty = self.game()
+                if dirty:
+                    pygame.display.update(dirty)
             # update events
             pygame.event.pump()
 
+        if self.dirty_tracker.frames and TRACER.enabled:
+            print(self.dirty_tracker.report())
+        # save cached hints and other lazily written hint data
+        self.hint_manager.close()
+        # let the backend unload the model once its keep_alive runs out
+        self.model_keep_alive.stop()
         # call method to stop pygame
         pygame.quit()
     
 
     def menu(self):
         """method to show game menu"""
-        # background color
-        bg_color = (255, 255, 255)
-        # set background color
-        self.screen.fill(bg_color)
-        # black color
-        black_color = (0, 0, 0)
-        
-        # Center the "Play" button properly
-        button_width = 100
-        button_height = 50
-        screen_width = self.screen.get_width()
-        screen_height = self.screen.get_height()
-        
-        # coordinates for "Play" button - properly centered
-        start_btn = pygame.Rect((screen_width - button_width) // 2, 300, button_width, button_height)
-        
-        # show play button
-        pygame.draw.rect(self.screen, black_color, start_btn)
+        # the menu never changes, so it is drawn once and only shown again after another screen
+        if not self.static_shown:
+            self.screen.blit(self.layers.get("menu", self.screen.get_size(), self.build_menu), (0, 0))
+            # update display
+            pygame.display.flip()
+            self.static_shown = True
 
+        start_btn = self.menu_button_rect()
         # white color
         white_color = (255, 255, 255)
-        # create fonts for texts
-        big_font = pygame.font.SysFont("comicsansms", 50)
-        small_font = pygame.font.SysFont("comicsansms", 20)
-        # create text to be shown on the game menu
-        welcome_text = big_font.render("Chess", False, black_color)
-        created_by = small_font.render("Created by Sheriff", True, black_color)
-        start_btn_label = small_font.render("Play", True, white_color)
-        
-        # show welcome text
-        self.screen.blit(welcome_text, 
-                      ((self.screen.get_width() - welcome_text.get_width()) // 2, 
-                      150))
-        # show credit text
-        self.screen.blit(created_by, 
-                      ((self.screen.get_width() - created_by.get_width()) // 2, 
-                      self.screen.get_height() - created_by.get_height() - 100))
-        # show text on the Play button
-        self.screen.blit(start_btn_label, 
-                      ((start_btn.x + (start_btn.width - start_btn_label.get_width()) // 2, 
-                      start_btn.y + (start_btn.height - start_btn_label.get_height()) // 2)))
 
         # get pressed keys
         key_pressed = pygame.key.get_pressed()
@@ -432,6 +454,7 @@ class Game:
             if start_btn.collidepoint(mouse_coords[0], mouse_coords[1]):
                 # change button behavior as it is hovered
                 pygame.draw.rect(self.screen, white_color, start_btn, 3)
+                pygame.display.update(start_btn)
                 
                 # change menu flag
                 self.menu_showed = True
@@ -439,67 +462,162 @@ class Game:
             elif key_pressed[K_RETURN]:
                 self.menu_showed = True
 
+    def menu_button_rect(self):
+        # Center the "Play" button properly
+        button_width = 100
+        button_height = 50
+        screen_width = self.screen.get_width()
+        # coordinates for "Play" button - properly centered
+        return pygame.Rect((screen_width - button_width) // 2, 300, button_width, button_height)
 
-    def game(self):
+    def build_menu(self):
+        """Draw the game menu into a layer"""
+        layer = pygame.Surface(self.screen.get_size()).convert()
         # background color
-        color = (0,0,0)
-        # set backgound color
-        self.screen.fill(color)
+        bg_color = (255, 255, 255)
+        # set background color
+        layer.fill(bg_color)
+        # black color
+        black_color = (0, 0, 0)
         
+        start_btn = self.menu_button_rect()
+        # show play button
+        pygame.draw.rect(layer, black_color, start_btn)
+
+        # white color
+        white_color = (255, 255, 255)
+        # create fonts for texts
+        big_font = TEXT_CACHE.font("comicsansms", 50)
+        small_font = TEXT_CACHE.font("comicsansms", 20)
+        # create text to be shown on the game menu
+        welcome_text = TEXT_CACHE.render(big_font, "Chess", False, black_color)
+        created_by = TEXT_CACHE.render(small_font, "Created by Sheriff", True, black_color)
+        start_btn_label = TEXT_CACHE.render(small_font, "Play", True, white_color)
+        
+        # show welcome text
+        layer.blit(welcome_text, 
+                   ((layer.get_width() - welcome_text.get_width()) // 2, 
+                   150))
+        # show credit text
+        layer.blit(created_by, 
+                   ((layer.get_width() - created_by.get_width()) // 2, 
+                   layer.get_height() - created_by.get_height() - 100))
+        # show text on the Play button
+        layer.blit(start_btn_label, 
+                   ((start_btn.x + (start_btn.width - start_btn_label.get_width()) // 2, 
+                   start_btn.y + (start_btn.height - start_btn_label.get_height()) // 2)))
+        return layer
+
+
+    def show_screen(self, name):
+        """Note which screen is shown; switching screens redraws the game screen in full"""
+        if name != self.shown_screen:
+            self.shown_screen = name
+            self.dirty_tracker.invalidate()
+            self.static_shown = False
+
+    def screen_regions(self):
+        """Rect and displayed state of each part of the game screen"""
+        regions = {}
+        # each square shows a piece and maybe a highlight
+        for coords, state in self.chess.square_states().items():
+            regions[("square", coords)] = (self.chess.square_rect(coords), state)
+        # turn label above the board
+        regions["turn"] = (self.turn_rect(), self.chess.turn["white"])
+        # suggest button and hint controls right of the board
+        regions["controls"] = (self.controls_rect(), self.controls_state())
+        # overlays
+        move = getattr(self, 'highlighted_move', None)
+        regions["suggestion"] = (self.highlighted_move_rects(move), move)
+        regions["tooltip"] = (self.tooltip.tooltip_rect if self.tooltip.show_tooltip else None,
+                              self.tooltip.render_state())
+        return regions
+
+    def turn_rect(self):
+        return pygame.Rect(0, 0, self.board_img.get_width(), self.board_offset_y)
+
+    def controls_rect(self):
+        board_width = self.board_img.get_width()
+        return pygame.Rect(board_width, 0, self.screen.get_width() - board_width, self.screen.get_height())
+
+    def controls_state(self):
+        return (self.showing_minimax_suggestion, self.hint_manager.controls_state())
+
+    def build_background(self):
+        """Draw the black background and the empty board into a layer"""
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        # background color
+        layer.fill((0,0,0))
         # show the chess board
-        self.screen.blit(self.board_img, self.board_dimensions)
+        layer.blit(self.board_img, self.board_dimensions)
+        return layer
 
-        # call self.chess. something
-        self.chess.play_turn()
+    def build_controls(self):
+        """Draw the suggest button and hint controls into a layer"""
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        layer.fill((0,0,0))
+        self.draw_suggest_button(layer)
+        self.hint_manager.draw_controls(layer, self.hint_font)
+        return layer
+
+    def game(self):
+        """Redraw the parts of the game screen that changed and return their rects"""
+        dirty = self.dirty_tracker.update(self.screen_regions())
+        for rect in dirty:
+            # everything drawn is clipped to the dirty rect, so each layer
+            # is composited once there and left alone elsewhere
+            self.screen.set_clip(rect)
+            self.draw_game(rect)
+        self.screen.set_clip(None)
+        return dirty
+
+    def draw_game(self, area):
+        # background and board; the screen is clipped to area, so only that part is copied
+        self.screen.blit(self.layers.get("background", self.screen.get_size(), self.build_background), (0, 0))
+
+        if area.colliderect(self.turn_rect()):
+            self.chess.draw_turn()
         # draw pieces on the chess board
-        self.chess.draw_pieces()
+        self.chess.draw_pieces(area)
+
+        controls_rect = self.controls_rect()
+        if area.colliderect(controls_rect):
+            # Suggest button and hint controls, drawn again only when they change
+            controls = self.layers.get("controls", self.controls_state(), self.build_controls)
+            self.screen.blit(controls, controls_rect, controls_rect)
+        
+        # Draw tooltip if visible
+        if self.tooltip.show_tooltip and area.colliderect(self.tooltip.tooltip_rect):
+            self.tooltip.draw(self.screen)
+        
+        if hasattr(self, 'highlighted_move') and self.highlighted_move:
+            self.draw_highlighted_move(self.screen, self.highlighted_move)
 
-    def draw_suggest_button(self):
+    def draw_suggest_button(self, surface=None):
+        surface = surface or self.screen
         # Use the global SUGGEST_BUTTON_RECT for consistency
         button_color = (50, 50, 50)
         if self.showing_minimax_suggestion:
             button_color = (100, 50, 50)  # Reddish if showing minimax suggestion
-        pygame.draw.rect(self.screen, button_color, SUGGEST_BUTTON_RECT)
-        font = pygame.font.SysFont("comicsansms", 20)
-        text = font.render("Suggest Move", True, (255, 255, 255))
+        pygame.draw.rect(surface, button_color, SUGGEST_BUTTON_RECT)
+        font = TEXT_CACHE.font("comicsansms", 20)
+        text = TEXT_CACHE.render(font, "Suggest Move", True, (255, 255, 255))
         text_rect = text.get_rect(center=SUGGEST_BUTTON_RECT.center)
-        self.screen.blit(text, text_rect)
+        surface.blit(text, text_rect)
 
     def declare_winner(self, winner):
-        # background color
-        bg_color = (255, 255, 255)
-        # set background color
-        self.screen.fill(bg_color)
-        # black color
-        black_color = (0, 0, 0)
+        # the winner screen is drawn once and only shown again after another screen
+        if not self.static_shown:
+            self.screen.blit(self.layers.get("winner", (self.screen.get_size(), winner),
+                                             lambda: self.build_winner(winner)), (0, 0))
+            # update display
+            pygame.display.flip()
+            self.static_shown = True
+
         # coordinates for play again button
         reset_btn = pygame.Rect(250, 300, 140, 50)
-        # show reset button
-        pygame.draw.rect(self.screen, black_color, reset_btn)
-
         # white color
         white_color = (255, 255, 255)
-        # create fonts for texts
-        big_font = pygame.font.SysFont("comicsansms", 50)
-        small_font = pygame.font.SysFont("comicsansms", 20)
-
-        # text to show winner
-        text = winner + " wins!" 
-        winner_text = big_font.render(text, False, black_color)
-
-        # create text to be shown on the reset button
-        reset_label = "Play Again"
-        reset_btn_label = small_font.render(reset_label, True, white_color)
-
-        # show winner text
-        self.screen.blit(winner_text, 
-                      ((self.screen.get_width() - winner_text.get_width()) // 2, 
-                      150))
-        
-        # show text on the reset button
-        self.screen.blit(reset_btn_label, 
-                      ((reset_btn.x + (reset_btn.width - reset_btn_label.get_width()) // 2, 
-                      reset_btn.y + (reset_btn.height - reset_btn_label.get_height()) // 2)))
 
         # get pressed keys
         key_pressed = pygame.key.get_pressed()
@@ -515,6 +633,7 @@ class Game:
             if reset_btn.collidepoint(mouse_coords[0], mouse_coords[1]):
                 # change button behavior as it is hovered
                 pygame.draw.rect(self.screen, white_color, reset_btn, 3)
+                pygame.display.update(reset_btn)
                 
                 # change menu flag
                 self.menu_showed = False
@@ -526,13 +645,58 @@ class Game:
             # clear winner
             self.chess.winner = ""
 
+    def build_winner(self, winner):
+        """Draw the winner screen into a layer"""
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        # background color
+        bg_color = (255, 255, 255)
+        # set background color
+        layer.fill(bg_color)
+        # black color
+        black_color = (0, 0, 0)
+        # coordinates for play again button
+        reset_btn = pygame.Rect(250, 300, 140, 50)
+        # show reset button
+        pygame.draw.rect(layer, black_color, reset_btn)
+
+        # white color
+        white_color = (255, 255, 255)
+        # create fonts for texts
+        big_font = TEXT_CACHE.font("comicsansms", 50)
+        small_font = TEXT_CACHE.font("comicsansms", 20)
+
+        # text to show winner
+        text = winner + " wins!" 
+        winner_text = TEXT_CACHE.render(big_font, text, False, black_color)
+
+        # create text to be shown on the reset button
+        reset_label = "Play Again"
+        reset_btn_label = TEXT_CACHE.render(small_font, reset_label, True, white_color)
+
+        # show winner text
+        layer.blit(winner_text, 
+                   ((layer.get_width() - winner_text.get_width()) // 2, 
+                   150))
+        
+        # show text on the reset button
+        layer.blit(reset_btn_label, 
+                   ((reset_btn.x + (reset_btn.width - reset_btn_label.get_width()) // 2, 
+                   reset_btn.y + (reset_btn.height - reset_btn_label.get_height()) // 2)))
+        return layer
+
+    def highlighted_move_rects(self, move):
+        """Screen rects covered by draw_highlighted_move"""
+        if not move:
+            return None
+        square_size = 80
+        return [pygame.Rect(x * square_size, y * square_size, square_size, square_size) for x, y in move]
+
     def draw_highlighted_move(self,screen, move):
         if move:
             (from_x, from_y), (to_x, to_y) = move
             square_size = 80  # Use your actual square size
             highlight_color = (0, 255, 0, 100)  # semi-transparent green
-            s = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
-            s.fill(highlight_color)
+            s = overlay_surface((square_size, square_size), highlight_color)
             screen.blit(s, (from_x * square_size, from_y * square_size))
             screen.blit(s, (to_x * square_size, to_y * square_size))
 
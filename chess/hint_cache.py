@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from chess.fen import is_fen, position_key
+
+def data_directory():
+    """Directory for the game's data files: CHESS_DATA_DIR, or games/chess by default"""
+    return os.environ.get("CHESS_DATA_DIR", os.path.join("games", "chess"))
+
+class HintCache:
+    """LRU cache of generated hints, persisted to disk between sessions
+
+    Entries are keyed by position, difficulty, hint type, model and prompt
+    version, and expire after max_age seconds. The least recently used entry
+    is evicted once the cache holds more than max_size hints.
+    """
+    def __init__(self, file_path=None, max_size=500, max_age=7 * 24 * 3600, autosave_every=10):
+        self.file_path = file_path or os.path.join(data_directory(), "hint_cache.json")
+        self.max_size = max_size
+        self.max_age = max_age
+        # Write to disk after this many new hints (and always on save())
+        self.autosave_every = autosave_every
+
+        # key -> {"hint": str, "created": float}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Held for a whole save, so concurrent saves can't share the temporary file
+        self.save_lock = threading.Lock()
+        self.unsaved_changes = 0
+        # Called with each key dropped by eviction, expiry or clear(), e.g. to keep an index in step
+        self.on_evict = None
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+        self.load()
+
+    @staticmethod
+    def board_key(board_state):
+        """Normalize a board state so formatting differences map to the same key"""
+        # FEN move clocks don't change the position, so leave them out
+        if is_fen(board_state):
+            return position_key(board_state)
+        lines = [" ".join(line.split()) for line in board_state.strip().splitlines()]
+        return "/".join(line for line in lines if line)
+
+    def make_key(self, board_state, difficulty, hint_type, model, prompt_version):
+        """Build the cache key for a hint request"""
+        return "|".join([self.board_key(board_state), difficulty, hint_type, model, str(prompt_version)])
+
+    def __contains__(self, key):
+        """True if a fresh hint is cached for key, without counting a lookup"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and time.time() - entry["created"] <= self.max_age
+
+    def get(self, key):
+        """Return the cached hint for key, or None if missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # Expired hints are dropped rather than served
+            expired = time.time() - entry["created"] > self.max_age
+            if expired:
+                del self.entries[key]
+                self.unsaved_changes += 1
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry["hint"]
+        self._evicted([key])
+        return None
+
+    def put(self, key, hint):
+        """Store a hint, evicting the least recently used entries if needed"""
+        with self.lock:
+            self.entries[key] = {"hint": hint, "created": time.time()}
+            self.entries.move_to_end(key)
+            evicted = []
+            while len(self.entries) > self.max_size:
+                evicted.append(self.entries.popitem(last=False)[0])
+            self.unsaved_changes += 1
+            should_save = self.unsaved_changes >= self.autosave_every
+
+        self._evicted(evicted)
+        if should_save:
+            self.save()
+
+    def clear(self):
+        """Remove every cached hint"""
+        with self.lock:
+            evicted = list(self.entries)
+            self.entries.clear()
+            self.unsaved_changes += 1
+        self._evicted(evicted)
+
+    def _evicted(self, keys):
+        """Tell on_evict about dropped keys; called without the lock held"""
+        if self.on_evict is not None:
+            for key in keys:
+                self.on_evict(key)
+
+    def hit_rate(self):
+        """Return the percentage of lookups served from the cache"""
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0
+        return int((self.hits / lookups) * 100)
+
+    def load(self):
+        """Load cached hints from file, skipping entries that have expired"""
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load hint cache: {e}")
+            return
+
+        now = time.time()
+        with self.lock:
+            # File is stored oldest first, so insertion order restores LRU order
+            for key, entry in data.get("entries", []):
+                if now - entry.get("created", 0) <= self.max_age:
+                    self.entries[key] = entry
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def save(self):
+        """Write the cache to file atomically"""
+        # Taking the copy under save_lock too means saves land in the order
+        # their copies were taken, so an older copy never replaces a newer one
+        with self.save_lock:
+            with self.lock:
+                data = {"entries": list(self.entries.items())}
+                self.unsaved_changes = 0
+
+            directory = os.path.dirname(self.file_path)
+            try:
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_path = self.file_path + ".tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.file_path)
+            except OSError as e:
+                print(f"Could not save hint cache: {e}")
@@ -0,0 +1,252 @@
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    # The index is optional: without NumPy only exact cache hits are reused
+    np = None
+
+from chess.fen import fen_to_board, is_fen
+from chess.tactics import find_king, in_check, HOME_SQUARES
+
+COLORS = ["white", "black"]
+PAWN_FILE_WEIGHT = 0.5
+# Where each pawn and piece stands, so moves that keep the material and
+# structure the same still move the position away
+PAWN_SQUARE_WEIGHT = 0.5
+PIECE_SQUARE_WEIGHT = 0.35
+# Losing a queen changes the position far more than losing a pawn
+MATERIAL_WEIGHTS = {"pawn": 1.0, "knight": 2.0, "bishop": 2.0, "rook": 2.5, "queen": 3.0}
+STRUCTURE_WEIGHT = 0.75
+KING_WEIGHT = 2.0
+DEVELOPMENT_WEIGHT = 0.75
+# Advice for a king in check never fits a position without one
+CHECK_WEIGHT = 5.0
+
+# Minimum similarity, 1 / (1 + distance), for reusing a hint. Direct hints
+# name concrete moves, which may already have been played or be illegal in
+# a similar position, so they are only reused for the exact position and
+# never indexed.
+MIN_SIMILARITY = {
+    "Strategic": 0.45,
+    "Educational": 0.4
+}
+
+def _pawn_structure(pawns, pawn_files, enemy_pawns, forward):
+    """Doubled, isolated and passed pawn counts for one side"""
+    doubled = sum(count - 1 for count in pawn_files if count > 1)
+    isolated = 0
+    for file, count in enumerate(pawn_files):
+        neighbours = (pawn_files[file - 1] if file > 0 else 0) + (pawn_files[file + 1] if file < 7 else 0)
+        if count and not neighbours:
+            isolated += count
+    passed = 0
+    for row, col in pawns:
+        # No enemy pawn ahead on this or an adjacent file
+        if not any(abs(c - col) <= 1 and (r - row) * forward > 0 for r, c in enemy_pawns):
+            passed += 1
+    return doubled, isolated, passed
+
+def position_features(fen):
+    """Weighted feature vector for material, piece placement, pawn structure and king safety
+
+    Positions whose vectors are close differ only in details (a pawn one
+    square further on, a piece one square away) that rarely change what a
+    good strategic hint says.
+    """
+    board, info = fen_to_board(fen)
+    pawns = {color: [] for color in COLORS}
+    material = {color: dict.fromkeys(MATERIAL_WEIGHTS, 0) for color in COLORS}
+    # Occupied squares per side, pawns and other pieces apart
+    squares = {color: {"pawn": [0.0] * 64, "piece": [0.0] * 64} for color in COLORS}
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if not piece:
+                continue
+            color, kind = piece.split("_")
+            if kind in material[color]:
+                material[color][kind] += 1
+            if kind == "pawn":
+                pawns[color].append((row, col))
+                squares[color]["pawn"][row * 8 + col] = PAWN_SQUARE_WEIGHT
+            else:
+                squares[color]["piece"][row * 8 + col] = PIECE_SQUARE_WEIGHT
+
+    features = []
+    for color in COLORS:
+        enemy = "black" if color == "white" else "white"
+        forward = -1 if color == "white" else 1
+
+        # Material and where it stands
+        features.extend(material[color][kind] * weight for kind, weight in MATERIAL_WEIGHTS.items())
+        features.extend(squares[color]["pawn"])
+        features.extend(squares[color]["piece"])
+
+        # Pawn structure: pawns per file, doubled, isolated and passed pawns
+        pawn_files = [0] * 8
+        for row, col in pawns[color]:
+            pawn_files[col] += 1
+        features.extend(count * PAWN_FILE_WEIGHT for count in pawn_files)
+        structure = _pawn_structure(pawns[color], pawn_files, pawns[enemy], forward)
+        features.extend(value * STRUCTURE_WEIGHT for value in structure)
+
+        # King safety: where the king stands and the pawns sheltering it
+        king = find_king(board, color)
+        if king is None:
+            features.extend([0.0, 0.0, 0.0])
+        else:
+            row, col = king
+            home_row = 7 if color == "white" else 0
+            shield = sum(1 for dc in (-1, 0, 1)
+                         if 0 <= row + forward < 8 and 0 <= col + dc < 8
+                         and board[row + forward][col + dc] == f"{color}_pawn")
+            features.extend([col / 7 * KING_WEIGHT, abs(row - home_row) / 7 * KING_WEIGHT,
+                             shield / 3 * KING_WEIGHT])
+
+        # Development
+        undeveloped = sum(1 for row, col, kind in HOME_SQUARES[color] if board[row][col] == f"{color}_{kind}")
+        features.append(undeveloped * DEVELOPMENT_WEIGHT)
+
+    side = "white" if info["side_to_move"] == "w" else "black"
+    features.append(CHECK_WEIGHT if in_check(board, side) else 0.0)
+    return features
+
+class _Group:
+    """Vectors and cache keys for one combination of side to move and settings"""
+    def __init__(self, size):
+        self.vectors = np.zeros((16, size), dtype=np.float32)
+        self.keys = []
+        # key -> its row in vectors, so adding and removing don't search keys
+        self.rows = {}
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def add(self, key, vector):
+        if len(self.keys) == len(self.vectors):
+            # Grow by doubling so adding stays cheap
+            self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+        self.rows[key] = len(self.keys)
+        self.vectors[len(self.keys)] = vector
+        self.keys.append(key)
+
+    def remove(self, key):
+        index = self.rows.pop(key)
+        last_key = self.keys.pop()
+        if index < len(self.keys):
+            # Move the last vector into the gap
+            self.vectors[index] = self.vectors[len(self.keys)]
+            self.keys[index] = last_key
+            self.rows[last_key] = index
+
+class HintIndex:
+    """Nearest-neighbour index over positions that already have a cached hint
+
+    Positions are grouped by side to move, difficulty, hint type, model and
+    prompt version, so a hint is only reused for the same settings. Lookups
+    compare a feature vector against every vector in the group at once.
+    Only hint types with a minimum similarity are indexed. The index holds
+    the keys the hint cache holds: remove() is called for every hint the
+    cache evicts.
+    """
+    def __init__(self, min_similarity=None):
+        self.min_similarity = min_similarity or MIN_SIMILARITY
+        self.groups = {}
+        self.size = 0
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.lookups = 0
+        self.matches = 0
+
+    @property
+    def enabled(self):
+        return np is not None
+
+    @staticmethod
+    def _split_key(cache_key):
+        """Position and group of a HintCache key, or None if it is not indexable"""
+        fields = cache_key.split("|")
+        if len(fields) != 5 or not is_fen(fields[0]):
+            return None
+        board, difficulty, hint_type, model, prompt_version = fields
+        return board, (board.split()[1], difficulty, hint_type, model, prompt_version)
+
+    def indexes(self, hint_type):
+        return hint_type in self.min_similarity
+
+    def add(self, cache_key):
+        """Index the position of a newly cached hint"""
+        if not self.enabled:
+            return
+        split = self._split_key(cache_key)
+        if split is None:
+            return
+        board, group_key = split
+        if not self.indexes(group_key[2]):
+            return
+        try:
+            vector = position_features(board)
+        except ValueError:
+            return
+        with self.lock:
+            group = self.groups.get(group_key)
+            if group is None:
+                group = self.groups[group_key] = _Group(len(vector))
+            if cache_key not in group:
+                group.add(cache_key, vector)
+                self.size += 1
+
+    def remove(self, cache_key):
+        """Forget a position whose hint is no longer cached"""
+        split = self._split_key(cache_key)
+        if split is None:
+            return
+        with self.lock:
+            group = self.groups.get(split[1])
+            if group is not None and cache_key in group:
+                group.remove(cache_key)
+                self.size -= 1
+
+    def rebuild(self, cache_keys):
+        """Index every position in an existing hint cache"""
+        with self.lock:
+            self.groups.clear()
+            self.size = 0
+        for key in cache_keys:
+            self.add(key)
+
+    def nearest(self, cache_key):
+        """Return (cache key, similarity) of the indexed position closest to
+        the one in cache_key, with the same settings, or None if none is
+        similar enough"""
+        split = self._split_key(cache_key) if self.enabled else None
+        if split is None:
+            return None
+        board, group_key = split
+        hint_type = group_key[2]
+        if not self.indexes(hint_type):
+            return None
+        try:
+            vector = np.asarray(position_features(board), dtype=np.float32)
+        except ValueError:
+            return None
+
+        with self.lock:
+            self.lookups += 1
+            group = self.groups.get(group_key)
+            if group is None or not group.keys:
+                return None
+            distances = np.linalg.norm(group.vectors[:len(group.keys)] - vector, axis=1)
+            index = int(np.argmin(distances))
+            similarity = 1.0 / (1.0 + float(distances[index]))
+            if similarity < self.min_similarity[hint_type]:
+                return None
+            self.matches += 1
+            return group.keys[index], similarity
+
+    def report(self):
+        """Summarize how often a similar position's hint was found"""
+        match_rate = int((self.matches / self.lookups) * 100) if self.lookups else 0
+        return f"Similar positions: {self.size} indexed, {self.matches}/{self.lookups} lookups matched ({match_rate}%)"
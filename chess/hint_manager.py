@@ -1,8 +1,257 @@
+import hashlib
 import json
 import os
 import pygame
+import queue
 import random
-from ai.aiCall import ai_call
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ai.aiCall import ai_call_stream, BREAKER
+from ai.scheduler import SCHEDULER, INTERACTIVE, PREFETCH
+from ai.single_flight import SingleFlight
+from ai.tracing import TRACER
+from chess.feedback_journal import FeedbackJournal
+from chess.feedback_store import FeedbackStore
+from chess.profile_repository import ProfileRepository, shard_directory
+from chess.hint_cache import HintCache, data_directory
+from chess.hint_index import HintIndex
+from chess.model_routing import ModelRouter, DEFAULT_MODEL
+from chess.text_cache import TEXT_CACHE
+from chess.hint_providers import (EngineHintProvider, CacheHintProvider, SimilarHintProvider, AIHintProvider,
+                                  HintPolicy, TACTICAL_FACTS, LATENCY_BUDGETS)
+from chess.fen import STARTING_FEN, is_fen, count_pieces
+
+# Prompt templates based on difficulty and type, built once and shared by every HintManager
+PROMPT_TEMPLATES = {
+    "Beginner": {
+        "Direct": "Analyze this chess position and give a direct, simple hint about the best move. Explain in basic terms that a beginner would understand.",
+        "Strategic": "Analyze this chess position and suggest a simple strategic concept that applies here. Keep it very basic for a beginner.",
+        "Educational": "Explain one basic chess concept relevant to this position that would help a beginner improve their game."
+    },
+    "Intermediate": {
+        "Direct": "Analyze this chess position and suggest a good move. Provide brief reasoning that an intermediate player would understand.",
+        "Strategic": "Analyze this chess position and explain a mid-level strategic concept that applies here. Include some tactical considerations.",
+        "Educational": "Explain an intermediate chess concept relevant to this position that would help a player improve their tactical thinking."
+    },
+    "Hardcore": {
+        "Direct": "Analyze this chess position and give a cryptic hint about the best move. Don't reveal too much, just point in the right direction.",
+        "Strategic": "Analyze this chess position and explain an advanced strategic concept that applies here. Include complex positional considerations.",
+        "Educational": "Explain an advanced chess concept relevant to this position that would help a player develop deeper strategic understanding."
+    }
+}
+
+# Pieces appended to the base prompt by the adaptive logic
+PROMPT_FRAGMENTS = {
+    "fen": "The position is given in FEN notation.",
+    "type_preference": "You tend to find {hint_type} explanations most helpful",
+    "phase_preference": "You seem to appreciate hints during the {phase}",
+    "preferences": "Based on your feedback: {preferences}.",
+    "game_phase": "This appears to be the {phase}.",
+    "simplify": "Break down complex ideas into simpler terms.",
+    "advanced_terms": "You can use advanced chess terminology.",
+    "variety": "Try to include some {hint_type} elements for variety."
+}
+
+# Ollama generation options per difficulty: response length, context size and
+# temperature control both the style of the hint and how long it takes
+GENERATION_OPTIONS = {
+    "Beginner": {"num_predict": 120, "num_ctx": 2048, "temperature": 0.6},
+    "Intermediate": {"num_predict": 180, "num_ctx": 2048, "temperature": 0.7},
+    "Hardcore": {"num_predict": 140, "num_ctx": 4096, "temperature": 0.8}
+}
+
+# Bundle mode asks for every difficulty and hint type in one JSON response,
+# so switching settings afterwards is served from the cache
+BUNDLE_PROMPT = ("Analyze this chess position and write one hint for each difficulty and hint type listed below. "
+                 "Answer with a JSON object only: one key per difficulty, each holding an object with one key "
+                 "per hint type whose value is the hint text.")
+BUNDLE_OPTIONS = {"num_predict": 1400, "num_ctx": 4096, "temperature": 0.7}
+
+# Hash of all prompt text and options, so cached hints are not reused once they change
+PROMPT_VERSION = hashlib.sha1(
+    json.dumps([PROMPT_TEMPLATES, PROMPT_FRAGMENTS, GENERATION_OPTIONS, BUNDLE_PROMPT, BUNDLE_OPTIONS],
+               sort_keys=True).encode()).hexdigest()[:12]
+
+# Identical hint requests in flight at the same time (repeated clicks, several
+# sessions on one position) share a single AI call
+HINT_FLIGHTS = SingleFlight()
+
+def _normalize_name(name):
+    return re.sub(r"[^a-z]", "", str(name).lower())
+
+def parse_bundle(text, difficulties, hint_types):
+    """Pull the hint variants out of a bundle response
+    
+    Accepts an object nested by difficulty and then hint type, flat keys such
+    as "Beginner Direct", or a list of objects with difficulty, type and hint
+    fields, with or without code fences or other text around the JSON.
+    Returns {(difficulty, hint_type): hint} for every usable variant.
+    """
+    if not text or "Error:" in text:
+        return {}
+    
+    # Cut out the JSON value, whatever the model wrote around it
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    end = max(text.rfind("}"), text.rfind("]"))
+    if not starts or end < min(starts):
+        return {}
+    chunk = text[min(starts):end + 1]
+    try:
+        data = json.loads(chunk)
+    except ValueError:
+        # Trailing commas are the most common slip
+        try:
+            data = json.loads(re.sub(r",\s*([}\]])", r"\1", chunk))
+        except ValueError:
+            return {}
+    
+    difficulty_names = {_normalize_name(d): d for d in difficulties}
+    type_names = {_normalize_name(t): t for t in hint_types}
+    hints = {}
+    
+    def add(difficulty, hint_type, value):
+        if isinstance(value, dict):
+            value = value.get("hint") or value.get("text")
+        difficulty = difficulty_names.get(_normalize_name(difficulty))
+        hint_type = type_names.get(_normalize_name(hint_type))
+        if difficulty and hint_type and isinstance(value, str) and value.strip():
+            hints[(difficulty, hint_type)] = value.strip()
+    
+    if isinstance(data, dict) and isinstance(data.get("hints"), (dict, list)):
+        data = data["hints"]
+    if isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict):
+                add(item.get("difficulty"), item.get("type") or item.get("hint_type"), item)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            name = _normalize_name(key)
+            if name in difficulty_names and isinstance(value, dict):
+                for hint_type, hint in value.items():
+                    add(key, hint_type, hint)
+                continue
+            # Flat keys naming both, e.g. "Beginner Direct" or "beginner_direct"
+            difficulty = next((d for n, d in difficulty_names.items() if n in name), None)
+            hint_type = next((t for n, t in type_names.items() if n in name), None)
+            add(difficulty, hint_type, value)
+    return hints
+
+def _update_player_profile(profile, feedback, event):
+    """Update player profile based on feedback"""
+    difficulty = event["difficulty"]
+    was_helpful = event["helpful"]
+    
+    # Update skill level based on feedback
+    if was_helpful:
+        # If player finds hardcore hints helpful, they're probably skilled
+        if difficulty == "Hardcore":
+            profile["skill_level"] = min(10.0, profile["skill_level"] + 0.2)
+        # If they find beginner hints helpful, they might be newer
+        elif difficulty == "Beginner":
+            pass  # No change, finding basic hints helpful doesn't indicate skill level
+    else:
+        # If they don't find beginner hints helpful, might be too simple
+        if difficulty == "Beginner":
+            profile["skill_level"] = min(10.0, profile["skill_level"] + 0.1)
+        # If they don't find hardcore hints helpful, might be too advanced
+        elif difficulty == "Hardcore":
+            profile["skill_level"] = max(1.0, profile["skill_level"] - 0.1)
+    
+    # Update context weights
+    weight_change = 0.1 if was_helpful else -0.05
+    profile["context_weights"][event["game_phase"]] += weight_change
+    
+    # Update preferred settings based on overall effectiveness
+    type_effectiveness = {}
+    for hint_type, type_data in feedback["by_type"].items():
+        if type_data["total"] > 0:
+            effectiveness = type_data["helpful"] / type_data["total"]
+            type_effectiveness[hint_type] = effectiveness
+    
+    # If we have enough data, update preferred type
+    if type_effectiveness and max(type_effectiveness.values()) > 0.6:
+        profile["preferred_type"] = max(type_effectiveness, key=type_effectiveness.get)
+    
+    # Similarly for difficulty
+    difficulty_effectiveness = {}
+    for level, diff_data in feedback["by_difficulty"].items():
+        if diff_data["total"] > 0:
+            effectiveness = diff_data["helpful"] / diff_data["total"]
+            difficulty_effectiveness[level] = effectiveness
+    
+    # If we have enough data, update preferred difficulty
+    if difficulty_effectiveness and max(difficulty_effectiveness.values()) > 0.6:
+        profile["preferred_difficulty"] = max(difficulty_effectiveness, key=difficulty_effectiveness.get)
+    
+    # Add to hint history
+    profile["hint_history"].append({
+        "difficulty": difficulty,
+        "type": event["type"],
+        "helpful": was_helpful,
+        "game_phase": event["game_phase"]
+    })
+    
+    # Keep history manageable (last 100 hints)
+    if len(profile["hint_history"]) > 100:
+        del profile["hint_history"][:-100]
+
+def apply_feedback_event(state, event):
+    """Apply one feedback event to {"feedback": ..., "profile": ...}
+    
+    Used for live feedback, by the journal's writer and when replaying the
+    journal, so it must give the same result every time.
+    """
+    feedback = state["feedback"]
+    difficulty = event["difficulty"]
+    hint_type = event["type"]
+    was_helpful = event["helpful"]
+    
+    feedback["total_hints"] += 1
+    feedback["by_difficulty"][difficulty]["total"] += 1
+    feedback["by_type"][hint_type]["total"] += 1
+    
+    if was_helpful:
+        feedback["helpful_hints"] += 1
+        feedback["by_difficulty"][difficulty]["helpful"] += 1
+        feedback["by_type"][hint_type]["helpful"] += 1
+    
+    # Add to recent feedback list (limited to last 20)
+    feedback["recent_feedback"].append({
+        "difficulty": difficulty,
+        "type": hint_type,
+        "helpful": was_helpful,
+        "timestamp": event["timestamp"]
+    })
+    
+    # Keep only last 20 feedback items
+    if len(feedback["recent_feedback"]) > 20:
+        del feedback["recent_feedback"][:-20]
+    
+    # Update player profile if the feedback came with a board state
+    if event["game_phase"]:
+        _update_player_profile(state["profile"], feedback, event)
+
+class HintRequest:
+    """A hint being generated in the background, which can be cancelled"""
+    def __init__(self, board_state, trace_id=None, difficulty=None, hint_type=None):
+        self.board_state = board_state
+        # Settings when the hint was asked for
+        self.difficulty = difficulty
+        self.hint_type = hint_type
+        # Trace of the request that started this, continued on the worker thread
+        self.trace_id = trace_id
+        self.cancelled = threading.Event()
+        self.future = None
+        # time.monotonic() after which the request is stale if it hasn't started
+        self.deadline = None
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    def done(self):
+        return self.future is not None and self.future.done()
 
 class HintManager:
     def __init__(self):
@@ -14,8 +263,15 @@ class HintManager:
         self.hint_types = ["Direct", "Strategic", "Educational"]
         self.current_hint_type = "Direct"
         
-        # Feedback tracking
-        self.feedback_data = self._load_feedback_data()
+        # Feedback tracking and player profile. Changes are appended to a
+        # journal written by a background thread, so a feedback click never
+        # waits for the files to be rewritten. With FEEDBACK_DB set they go to
+        # a SQLite database shared by many players instead.
+        self.data_dir = data_directory()
+        self.feedback_db = os.environ.get("FEEDBACK_DB")
+        # Player at this board; each player's state is loaded the first time it's needed
+        self.player = os.environ.get("HINT_PLAYER", "default")
+        self.profiles = ProfileRepository(self._open_player)
         
         # Hint UI elements
         self.difficulty_buttons = []
@@ -31,13 +287,98 @@ class HintManager:
         self.learning_rate = 0.8  # How much to weight recent feedback (0.0-1.0)
         self.suggestion_counter = 0  # Track consecutive hints to suggest changes
         
-        # Player profile data
-        self.player_profile = self._load_player_profile()
+        # Prompt additions derived from feedback, cleared whenever feedback arrives.
+        # Hint worker threads fill it while the UI thread clears it.
+        self.adaptive_context_cache = {}
+        self.adaptive_context_lock = threading.Lock()
+        
+        # AI model used for hints and cache of its previous answers
+        self.model = DEFAULT_MODEL
+        # Per-hint model choice by difficulty, hint type and game phase, falling
+        # back to smaller models when the latency budget is exceeded
+        self.model_router = ModelRouter(default=self.model, budgets=LATENCY_BUDGETS)
+        self.model_router.refresh_in_background()
+        # Models may have been pulled while the backend was down
+        BREAKER.on_close = self.model_router.refresh_in_background
+        self.hint_cache = HintCache(os.path.join(self.data_dir, "hint_cache.json"))
+        # Positions with a cached hint, for reusing hints of near-identical positions
+        self.hint_index = HintIndex()
+        self.hint_index.rebuild(list(self.hint_cache.entries))
+        self.hint_cache.on_evict = self.hint_index.remove
+        
+        # Hints are generated off the UI thread; only the latest request is kept.
+        # Finished hints are handed back to the UI thread by poll_results().
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hint")
+        self.pending_request = None
+        self.finished_requests = queue.Queue()
+        
+        # Speculative prefetch of hints for the position after each move.
+        # Budgets keep it from overloading the AI backend: one prefetch in
+        # flight at a time and a cap on prefetches per minute.
+        self.prefetch_enabled = True
+        self.prefetch_per_minute = 6
+        # Seconds a prefetch may wait behind other AI requests before it is dropped as stale
+        self.prefetch_deadline = 20
+        self.prefetch_request = None
+        self.prefetch_times = []
+        self.prefetched_keys = set()
+        self.prefetch_stats = {"started": 0, "completed": 0, "served": 0, "skipped": 0}
+        # Guards prefetched_keys and prefetch_stats, updated by worker threads
+        self.prefetch_lock = threading.Lock()
+        
+        # Generate all nine difficulty/type variants of a hint in one AI call
+        self.bundle_mode = os.environ.get("HINT_BUNDLE") == "1"
+        
+        # Hint tiers, from instant engine templates to the AI, and the policy choosing between them
+        self.hint_policy = HintPolicy(
+            engine=EngineHintProvider(),
+            tactics=EngineHintProvider(TACTICAL_FACTS, name="tactics"),
+            cache=CacheHintProvider(self),
+            similar=SimilarHintProvider(self),
+            ai=AIHintProvider(self)
+        )
         
-    def _load_feedback_data(self):
+    def _open_player(self, player):
+        """Journal or database store holding one player's feedback state"""
+        if self.feedback_db:
+            return FeedbackStore(self.feedback_db, apply_feedback_event,
+                                 lambda: self._load_feedback_state(migrate=False), player=player)
+        if player == "default":
+            # The single-player files stay where earlier versions kept them
+            return FeedbackJournal(self.data_dir, apply_feedback_event, self._load_feedback_state)
+        return FeedbackJournal(shard_directory(self.data_dir, player), apply_feedback_event,
+                               lambda: self._load_feedback_state(migrate=False))
+    
+    @property
+    def feedback_state(self):
+        return self.profiles.get(self.player)
+    
+    @property
+    def feedback_data(self):
+        return self.feedback_state["feedback"]
+    
+    @property
+    def player_profile(self):
+        return self.feedback_state["profile"]
+    
+    def set_player(self, player):
+        """Switch to another player's feedback and profile"""
+        if player != self.player:
+            self.player = player
+            self._clear_adaptive_context()
+            self.reset_hint_state()
+    
+    def _load_feedback_state(self, migrate=True):
+        """Initial feedback state for a player without saved feedback
+        
+        With migrate, picks up the files written before feedback was journaled.
+        """
+        return {"feedback": self._load_feedback_data(migrate), "profile": self._load_player_profile(migrate)}
+    
+    def _load_feedback_data(self, migrate=True):
         """Load feedback data from file or create new if doesn't exist"""
-        file_path = os.path.join("games", "chess", "hint_feedback.json")
-        if os.path.exists(file_path):
+        file_path = os.path.join(self.data_dir, "hint_feedback.json")
+        if migrate and os.path.exists(file_path):
             try:
                 with open(file_path, 'r') as f:
                     return json.load(f)
@@ -53,10 +394,10 @@ class HintManager:
             "recent_feedback": []  # Store recent feedback for trend analysis
         }
     
-    def _load_player_profile(self):
+    def _load_player_profile(self, migrate=True):
         """Load player profile data or create new if doesn't exist"""
-        file_path = os.path.join("games", "chess", "player_profile.json")
-        if os.path.exists(file_path):
+        file_path = os.path.join(self.data_dir, "player_profile.json")
+        if migrate and os.path.exists(file_path):
             try:
                 with open(file_path, 'r') as f:
                     return json.load(f)
@@ -79,18 +420,6 @@ class HintManager:
             "hint_history": []
         }
     
-    def _save_feedback_data(self):
-        """Save feedback data to file"""
-        file_path = os.path.join("games", "chess", "hint_feedback.json")
-        with open(file_path, 'w') as f:
-            json.dump(self.feedback_data, f, indent=2)
-    
-    def _save_player_profile(self):
-        """Save player profile data to file"""
-        file_path = os.path.join("games", "chess", "player_profile.json")
-        with open(file_path, 'w') as f:
-            json.dump(self.player_profile, f, indent=2)
-    
     def get_hint_effectiveness(self):
         """Calculate and return hint effectiveness percentage"""
         if self.feedback_data["total_hints"] == 0:
@@ -100,11 +429,14 @@ class HintManager:
     def determine_game_phase(self, board_state):
         """Determine the phase of the game from the board state"""
         # Count pieces to estimate game phase
-        piece_count = 0
-        for line in board_state.strip().split('\n'):
-            for piece in line.split():
-                if piece and piece != '.':
-                    piece_count += 1
+        if is_fen(board_state):
+            piece_count = count_pieces(board_state)
+        else:
+            piece_count = 0
+            for line in board_state.strip().split('\n'):
+                for piece in line.split():
+                    if piece and piece != '.':
+                        piece_count += 1
         
         if piece_count > 28:
             return "opening"
@@ -113,69 +445,6 @@ class HintManager:
         else:
             return "end_game"
     
-    def update_player_profile(self, was_helpful, board_state):
-        """Update player profile based on feedback"""
-        game_phase = self.determine_game_phase(board_state)
-        
-        # Update skill level based on feedback
-        if was_helpful:
-            # If player finds hardcore hints helpful, they're probably skilled
-            if self.current_difficulty == "Hardcore":
-                self.player_profile["skill_level"] = min(10.0, self.player_profile["skill_level"] + 0.2)
-            # If they find beginner hints helpful, they might be newer
-            elif self.current_difficulty == "Beginner":
-                pass  # No change, finding basic hints helpful doesn't indicate skill level
-        else:
-            # If they don't find beginner hints helpful, might be too simple
-            if self.current_difficulty == "Beginner":
-                self.player_profile["skill_level"] = min(10.0, self.player_profile["skill_level"] + 0.1)
-            # If they don't find hardcore hints helpful, might be too advanced
-            elif self.current_difficulty == "Hardcore":
-                self.player_profile["skill_level"] = max(1.0, self.player_profile["skill_level"] - 0.1)
-        
-        # Update context weights
-        weight_change = 0.1 if was_helpful else -0.05
-        self.player_profile["context_weights"][game_phase] += weight_change
-        
-        # Update preferred settings based on overall effectiveness
-        type_effectiveness = {}
-        for hint_type in self.hint_types:
-            type_data = self.feedback_data["by_type"][hint_type]
-            if type_data["total"] > 0:
-                effectiveness = type_data["helpful"] / type_data["total"]
-                type_effectiveness[hint_type] = effectiveness
-        
-        # If we have enough data, update preferred type
-        if type_effectiveness and max(type_effectiveness.values()) > 0.6:
-            self.player_profile["preferred_type"] = max(type_effectiveness, key=type_effectiveness.get)
-        
-        # Similarly for difficulty
-        difficulty_effectiveness = {}
-        for difficulty in self.difficulty_levels:
-            diff_data = self.feedback_data["by_difficulty"][difficulty]
-            if diff_data["total"] > 0:
-                effectiveness = diff_data["helpful"] / diff_data["total"]
-                difficulty_effectiveness[difficulty] = effectiveness
-        
-        # If we have enough data, update preferred difficulty
-        if difficulty_effectiveness and max(difficulty_effectiveness.values()) > 0.6:
-            self.player_profile["preferred_difficulty"] = max(difficulty_effectiveness, key=difficulty_effectiveness.get)
-        
-        # Add to hint history
-        self.player_profile["hint_history"].append({
-            "difficulty": self.current_difficulty,
-            "type": self.current_hint_type,
-            "helpful": was_helpful,
-            "game_phase": game_phase
-        })
-        
-        # Keep history manageable (last 100 hints)
-        if len(self.player_profile["hint_history"]) > 100:
-            self.player_profile["hint_history"] = self.player_profile["hint_history"][-100:]
-        
-        # Save changes
-        self._save_player_profile()
-    
     def suggest_optimal_settings(self):
         """Suggest optimal hint settings based on player profile and feedback"""
         message = None
@@ -221,34 +490,56 @@ class HintManager:
         if not self.hint_shown:
             return
             
-        self.feedback_data["total_hints"] += 1
-        self.feedback_data["by_difficulty"][self.current_difficulty]["total"] += 1
-        self.feedback_data["by_type"][self.current_hint_type]["total"] += 1
-        
-        if was_helpful:
-            self.feedback_data["helpful_hints"] += 1
-            self.feedback_data["by_difficulty"][self.current_difficulty]["helpful"] += 1
-            self.feedback_data["by_type"][self.current_hint_type]["helpful"] += 1
-        
-        # Add to recent feedback list (limited to last 20)
-        self.feedback_data["recent_feedback"].append({
+        event = {
             "difficulty": self.current_difficulty,
             "type": self.current_hint_type,
             "helpful": was_helpful,
-            "timestamp": pygame.time.get_ticks()
-        })
-        
-        # Keep only last 20 feedback items
-        if len(self.feedback_data["recent_feedback"]) > 20:
-            self.feedback_data["recent_feedback"] = self.feedback_data["recent_feedback"][-20:]
+            "game_phase": self.determine_game_phase(board_state) if board_state else None,
+            "timestamp": pygame.time.get_ticks(),
+            "time": time.time()
+        }
+        apply_feedback_event(self.feedback_state, event)
+        # Written to disk by the journal's background thread
+        self.profiles.append(self.player, event)
         
-        # Update player profile if we have a board state
-        if board_state:
-            self.update_player_profile(was_helpful, board_state)
+        # Feedback changes the adaptive prompt context
+        self._clear_adaptive_context()
         
-        self._save_feedback_data()
         self.reset_hint_state()
     
+    def close(self):
+        """Persist state that is written lazily, called when the game exits"""
+        self.cancel_pending()
+        if self.prefetch_request is not None:
+            self.prefetch_request.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.hint_cache.save()
+        # Session statistics go with the timing spans, so only when tracing is on
+        if TRACER.enabled:
+            report = self.report()
+            if report:
+                print(report)
+        self.profiles.close()
+    
+    def report(self):
+        """Summary of the parts of the hint pipeline that did something this session"""
+        lines = []
+        if self.profiles.evictions:
+            lines.append(self.profiles.report())
+        if self.prefetch_stats["started"]:
+            lines.append(self.prefetch_report())
+        if HINT_FLIGHTS.saved:
+            lines.append(HINT_FLIGHTS.report())
+        if any(SCHEDULER.dropped.values()):
+            lines.append(SCHEDULER.report())
+        if self.model_router.generated:
+            lines.append(self.model_router.report())
+        if self.hint_policy.served:
+            lines.append(self.hint_policy.report())
+        if self.hint_index.lookups:
+            lines.append(self.hint_index.report())
+        return "\n".join(lines)
+    
     def reset_hint_state(self):
         """Reset the hint state after feedback or when starting a new game"""
         self.hint_shown = False
@@ -264,95 +555,444 @@ class HintManager:
         if hint_type in self.hint_types:
             self.current_hint_type = hint_type
     
-    def generate_hint(self, board_state):
-        """Generate hint based on current settings and feedback history"""
-        # Update player profile if we have a current game state
-        game_phase = self.determine_game_phase(board_state)
+    def route_model(self, board_state, difficulty=None, hint_type=None):
+        """Model that generates hints for this position and settings"""
+        return self.model_router.route(difficulty or self.current_difficulty, hint_type or self.current_hint_type,
+                                       self.determine_game_phase(board_state))
+
+    def startup_model(self, timeout=5):
+        """Model for the starting position, routed once the installed models
+        are known; waits up to timeout seconds for the list, so not on the UI thread"""
+        self.model_router.refreshed.wait(timeout)
+        return self.route_model(STARTING_FEN)
+    
+    def _cache_key(self, board_state, difficulty=None, hint_type=None, model=None):
+        """Cache key for a hint on this position, with the current settings and routed model by default"""
+        difficulty = difficulty or self.current_difficulty
+        hint_type = hint_type or self.current_hint_type
+        model = model or self.route_model(board_state, difficulty, hint_type)
+        return self.hint_cache.make_key(board_state, difficulty, hint_type, model, PROMPT_VERSION)
+    
+    def _cache_keys(self, board_state, difficulty, hint_type):
+        """Keys a cached hint for these settings may be under, best model first
         
-        # Create a personalized prompt based on player history and current settings
-        prompt = self._create_adaptive_prompt(board_state, game_phase)
+        Hints generated by a fallback model, or by a bundle with the default
+        model, are still worth showing instantly.
+        """
+        primary = self.model_router.primary_model(difficulty, hint_type, self.determine_game_phase(board_state))
+        models = self.model_router.chain(primary)
+        if self.model not in models:
+            models.append(self.model)
+        return [self._cache_key(board_state, difficulty, hint_type, model) for model in models]
+    
+    def _store_hint(self, cache_key, hint):
+        """Cache a hint unless it is (or ends in) an error or fallback message"""
+        if hint and "Error:" not in hint:
+            self.hint_cache.put(cache_key, hint)
+            self.hint_index.add(cache_key)
+    
+    def _flight_key(self, board_state, prompt, model):
+        """Requests with the same position, model and prompt are identical"""
+        return (HintCache.board_key(board_state), model, prompt)
+    
+    def _shared_stream(self, board_state, prompt, model, cancel_event=None, difficulty=None, options=None,
+                       response_format=None, priority=INTERACTIVE, deadline=None):
+        """Stream an AI response, joining an identical stream already in flight"""
+        trace_id = TRACER.current_trace()
+        options = options or GENERATION_OPTIONS[difficulty or self.current_difficulty]
+        flight_key = self._flight_key(board_state, prompt, model)
+        def start(flight_cancel):
+            # Runs on the flight's own thread, so carry the trace over
+            TRACER.set_trace(trace_id)
+            return ai_call_stream(board_state, prompt, model=model, cancel_event=flight_cancel,
+                                  options=options, response_format=response_format,
+                                  priority=priority, deadline=deadline, schedule_key=flight_key,
+                                  on_model_missing=self.model_router.mark_missing)
+        if priority == INTERACTIVE:
+            # A prefetch of this very hint may still be queued; the player is waiting for it now
+            SCHEDULER.promote(flight_key, INTERACTIVE)
+        return HINT_FLIGHTS.stream(flight_key, start, cancel_event)
+    
+    def _traced_prompt(self, board_state, difficulty=None, hint_type=None):
+        """Determine the game phase and build the prompt, timing both stages"""
+        with TRACER.span("hint.game_phase"):
+            game_phase = self.determine_game_phase(board_state)
+        with TRACER.span("hint.build_prompt", difficulty=difficulty or self.current_difficulty,
+                         hint_type=hint_type or self.current_hint_type) as span:
+            prompt = self._create_adaptive_prompt(board_state, game_phase, difficulty, hint_type)
+            span["prompt_chars"] = len(prompt)
+        return game_phase, prompt
+    
+    def _cached_hint(self, cache_key):
+        """Look up a hint for the player, counting prefetched hints that get used"""
+        hint = self.hint_cache.get(cache_key)
+        if hint is not None:
+            with self.prefetch_lock:
+                if cache_key in self.prefetched_keys:
+                    self.prefetched_keys.discard(cache_key)
+                    self.prefetch_stats["served"] += 1
+        return hint
+    
+    def _count_prefetch(self, stat, cache_keys=()):
+        """Add one to a prefetch statistic and remember the keys of prefetched hints"""
+        with self.prefetch_lock:
+            self.prefetch_stats[stat] += 1
+            self.prefetched_keys.update(cache_keys)
+    
+    def prefetch_hint(self, board_state):
+        """Start generating hints for a new position before the player asks
+        
+        Prefetches the current settings and, budget permitting, the player's
+        preferred settings. Any prefetch for an older position is cancelled.
+        """
+        if not self.prefetch_enabled:
+            return
+        # Don't spend the budget while the AI backend is known to be down
+        if not BREAKER.available():
+            self._count_prefetch("skipped")
+            return
+        if self.prefetch_request is not None:
+            self.prefetch_request.cancel()
+            self.prefetch_request = None
+        
+        settings = [(self.current_difficulty, self.current_hint_type)]
+        preferred = (self.player_profile["preferred_difficulty"], self.player_profile["preferred_type"])
+        if preferred not in settings:
+            settings.append(preferred)
+        
+        # Skip settings that are already cached
+        settings = [(d, t) for d, t in settings
+                    if self._cache_key(board_state, d, t) not in self.hint_cache]
+        if not settings:
+            return
+        
+        # Only prefetch within the per-minute budget
+        now = time.time()
+        self.prefetch_times = [t for t in self.prefetch_times if now - t < 60]
+        budget = self.prefetch_per_minute - len(self.prefetch_times)
+        if budget <= 0:
+            self._count_prefetch("skipped")
+            return
+        settings = settings[:budget]
+        self.prefetch_times.extend([now] * len(settings))
+        
+        request = HintRequest(board_state, TRACER.new_trace() if TRACER.enabled else None)
+        request.deadline = time.monotonic() + self.prefetch_deadline
+        request.future = self.executor.submit(self._run_prefetch, request, settings)
+        self.prefetch_request = request
+    
+    def _run_prefetch(self, request, settings):
+        """Worker body for prefetch_hint, fills the hint cache"""
+        TRACER.set_trace(request.trace_id)
+        if self.bundle_mode:
+            self._prefetch_bundle(request)
+            return
+        for difficulty, hint_type in settings:
+            if request.cancelled.is_set():
+                return
+            
+            # A player request may have cached this meanwhile
+            cache_key = self._cache_key(request.board_state, difficulty, hint_type)
+            if cache_key in self.hint_cache:
+                continue
+            
+            self._count_prefetch("started")
+            try:
+                with TRACER.span("prefetch.generate", difficulty=difficulty, hint_type=hint_type):
+                    game_phase, prompt = self._traced_prompt(request.board_state, difficulty, hint_type)
+                    model = self.model_router.route(difficulty, hint_type, game_phase)
+                    cache_key = self._cache_key(request.board_state, difficulty, hint_type, model)
+                    hint = "".join(self._shared_stream(request.board_state, prompt, model, request.cancelled,
+                                                       difficulty, priority=PREFETCH,
+                                                       deadline=request.deadline)).strip()
+            except Exception as e:
+                print(f"Hint prefetch failed: {e}")
+                return
+            
+            if request.cancelled.is_set() or not hint or "Error:" in hint:
+                return
+            self._store_hint(cache_key, hint)
+            self._count_prefetch("completed", [cache_key])
+    
+    def _prefetch_bundle(self, request):
+        """Prefetch every difficulty and hint type with a single bundle call"""
+        self._count_prefetch("started")
+        try:
+            with TRACER.span("prefetch.bundle"):
+                hints = self.generate_bundle(request.board_state, request.cancelled, PREFETCH, request.deadline)
+        except Exception as e:
+            print(f"Hint prefetch failed: {e}")
+            return
+        
+        if request.cancelled.is_set() or not hints:
+            return
+        self._count_prefetch("completed", [self._cache_key(request.board_state, difficulty, hint_type, self.model)
+                                           for difficulty, hint_type in hints])
+    
+    def prefetch_report(self):
+        """Summarize how often prefetched hints were actually shown to the player"""
+        stats = self.prefetch_stats
+        served_rate = int((stats["served"] / stats["completed"]) * 100) if stats["completed"] else 0
+        return (f"Prefetch: {stats['started']} started, {stats['completed']} completed, "
+                f"{stats['served']} served ({served_rate}%), {stats['skipped']} skipped by budget or backend health")
+    
+    def request_hint(self, board_state, on_chunk, on_done=None):
+        """Generate a hint on a background thread, cancelling any pending request
+        
+        on_chunk is called on the worker thread with each piece of hint text,
+        so it must be safe to call from any thread. Once the hint is complete,
+        poll_results() calls on_done on the UI thread with the suggestion text
+        appended to the hint, if any. Neither is called after the request is
+        cancelled.
+        """
+        self.cancel_pending()
+        request = HintRequest(board_state, TRACER.current_trace(), self.current_difficulty, self.current_hint_type)
+        request.future = self.executor.submit(self._run_request, request, on_chunk, on_done)
+        self.pending_request = request
+        return request
+    
+    def _run_request(self, request, on_chunk, on_done):
+        """Worker body for request_hint"""
+        TRACER.set_trace(request.trace_id)
+        pieces = []
+        failed = False
+        try:
+            for piece in self.stream_hint(request.board_state, request.cancelled, request.difficulty,
+                                          request.hint_type):
+                if request.cancelled.is_set():
+                    return
+                pieces.append(piece)
+                on_chunk(piece)
+        except Exception as e:
+            print(f"Hint generation failed: {e}")
+            failed = True
+        if not request.cancelled.is_set():
+            self.finished_requests.put((request, "".join(pieces).strip(), failed, on_done))
+    
+    def poll_results(self):
+        """Show hints finished by worker threads; called by the game once per frame
+        
+        Everything the UI reads about the current hint is only changed here,
+        on the UI thread.
+        """
+        while True:
+            try:
+                request, hint, failed, on_done = self.finished_requests.get_nowait()
+            except queue.Empty:
+                return
+            # Cancelled after it finished, e.g. by a move made this frame
+            if request.cancelled.is_set():
+                continue
+            suggestion_text = ""
+            if not failed:
+                self.current_hint = hint
+                # Suggestions are appended once the hint itself is complete
+                suggestion = self.suggest_optimal_settings()
+                if suggestion:
+                    suggestion_text = f"\n\n[Suggestion: {suggestion}]"
+                    self.current_hint = f"{self.current_hint}{suggestion_text}"
+                self.hint_shown = True
+            if on_done:
+                on_done(suggestion_text)
+    
+    def cancel_pending(self):
+        """Cancel the hint being generated, if any"""
+        if self.pending_request is not None:
+            self.pending_request.cancel()
+            self.pending_request = None
+    
+    def stream_hint(self, board_state, cancel_event=None, difficulty=None, hint_type=None):
+        """Generate a hint for the position, yielding the text as it streams in
+        
+        Runs on a worker thread, so it leaves the current hint state alone;
+        request_hint hands the finished hint to the UI thread.
+        """
+        start = time.perf_counter()
+        difficulty = difficulty or self.current_difficulty
+        hint_type = hint_type or self.current_hint_type
         
-        # Make the AI call
-        self.current_hint = ai_call(board_state, prompt)
+        # Yield each piece as soon as a tier produces it; the first tier with
+        # any text provides the whole hint
+        pieces = []
+        tier = None
+        for provider in self.hint_policy.tiers(difficulty, hint_type):
+            for piece in provider.stream(board_state, difficulty, hint_type, cancel_event):
+                if not pieces:
+                    TRACER.record("hint.first_chunk", time.perf_counter() - start, tier=provider.name)
+                pieces.append(piece)
+                yield piece
+            
+            # A cancelled hint is incomplete, so it is neither cached nor shown
+            if cancel_event is not None and cancel_event.is_set():
+                TRACER.record("hint.stream_hint", time.perf_counter() - start, cancelled=True)
+                return
+            if pieces:
+                tier = provider.name
+                self.hint_policy.record(tier)
+                break
+        TRACER.record("hint.stream_hint", time.perf_counter() - start, tier=tier)
+    
+    def _ai_stream(self, board_state, difficulty, hint_type, cancel_event=None):
+        """Stream a hint from the AI, caching it once complete"""
+        start = time.perf_counter()
+        if self.bundle_mode:
+            # A JSON bundle can't be shown as it streams, so the hint arrives in one piece
+            hint = self.generate_bundle(board_state, cancel_event).get((difficulty, hint_type))
+            if hint:
+                latency = time.perf_counter() - start
+                self.hint_policy.observe(latency)
+                self.model_router.observe(self.model, latency)
+                yield hint
+                return
+            if cancel_event is not None and cancel_event.is_set():
+                return
+        
+        game_phase, prompt = self._traced_prompt(board_state, difficulty, hint_type)
+        model = self.model_router.route(difficulty, hint_type, game_phase)
+        tried = set()
         
-        # Check if we should suggest different settings
-        suggestion = self.suggest_optimal_settings()
-        if suggestion:
-            self.current_hint = f"{self.current_hint}\n\n[Suggestion: {suggestion}]"
+        while True:
+            tried.add(model)
+            pieces = []
+            fallback = None
+            for piece in self._shared_stream(board_state, prompt, model, cancel_event, difficulty):
+                if not pieces and not self.model_router.is_installed(model):
+                    # The backend refused the model; route again, unless that gives nothing new
+                    fallback = self.model_router.route(difficulty, hint_type, game_phase)
+                    if fallback not in tried:
+                        break
+                    fallback = None
+                if not pieces:
+                    # How long the AI takes to start answering decides the tier policy and model routing
+                    latency = time.perf_counter() - start
+                    self.hint_policy.observe(latency)
+                    self.model_router.observe(model, latency)
+                pieces.append(piece)
+                yield piece
+            if fallback is None:
+                break
+            model = fallback
+        
+        if cancel_event is None or not cancel_event.is_set():
+            self._store_hint(self._cache_key(board_state, difficulty, hint_type, model), "".join(pieces).strip())
+    
+    def generate_bundle(self, board_state, cancel_event=None, priority=INTERACTIVE, deadline=None):
+        """Generate hints for every difficulty and hint type with one AI call
         
-        self.hint_shown = True
-        return self.current_hint
+        The parsed hints are cached and returned as {(difficulty, hint_type): hint};
+        variants the response is missing are simply left out.
+        """
+        game_phase = self.determine_game_phase(board_state)
+        prompt = self._create_bundle_prompt(board_state, game_phase)
+        
+        with TRACER.span("hint.bundle", model=self.model) as span:
+            response = "".join(self._shared_stream(board_state, prompt, self.model, cancel_event,
+                                                   options=BUNDLE_OPTIONS, response_format="json",
+                                                   priority=priority, deadline=deadline))
+            if cancel_event is not None and cancel_event.is_set():
+                return {}
+            hints = parse_bundle(response, self.difficulty_levels, self.hint_types)
+            span["variants"] = len(hints)
+        
+        for (difficulty, hint_type), hint in hints.items():
+            self._store_hint(self._cache_key(board_state, difficulty, hint_type, self.model), hint)
+        return hints
+    
+    def _create_bundle_prompt(self, board_state, game_phase):
+        """Prompt asking for all difficulty and hint type variants as JSON"""
+        lines = [BUNDLE_PROMPT]
+        if is_fen(board_state):
+            lines.append(PROMPT_FRAGMENTS["fen"])
+        for difficulty in self.difficulty_levels:
+            context = ""
+            if self.feedback_data["total_hints"] >= self.adaptation_threshold:
+                context, _ = self._adaptive_context(difficulty, game_phase)
+            lines.append(f"{difficulty}:{context}")
+            for hint_type in self.hint_types:
+                lines.append(f"- {hint_type}: {PROMPT_TEMPLATES[difficulty][hint_type]}")
+        return "\n".join(lines)
     
-    def _create_adaptive_prompt(self, board_state, game_phase):
+    def _create_adaptive_prompt(self, board_state, game_phase, difficulty=None, hint_type=None):
         """Create an adaptive prompt based on player profile and current settings"""
-        # Base prompts from original implementation
-        base_prompts = {
-            # Different prompt templates based on difficulty and type
-            "Beginner": {
-                "Direct": "Analyze this chess position and give a direct, simple hint about the best move. Explain in basic terms that a beginner would understand.",
-                "Strategic": "Analyze this chess position and suggest a simple strategic concept that applies here. Keep it very basic for a beginner.",
-                "Educational": "Explain one basic chess concept relevant to this position that would help a beginner improve their game."
-            },
-            "Intermediate": {
-                "Direct": "Analyze this chess position and suggest a good move. Provide brief reasoning that an intermediate player would understand.",
-                "Strategic": "Analyze this chess position and explain a mid-level strategic concept that applies here. Include some tactical considerations.",
-                "Educational": "Explain an intermediate chess concept relevant to this position that would help a player improve their tactical thinking."
-            },
-            "Hardcore": {
-                "Direct": "Analyze this chess position and give a cryptic hint about the best move. Don't reveal too much, just point in the right direction.",
-                "Strategic": "Analyze this chess position and explain an advanced strategic concept that applies here. Include complex positional considerations.",
-                "Educational": "Explain an advanced chess concept relevant to this position that would help a player develop deeper strategic understanding."
-            }
-        }
+        difficulty = difficulty or self.current_difficulty
+        hint_type = hint_type or self.current_hint_type
         
         # Get the base prompt
-        prompt = base_prompts[self.current_difficulty][self.current_hint_type]
+        prompt = PROMPT_TEMPLATES[difficulty][hint_type]
+        if is_fen(board_state):
+            prompt = f"{prompt} {PROMPT_FRAGMENTS['fen']}"
         
         # If we have enough feedback data, customize the prompt
         if self.feedback_data["total_hints"] >= self.adaptation_threshold:
-            # Determine if player tends to prefer certain hint styles
-            player_preferences = []
-            
-            # Check hint type effectiveness
-            for hint_type in self.hint_types:
-                type_data = self.feedback_data["by_type"][hint_type]
-                if type_data["total"] > 2 and type_data["helpful"] / type_data["total"] > 0.7:
-                    player_preferences.append(f"You tend to find {hint_type.lower()} explanations most helpful")
-            
-            # Check game phase preferences from player profile
-            phase_weights = self.player_profile["context_weights"]
-            strongest_phase = max(phase_weights, key=phase_weights.get)
-            if phase_weights[strongest_phase] > 1.2:  # If significantly higher
-                player_preferences.append(f"You seem to appreciate hints during the {strongest_phase.replace('_', ' ')}")
-            
-            # Add customization to prompt if we have preferences
-            if player_preferences:
-                context = " ".join(player_preferences)
-                prompt = f"{prompt} Based on your feedback: {context}."
-            
-            # Add focus on current game phase
-            prompt = f"{prompt} This appears to be the {game_phase.replace('_', ' ')}."
-            
-            # Add skill level adaptation
-            skill_level = self.player_profile["skill_level"]
-            if skill_level < 3.0 and self.current_difficulty != "Beginner":
-                prompt = f"{prompt} Break down complex ideas into simpler terms."
-            elif skill_level > 7.0 and self.current_difficulty == "Hardcore":
-                prompt = f"{prompt} You can use advanced chess terminology."
-            
-            # Look at recent hint history to avoid repetition
-            recent_hints = self.player_profile["hint_history"][-5:] if self.player_profile["hint_history"] else []
-            recent_types = [hint["type"] for hint in recent_hints]
+            context, varied_types = self._adaptive_context(difficulty, game_phase)
+            prompt = f"{prompt}{context}"
             
             # If we've been giving the same type repeatedly, try to vary
-            if len(recent_types) >= 3 and len(set(recent_types)) == 1:
-                other_types = [t for t in self.hint_types if t != recent_types[0]]
-                if other_types and random.random() > 0.5:  # 50% chance to vary
-                    varied_type = random.choice(other_types)
-                    prompt = f"{prompt} Try to include some {varied_type.lower()} elements for variety."
+            if varied_types and random.random() > 0.5:  # 50% chance to vary
+                varied_type = random.choice(varied_types)
+                prompt = f"{prompt} {PROMPT_FRAGMENTS['variety'].format(hint_type=varied_type.lower())}"
         
         return prompt
     
+    def _clear_adaptive_context(self):
+        with self.adaptive_context_lock:
+            self.adaptive_context_cache.clear()
+    
+    def _adaptive_context(self, difficulty, game_phase):
+        """Prompt additions derived from feedback, memoized until the next feedback
+        
+        Returns the text to append to the base prompt and the hint types to
+        mix in for variety (empty if recent hints were not repetitive).
+        """
+        key = (difficulty, game_phase)
+        # Held while building, so a result from before a feedback click is never stored after it
+        with self.adaptive_context_lock:
+            cached = self.adaptive_context_cache.get(key)
+            if cached is None:
+                cached = self.adaptive_context_cache[key] = self._build_adaptive_context(difficulty, game_phase)
+        return cached
+    
+    def _build_adaptive_context(self, difficulty, game_phase):
+        """Work out the prompt additions for _adaptive_context"""
+        # Determine if player tends to prefer certain hint styles
+        player_preferences = []
+        
+        # Check hint type effectiveness
+        for hint_type in self.hint_types:
+            type_data = self.feedback_data["by_type"][hint_type]
+            if type_data["total"] > 2 and type_data["helpful"] / type_data["total"] > 0.7:
+                player_preferences.append(PROMPT_FRAGMENTS["type_preference"].format(hint_type=hint_type.lower()))
+        
+        # Check game phase preferences from player profile
+        phase_weights = self.player_profile["context_weights"]
+        strongest_phase = max(phase_weights, key=phase_weights.get)
+        if phase_weights[strongest_phase] > 1.2:  # If significantly higher
+            player_preferences.append(PROMPT_FRAGMENTS["phase_preference"].format(phase=strongest_phase.replace('_', ' ')))
+        
+        context = ""
+        # Add customization to prompt if we have preferences
+        if player_preferences:
+            context += " " + PROMPT_FRAGMENTS["preferences"].format(preferences=" ".join(player_preferences))
+        
+        # Add focus on current game phase
+        context += " " + PROMPT_FRAGMENTS["game_phase"].format(phase=game_phase.replace('_', ' '))
+        
+        # Add skill level adaptation
+        skill_level = self.player_profile["skill_level"]
+        if skill_level < 3.0 and difficulty != "Beginner":
+            context += " " + PROMPT_FRAGMENTS["simplify"]
+        elif skill_level > 7.0 and difficulty == "Hardcore":
+            context += " " + PROMPT_FRAGMENTS["advanced_terms"]
+        
+        # Look at recent hint history to avoid repetition
+        recent_hints = self.player_profile["hint_history"][-5:] if self.player_profile["hint_history"] else []
+        recent_types = [hint["type"] for hint in recent_hints]
+        varied_types = []
+        if len(recent_types) >= 3 and len(set(recent_types)) == 1:
+            varied_types = [t for t in self.hint_types if t != recent_types[0]]
+        
+        return context, varied_types
+    
     def create_ui_elements(self, start_x, start_y, button_width, button_height, spacing):
         """Create UI elements for hint controls"""
         # Difficulty buttons
@@ -375,12 +1015,19 @@ class HintManager:
             {"rect": pygame.Rect(start_x + button_width // 2 + 5, start_y, button_width // 2 - 5, button_height), "text": "👎", "value": False}
         ]
     
+    def controls_state(self):
+        """Everything draw_controls shows, so the game can tell when to redraw them"""
+        return (self.current_difficulty, self.current_hint_type, self.player_profile["preferred_difficulty"],
+                self.player_profile["preferred_type"], self.hint_shown, self.feedback_data["total_hints"],
+                self.get_hint_effectiveness(), round(self.player_profile["skill_level"], 1))
+    
     def draw_controls(self, screen, font):
         """Draw hint control elements on screen"""
+        title_font = TEXT_CACHE.font("Arial", 14, bold=True)
         # Draw no section title to reduce overlapping
 
         # Draw difficulty buttons - skip the "Hint Controls" title to reduce overlapping
-        diff_title = pygame.font.SysFont("Arial", 14, bold=True).render("Difficulty:", True, (255, 255, 255))
+        diff_title = TEXT_CACHE.render(title_font, "Difficulty:", True, (255, 255, 255))
         diff_y = self.difficulty_buttons[0]["rect"].y - 20
         screen.blit(diff_title, (self.difficulty_buttons[0]["rect"].x, diff_y))
         
@@ -396,12 +1043,12 @@ class HintManager:
                 border_rect = btn["rect"].inflate(4, 4)
                 pygame.draw.rect(screen, (255, 215, 0), border_rect, 2, border_radius=7)
             
-            text = font.render(btn["text"], True, (255, 255, 255))
+            text = TEXT_CACHE.render(font, btn["text"], True, (255, 255, 255))
             screen.blit(text, (btn["rect"].x + (btn["rect"].width - text.get_width()) // 2, 
                               btn["rect"].y + (btn["rect"].height - text.get_height()) // 2))
         
         # Draw hint type buttons with header - proper positioning
-        type_title = pygame.font.SysFont("Arial", 14, bold=True).render("Hint Type:", True, (255, 255, 255))
+        type_title = TEXT_CACHE.render(title_font, "Hint Type:", True, (255, 255, 255))
         type_y = self.type_buttons[0]["rect"].y - 20
         screen.blit(type_title, (self.type_buttons[0]["rect"].x, type_y))
         
@@ -417,19 +1064,19 @@ class HintManager:
                 border_rect = btn["rect"].inflate(4, 4)
                 pygame.draw.rect(screen, (255, 215, 0), border_rect, 2, border_radius=7)
             
-            text = font.render(btn["text"], True, (255, 255, 255))
+            text = TEXT_CACHE.render(font, btn["text"], True, (255, 255, 255))
             screen.blit(text, (btn["rect"].x + (btn["rect"].width - text.get_width()) // 2, 
                               btn["rect"].y + (btn["rect"].height - text.get_height()) // 2))
         
         # Draw feedback buttons (only if a hint is shown)
         if self.hint_shown:
-            feedback_title = pygame.font.SysFont("Arial", 14, bold=True).render("Was it helpful?", True, (255, 255, 255))
+            feedback_title = TEXT_CACHE.render(title_font, "Was it helpful?", True, (255, 255, 255))
             feedback_y = self.feedback_buttons[0]["rect"].y - 20
             screen.blit(feedback_title, (self.feedback_buttons[0]["rect"].x, feedback_y))
             
             for btn in self.feedback_buttons:
                 pygame.draw.rect(screen, (200, 200, 80), btn["rect"], border_radius=5)
-                text = font.render(btn["text"], True, (0, 0, 0))
+                text = TEXT_CACHE.render(font, btn["text"], True, (0, 0, 0))
                 screen.blit(text, (btn["rect"].x + (btn["rect"].width - text.get_width()) // 2, 
                                   btn["rect"].y + (btn["rect"].height - text.get_height()) // 2))
         
@@ -437,13 +1084,13 @@ class HintManager:
         if self.feedback_data["total_hints"] > 0:
             effect_y = self.feedback_buttons[0]["rect"].bottom + 20
             effect_text = f"Effectiveness: {self.get_hint_effectiveness()}%"
-            effect_render = pygame.font.SysFont("Arial", 14, bold=True).render(effect_text, True, (255, 255, 255))
+            effect_render = TEXT_CACHE.render(title_font, effect_text, True, (255, 255, 255))
             screen.blit(effect_render, (self.feedback_buttons[0]["rect"].x, effect_y))
             
             # Draw skill level with reduced text
             if self.feedback_data["total_hints"] >= self.adaptation_threshold:
                 skill_text = f"Skill: {self.player_profile['skill_level']:.1f}/10"
-                skill_render = pygame.font.SysFont("Arial", 14, bold=True).render(skill_text, True, (255, 255, 255))
+                skill_render = TEXT_CACHE.render(title_font, skill_text, True, (255, 255, 255))
                 screen.blit(skill_render, (self.feedback_buttons[0]["rect"].x, effect_y + 20))
     
     def handle_click(self, pos, current_board_state=None):
@@ -0,0 +1,231 @@
+import threading
+import time
+from collections import Counter, deque
+
+from ai.aiCall import BREAKER
+from ai.metrics import percentile
+from ai.tracing import TRACER
+from chess.fen import is_fen, position_key
+from chess.tactics import analyze
+
+# Facts the engine tier can build a hint from, most urgent first
+FACT_ORDER = ["mate", "check", "mate_threat", "capture", "hanging", "development"]
+# Facts concrete enough to beat an AI hint even when the AI is fast
+TACTICAL_FACTS = ["mate", "check", "mate_threat", "capture", "hanging"]
+
+# Hint text for each fact and difficulty, filled in with the fact's fields
+ENGINE_TEMPLATES = {
+    "mate": {
+        "Beginner": "You can checkmate right now! Move your {piece} from {from} to {to}.",
+        "Intermediate": "There is a checkmate in one move. Look closely at what your {piece} can do.",
+        "Hardcore": "The enemy king has run out of squares. Find the finishing blow."
+    },
+    "check": {
+        "Beginner": "Your king is in check from the {attacker} on {square}. You must move the king, block the check or capture the {attacker}.",
+        "Intermediate": "You're in check from the {attacker} on {square}. Pick the reply that also improves your position.",
+        "Hardcore": "First things first: the king."
+    },
+    "mate_threat": {
+        "Beginner": "Careful! Your opponent threatens checkmate by moving their {piece} to {to}. Defend against it first.",
+        "Intermediate": "Your opponent is threatening mate in one with their {piece}. Find the defence before anything else.",
+        "Hardcore": "Ask yourself what your opponent wants to play next."
+    },
+    "capture": {
+        "Beginner": "You can win material: capture the {target} on {to} with your {piece} from {from}.",
+        "Intermediate": "There is material to be won on {to}. Check that the capture is safe.",
+        "Hardcore": "Something on your opponent's side is loose."
+    },
+    "hanging": {
+        "Beginner": "Your {piece} on {square} is under attack and not safely defended. Move it or protect it.",
+        "Intermediate": "Look at your {piece} on {square}: it can be taken for free or for less than it is worth.",
+        "Hardcore": "Not all of your pieces are as safe as they look."
+    },
+    "development": {
+        "Beginner": "Get your pieces into the game: develop your {pieces}.",
+        "Intermediate": "You still have {count} minor piece(s) on their starting squares. Develop them before starting an attack.",
+        "Hardcore": "Count the pieces that haven't moved yet."
+    }
+}
+
+# Added to Educational hints: the general lesson behind each fact
+ENGINE_LESSONS = {
+    "mate": "Always look at checks first; forcing moves are the easiest to calculate.",
+    "check": "When in check, compare all three ways out: moving, blocking and capturing.",
+    "mate_threat": "Before every move, ask what your opponent's last move threatens.",
+    "capture": "Count attackers and defenders before taking: a capture is only good if you come out ahead.",
+    "hanging": "Pieces that are attacked more often than they are defended can be lost.",
+    "development": "In the opening, every move should bring a new piece into play or make the king safer."
+}
+
+# Seconds the player should wait for the first AI text, per difficulty.
+# Over budget, the engine tier answers instead.
+LATENCY_BUDGETS = {
+    "Beginner": 2.0,
+    "Intermediate": 5.0,
+    "Hardcore": 10.0
+}
+
+def render_hint(fact_name, fact, difficulty, hint_type):
+    """Turn one engine fact into hint text for the given settings"""
+    fields = dict(fact)
+    if fact_name == "development":
+        fields["pieces"] = " and ".join(f"{piece}s" for piece in fact["pieces"])
+    hint = ENGINE_TEMPLATES[fact_name][difficulty].format(**fields)
+    if hint_type == "Educational":
+        hint = f"{hint} {ENGINE_LESSONS[fact_name]}"
+    return hint
+
+class HintProvider:
+    """One tier of hint generation; tiers are tried in the order the policy picks"""
+    name = "provider"
+
+    def generate(self, board_state, difficulty, hint_type):
+        """Return a complete hint, or None if this tier has nothing to offer"""
+        return None
+
+    def stream(self, board_state, difficulty, hint_type, cancel_event=None):
+        """Yield the hint in pieces; yields nothing if this tier has no hint"""
+        hint = self.generate(board_state, difficulty, hint_type)
+        if hint:
+            yield hint
+
+class EngineHintProvider(HintProvider):
+    """Instant template hints built from facts about the position"""
+    name = "engine"
+
+    def __init__(self, facts=None, name=None):
+        self.facts = facts or FACT_ORDER
+        if name:
+            self.name = name
+        # Analysis of recent positions, shared by all settings
+        self.analysis_cache = {}
+
+    def analysis(self, board_state):
+        key = position_key(board_state)
+        facts = self.analysis_cache.get(key)
+        if facts is None:
+            if len(self.analysis_cache) > 256:
+                self.analysis_cache.clear()
+            with TRACER.span("hint.engine_analysis"):
+                facts = analyze(board_state)
+            self.analysis_cache[key] = facts
+        return facts
+
+    def generate(self, board_state, difficulty, hint_type):
+        # Only FEN carries the side to move the facts depend on
+        if not is_fen(board_state):
+            return None
+        try:
+            facts = self.analysis(board_state)
+        except ValueError:
+            return None
+        for fact_name in self.facts:
+            if fact_name in facts:
+                return render_hint(fact_name, facts[fact_name], difficulty, hint_type)
+        return None
+
+class CacheHintProvider(HintProvider):
+    """Hints the AI produced earlier for the same position and settings"""
+    name = "cache"
+
+    def __init__(self, hint_manager):
+        self.hint_manager = hint_manager
+
+    def generate(self, board_state, difficulty, hint_type):
+        with TRACER.span("hint.cache_lookup") as span:
+            keys = self.hint_manager._cache_keys(board_state, difficulty, hint_type)
+            # Look up the best model's hint, or any other model's that is cached
+            cache_key = next((key for key in keys if key in self.hint_manager.hint_cache), keys[0])
+            hint = self.hint_manager._cached_hint(cache_key)
+            span["hit"] = hint is not None
+        return hint
+
+class SimilarHintProvider(HintProvider):
+    """Cached hints for a nearly identical position with the same settings"""
+    name = "similar"
+
+    def __init__(self, hint_manager):
+        self.hint_manager = hint_manager
+
+    def generate(self, board_state, difficulty, hint_type):
+        manager = self.hint_manager
+        with TRACER.span("hint.similar_lookup") as span:
+            match = manager.hint_index.nearest(manager._cache_key(board_state, difficulty, hint_type))
+            hint = None
+            if match is not None:
+                cache_key, span["similarity"] = match
+                hint = manager.hint_cache.get(cache_key)
+                if hint is None:
+                    # Evicted or expired since it was indexed
+                    manager.hint_index.remove(cache_key)
+            span["hit"] = hint is not None
+        return hint
+
+class AIHintProvider(HintProvider):
+    """Hints generated by the language model; the slowest tier"""
+    name = "ai"
+
+    def __init__(self, hint_manager):
+        self.hint_manager = hint_manager
+
+    def generate(self, board_state, difficulty, hint_type):
+        return "".join(self.stream(board_state, difficulty, hint_type)).strip() or None
+
+    def stream(self, board_state, difficulty, hint_type, cancel_event=None):
+        return self.hint_manager._ai_stream(board_state, difficulty, hint_type, cancel_event)
+
+class HintPolicy:
+    """Chooses which tiers to try, and in what order, for a hint request
+
+    Normally the cache, then hints for similar positions, are tried before
+    the AI. Beginners get a tactical
+    engine hint first when the position has one, and every difficulty falls
+    back to engine hints ahead of the AI while the backend is down or
+    slower than the difficulty's latency budget. While the engine answers
+    first the AI gets no new samples, so samples expire after max_age
+    seconds and the AI is measured again after a slow stretch.
+    """
+    def __init__(self, engine, tactics, cache, similar, ai, budgets=None, window=20, max_age=300):
+        self.engine = engine
+        self.tactics = tactics
+        self.cache = cache
+        self.similar = similar
+        self.ai = ai
+        self.budgets = budgets or LATENCY_BUDGETS
+        self.max_age = max_age
+        # Recent (time.monotonic(), seconds to the first AI text)
+        self.latencies = deque(maxlen=window)
+        self.served = Counter()
+        # observe() and record() are called from hint worker threads
+        self.lock = threading.Lock()
+
+    def observe(self, latency):
+        with self.lock:
+            self.latencies.append((time.monotonic(), latency))
+
+    def expected_latency(self):
+        """Typical wait for the first AI text, or None without a few recent hints"""
+        cutoff = time.monotonic() - self.max_age
+        with self.lock:
+            recent = [latency for when, latency in self.latencies if when >= cutoff]
+        if len(recent) < 3:
+            return None
+        return percentile(recent, 50)
+
+    def tiers(self, difficulty, hint_type):
+        expected = self.expected_latency()
+        if not BREAKER.available() or (expected is not None and expected > self.budgets[difficulty]):
+            # The AI stays last so there is always an answer, even if only its fallback
+            return [self.tactics, self.cache, self.similar, self.engine, self.ai]
+        if difficulty == "Beginner":
+            return [self.tactics, self.cache, self.similar, self.ai]
+        return [self.cache, self.similar, self.ai]
+
+    def record(self, tier_name):
+        with self.lock:
+            self.served[tier_name] += 1
+
+    def report(self):
+        total = sum(self.served.values())
+        tiers = ", ".join(f"{name} {count}" for name, count in self.served.most_common())
+        return f"Hint tiers: {total} hints served ({tiers})"
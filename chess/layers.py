@@ -0,0 +1,39 @@
+import pygame
+
+class LayerCache:
+    """Pre-rendered surfaces for the parts of a screen that rarely change
+
+    Each layer is drawn once by its build function and kept until its key
+    (anything the layer's look depends on) changes; frames then only blit
+    it, or the part of it a dirty rect needs.
+    """
+    def __init__(self):
+        self.layers = {}
+
+        # Statistics
+        self.builds = 0
+
+    def get(self, name, key, build):
+        """The named layer, calling build() to draw it again if key changed"""
+        cached = self.layers.get(name)
+        if cached is None or cached[0] != key:
+            cached = self.layers[name] = (key, build())
+            self.builds += 1
+        return cached[1]
+
+    def clear(self):
+        self.layers.clear()
+
+_OVERLAYS = {}
+
+def overlay_surface(size, color):
+    """A shared surface of size filled with an RGBA color, e.g. a square highlight
+
+    Callers only blit it, so one surface per size and color is enough.
+    """
+    key = (tuple(size), tuple(color))
+    surface = _OVERLAYS.get(key)
+    if surface is None:
+        surface = _OVERLAYS[key] = pygame.Surface(size, pygame.SRCALPHA)
+        surface.fill(color)
+    return surface
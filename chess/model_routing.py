@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import defaultdict, deque, Counter
+
+from ai.aiCall import list_models
+from ai.metrics import percentile
+
+# Routing rules, checked in order; the first rule whose fields all match
+# wins and a missing field matches anything. Small models answer simple
+# beginner prompts quickly, the large one is kept for Hardcore strategy.
+MODEL_ROUTES = [
+    {"difficulty": "Beginner", "model": "tinyllama"},
+    {"difficulty": "Intermediate", "phase": "opening", "model": "tinyllama"},
+    {"difficulty": "Intermediate", "model": "llama2"},
+    {"difficulty": "Hardcore", "hint_type": "Strategic", "model": "llama2:13b"},
+    {"difficulty": "Hardcore", "hint_type": "Educational", "phase": "end_game", "model": "llama2:13b"},
+    {"difficulty": "Hardcore", "model": "llama2"}
+]
+
+# Next smaller model to use when a model is too slow or not installed
+SMALLER_MODELS = {
+    "llama2:13b": "llama2",
+    "llama2": "tinyllama"
+}
+
+DEFAULT_MODEL = "llama2"
+
+def _full_name(model):
+    """Ollama lists models with their tag, e.g. "llama2:latest" for "llama2" """
+    return model if ":" in model else f"{model}:latest"
+
+class ModelRouter:
+    """Chooses the model for a hint from its difficulty, hint type and game phase
+
+    A routed model that is not installed, or whose recent time to the first
+    text is over the difficulty's latency budget, is replaced by the next
+    smaller model. Latency samples expire after max_age seconds, so a model
+    that was slow gets tried again later. While the backend hasn't listed
+    its models, every model counts as installed until a request for it is
+    refused, and the list is asked for again every retry_interval seconds.
+    """
+    def __init__(self, routes=None, smaller_models=None, default=DEFAULT_MODEL, budgets=None,
+                 window=20, max_age=300, retry_interval=30):
+        self.routes = routes or MODEL_ROUTES
+        self.smaller_models = smaller_models or SMALLER_MODELS
+        self.default = default
+        # Seconds to the first text per difficulty; None disables the latency fallback
+        self.budgets = budgets
+        self.max_age = max_age
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.installed = None
+        # Models the backend refused as not installed since the last listing
+        self.missing = set()
+        # Set once refresh() has finished, whether or not the backend answered
+        self.refreshed = threading.Event()
+        self.retry_interval = retry_interval
+        self.last_refresh = None
+        self.refresh_thread = None
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.generated = Counter()
+
+    def primary_model(self, difficulty, hint_type, game_phase):
+        """The model the rules pick, before any fallback"""
+        for rule in self.routes:
+            if rule.get("difficulty", difficulty) == difficulty and \
+                    rule.get("hint_type", hint_type) == hint_type and \
+                    rule.get("phase", game_phase) == game_phase:
+                return rule["model"]
+        return self.default
+
+    def chain(self, model):
+        """model followed by each smaller model it can fall back to"""
+        models = [model]
+        while models[-1] in self.smaller_models and self.smaller_models[models[-1]] not in models:
+            models.append(self.smaller_models[models[-1]])
+        return models
+
+    def refresh(self):
+        """Ask the backend which models are installed; slow, so not on the UI thread"""
+        self.last_refresh = time.monotonic()
+        try:
+            models = list_models()
+            if models is not None:
+                installed = {_full_name(name) for name in models}
+                with self.lock:
+                    self.installed = installed
+                    self.missing.clear()
+            return self.installed
+        finally:
+            self.refreshed.set()
+
+    def refresh_in_background(self):
+        """Start refresh() on its own thread, unless one is already running"""
+        with self.lock:
+            if self.refresh_thread is not None and self.refresh_thread.is_alive():
+                return
+            self.last_refresh = time.monotonic()
+            self.refresh_thread = threading.Thread(target=self.refresh, name="model-list", daemon=True)
+            self.refresh_thread.start()
+
+    def mark_missing(self, model):
+        """Stop routing to a model the backend said it doesn't have"""
+        with self.lock:
+            self.missing.add(_full_name(model))
+
+    def is_installed(self, model):
+        """False if the backend refused the model, or listed its models without it"""
+        name = _full_name(model)
+        return name not in self.missing and (self.installed is None or name in self.installed)
+
+    def route(self, difficulty, hint_type, game_phase):
+        """Return the model to use for a hint with these settings"""
+        if self.installed is None and self.last_refresh is not None and \
+                time.monotonic() - self.last_refresh >= self.retry_interval:
+            # The backend was down when it was last asked
+            self.refresh_in_background()
+        primary = self.primary_model(difficulty, hint_type, game_phase)
+        candidates = [m for m in self.chain(primary) if self.is_installed(m)] or [self.default]
+        model = candidates[0]
+        budget = self.budgets.get(difficulty) if self.budgets else None
+        for smaller in candidates[1:]:
+            expected = self.expected_latency(model)
+            if budget is None or expected is None or expected <= budget:
+                break
+            model = smaller
+        return model
+
+    def observe(self, model, latency):
+        """Record how long a model took to start answering"""
+        with self.lock:
+            self.samples[model].append((time.monotonic(), latency))
+            self.generated[model] += 1
+
+    def expected_latency(self, model):
+        """Median recent time to the first text, or None without recent samples"""
+        cutoff = time.monotonic() - self.max_age
+        with self.lock:
+            recent = [latency for when, latency in self.samples[model] if when >= cutoff]
+        if len(recent) < 3:
+            return None
+        return percentile(recent, 50)
+
+    def report(self):
+        """Hints generated per model and each model's current expected latency"""
+        models = []
+        for model, count in self.generated.most_common():
+            expected = self.expected_latency(model)
+            latency = f", ~{expected * 1000:.0f}ms to first text" if expected is not None else ""
+            models.append(f"{model} {count}{latency}")
+        return "Model routing: " + "; ".join(models)
@@ -0,0 +1,244 @@
+"""Recompute player profiles from the full feedback history in a FEEDBACK_DB
+
+Usage:
+    python -m chess.player_analytics feedback.db
+
+Loads every feedback event into NumPy arrays and computes, for all players
+at once: the skill level trajectory the game's update rules produce, the
+recent improvement rate, effectiveness by difficulty, hint type and game
+phase, context weights and recommended settings. The results are written
+back to each player's stored profile.
+
+Run it while nobody is playing: a running game keeps its own copy of the
+profile and would write it over the recomputed one.
+"""
+import argparse
+import itertools
+import json
+import sqlite3
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from chess.feedback_store import connect
+
+DIFFICULTIES = ["Beginner", "Intermediate", "Hardcore"]
+HINT_TYPES = ["Direct", "Strategic", "Educational"]
+PHASES = ["opening", "middle_game", "end_game"]
+
+# Skill level changes per event, as in the game's profile update
+SKILL_CHANGES = {
+    ("Hardcore", True): 0.2,
+    ("Beginner", False): 0.1,
+    ("Hardcore", False): -0.1
+}
+MIN_SKILL = 1.0
+MAX_SKILL = 10.0
+# Improvement rate is the skill gained per this many of a player's latest events
+IMPROVEMENT_WINDOW = 100
+
+def _code(column, values):
+    """SQL expression mapping a text column to its index in values, or 3 for anything else"""
+    whens = " ".join(f"WHEN '{value}' THEN {index}" for index, value in enumerate(values))
+    return f"CASE {column} {whens} ELSE 3 END"
+
+def load_events(conn):
+    """All feedback events as columns, grouped by player
+
+    Each row is packed into one integer in SQL (building a Python tuple per
+    row costs more than the query itself), then unpacked with NumPy. Rows
+    are read in insertion order, which is time order for each player since
+    the game writes a player's events as they happen.
+    """
+    sql = (f"SELECT (player_id << 7) | ({_code('difficulty', DIFFICULTIES)} << 5) "
+           f"| ({_code('hint_type', HINT_TYPES)} << 3) | ({_code('game_phase', PHASES)} << 1) | helpful "
+           f"FROM feedback_events ORDER BY id")
+    packed = np.fromiter(itertools.chain.from_iterable(conn.execute(sql)), dtype=np.int64)
+    # Stable, so each player's events stay in order
+    packed = packed[np.argsort(packed >> 7, kind="stable")]
+
+    def field(shift):
+        values = (packed >> shift) & 3
+        return np.where(values == 3, -1, values)
+
+    return {
+        "player": packed >> 7,
+        "difficulty": field(5),
+        "type": field(3),
+        "phase": field(1),
+        "helpful": (packed & 1).astype(bool)
+    }
+
+def _clamped_scan(changes, starts, low, high):
+    """Compose the steps x -> clip(x + change, low, high) within each group
+
+    Returns (shift, lower, upper) arrays: starting from x0, the value after
+    event i is clip(x0 + shift[i], lower[i], upper[i]). Every step is a function clip(x + shift, lower, upper), and composing two
+    such functions gives another one, so all prefixes can be built by
+    doubling: after the pass with offset d, each event holds the composed
+    steps of up to 2d events ending with it, never reaching into the group
+    before.
+    """
+    n = len(changes)
+    shift = changes.astype(np.float64)
+    lower = np.full(n, low)
+    upper = np.full(n, high)
+    group_start = np.repeat(starts, np.diff(np.append(starts, n)))
+    offset = 1
+    while offset < n:
+        later = np.nonzero(np.arange(n) - offset >= group_start)[0]
+        if not len(later):
+            break
+        earlier = later - offset
+        # The earlier steps run first, then the steps already held
+        s, l, u = shift[later], lower[later], upper[later]
+        lower_new = np.clip(lower[earlier] + s, l, u)
+        upper_new = np.clip(upper[earlier] + s, l, u)
+        shift[later] = shift[earlier] + s
+        lower[later] = lower_new
+        upper[later] = upper_new
+        offset *= 2
+    return shift, lower, upper
+
+def skill_trajectories(events, starts):
+    """Skill level after each event, starting every player at MIN_SKILL
+
+    Matches the game's step-by-step update, which keeps the level between
+    MIN_SKILL and MAX_SKILL after every event.
+    """
+    changes = np.zeros(len(events["player"]))
+    # The game only updates the profile for feedback given with a board
+    with_board = events["phase"] >= 0
+    for (difficulty, helpful), change in SKILL_CHANGES.items():
+        mask = (events["difficulty"] == DIFFICULTIES.index(difficulty)) & (events["helpful"] == helpful)
+        changes[mask & with_board] = change
+    shift, lower, upper = _clamped_scan(changes, starts, MIN_SKILL, MAX_SKILL)
+    return np.clip(MIN_SKILL + shift, lower, upper)
+
+def grouped_effectiveness(players, categories, helpful, count, n_players):
+    """(helpful, total) arrays of shape (players, categories)"""
+    valid = categories >= 0
+    index = players[valid] * count + categories[valid]
+    totals = np.bincount(index, minlength=n_players * count).reshape(n_players, count)
+    helpfuls = np.bincount(index, weights=helpful[valid], minlength=n_players * count).reshape(n_players, count)
+    return helpfuls, totals
+
+def recommend(helpfuls, totals, names, current, min_events):
+    """Most effective setting per player, if it is helpful over 60% of the time
+
+    Settings with fewer than min_events events are not considered; players
+    with no such setting keep their current one.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = np.where(totals >= min_events, helpfuls / np.maximum(totals, 1), -1.0)
+    best = rates.argmax(axis=1)
+    confident = rates.max(axis=1) > 0.6
+    return [names[b] if ok else cur for b, ok, cur in zip(best, confident, current)]
+
+def analyze(events, min_events=5):
+    """Per-player results for every player with events, as a dict of arrays"""
+    player_ids, starts, counts = np.unique(events["player"], return_index=True, return_counts=True)
+    # Dense player numbers 0..n-1 for bincount
+    players = np.repeat(np.arange(len(player_ids)), counts)
+    n = len(player_ids)
+
+    skill = skill_trajectories(events, starts)
+    ends = starts + counts - 1
+    window_start = np.maximum(starts, ends - IMPROVEMENT_WINDOW)
+    # Skill before the window's first event; a player's first event starts from MIN_SKILL
+    before = np.where(window_start > starts, skill[np.maximum(window_start - 1, 0)], MIN_SKILL)
+    window = ends - window_start + 1
+    improvement = (skill[ends] - before) / window * IMPROVEMENT_WINDOW
+
+    helpful = events["helpful"].astype(np.float64)
+    by_difficulty = grouped_effectiveness(players, events["difficulty"], helpful, len(DIFFICULTIES), n)
+    by_type = grouped_effectiveness(players, events["type"], helpful, len(HINT_TYPES), n)
+    by_phase = grouped_effectiveness(players, events["phase"], helpful, len(PHASES), n)
+
+    # Context weight rule: +0.1 for each helpful hint in a phase, -0.05 otherwise
+    phase_helpful, phase_total = by_phase
+    context_weights = 1.0 + 0.1 * phase_helpful - 0.05 * (phase_total - phase_helpful)
+
+    return {
+        "player_ids": player_ids,
+        "events": counts,
+        "skill": skill[ends],
+        "improvement": improvement,
+        "by_difficulty": by_difficulty,
+        "by_type": by_type,
+        "by_phase": by_phase,
+        "context_weights": context_weights,
+        "min_events": min_events
+    }
+
+def write_profiles(conn, results):
+    """Store the results in each player's profile; returns how many were updated"""
+    index = {int(pid): i for i, pid in enumerate(results["player_ids"])}
+    rows = conn.execute("SELECT player_id, state FROM profiles").fetchall()
+    rows = [(pid, json.loads(state)) for pid, state in rows if pid in index]
+    positions = [index[pid] for pid, state in rows]
+    difficulties = recommend(*(a[positions] for a in results["by_difficulty"]), DIFFICULTIES,
+                             [state["profile"]["preferred_difficulty"] for pid, state in rows], results["min_events"])
+    hint_types = recommend(*(a[positions] for a in results["by_type"]), HINT_TYPES,
+                           [state["profile"]["preferred_type"] for pid, state in rows], results["min_events"])
+
+    updates = []
+    now = time.time()
+    for (pid, state), i, difficulty, hint_type in zip(rows, positions, difficulties, hint_types):
+        profile = state["profile"]
+        profile["skill_level"] = round(float(results["skill"][i]), 2)
+        profile["improvement_rate"] = round(float(results["improvement"][i]), 3)
+        profile["preferred_difficulty"] = difficulty
+        profile["preferred_type"] = hint_type
+        for p, phase in enumerate(PHASES):
+            profile["context_weights"][phase] = round(float(results["context_weights"][i, p]), 2)
+        updates.append((json.dumps(state), now, pid))
+    with conn:
+        conn.executemany("UPDATE profiles SET state = ?, updated = ? WHERE player_id = ?", updates)
+    return len(updates)
+
+def _summary(name, values, helpfuls, totals):
+    parts = []
+    for value, helpful, total in zip(values, helpfuls.sum(axis=0), totals.sum(axis=0)):
+        if total:
+            parts.append(f"{value} {int(helpful / total * 100)}% of {int(total)}")
+    return f"  {name}: " + ", ".join(parts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute player profiles from the feedback history")
+    parser.add_argument("database", help="SQLite file written by the game (FEEDBACK_DB)")
+    parser.add_argument("--min-events", type=int, default=5,
+                        help="events a setting needs before it can be recommended")
+    parser.add_argument("--dry-run", action="store_true", help="print the summary without updating profiles")
+    args = parser.parse_args(argv)
+    if np is None:
+        parser.error("NumPy is required: pip install numpy")
+
+    started = time.perf_counter()
+    conn = connect(args.database)
+    events = load_events(conn)
+    loaded = time.perf_counter()
+    results = analyze(events, args.min_events)
+    analyzed = time.perf_counter()
+    print(f"{len(events['player'])} events from {len(results['player_ids'])} players "
+          f"(load {loaded - started:.1f}s, analysis {analyzed - loaded:.2f}s)")
+    if len(results["player_ids"]):
+        print("Effectiveness")
+        print(_summary("difficulty", DIFFICULTIES, *results["by_difficulty"]))
+        print(_summary("type", HINT_TYPES, *results["by_type"]))
+        print(_summary("phase", PHASES, *results["by_phase"]))
+        print(f"  skill level: median {np.median(results['skill']):.1f}, "
+              f"{int((results['improvement'] > 0).sum())} players improving")
+    if not args.dry_run:
+        try:
+            updated = write_profiles(conn, results)
+            print(f"Updated {updated} profiles")
+        except sqlite3.Error as e:
+            print(f"Could not update profiles: {e}")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
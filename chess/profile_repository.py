@@ -0,0 +1,72 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+def shard_directory(root, player):
+    """Directory for one player's files, root/players/<shard>/<player>
+
+    The shard is the first byte of a hash of the name, so no directory ends
+    up holding every player and loading one never lists anyone else's files.
+    """
+    digest = hashlib.sha1(player.encode("utf-8")).hexdigest()
+    # Names may contain anything; the hash suffix keeps sanitized names distinct
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", player)[:40]
+    return os.path.join(root, "players", digest[:2], f"{safe_name}-{digest[:8]}")
+
+class ProfileRepository:
+    """Feedback state of many players, loaded on demand
+
+    open_player(player) returns the FeedbackJournal or FeedbackStore that
+    persists one player's state. The most recently used players stay loaded,
+    up to capacity; the least recently used one is then closed, which writes
+    any changes it has not saved yet.
+    """
+    def __init__(self, open_player, capacity=8):
+        self.open_player = open_player
+        self.capacity = capacity
+        # player -> (journal, state), least recently used first
+        self.active = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.loads = 0
+        self.evictions = 0
+
+    def _entry(self, player):
+        evicted = []
+        with self.lock:
+            entry = self.active.get(player)
+            if entry is not None:
+                self.active.move_to_end(player)
+                return entry
+            journal = self.open_player(player)
+            entry = self.active[player] = (journal, journal.recover())
+            self.loads += 1
+            while len(self.active) > self.capacity:
+                evicted.append(self.active.popitem(last=False)[1][0])
+                self.evictions += 1
+        for journal in evicted:
+            journal.close()
+        return entry
+
+    def get(self, player):
+        """A player's state, {"feedback": ..., "profile": ...}, loading it if needed"""
+        return self._entry(player)[1]
+
+    def append(self, player, event):
+        """Persist an event already applied to the player's state"""
+        self._entry(player)[0].append(event)
+
+    def close(self):
+        """Write and unload every loaded player"""
+        with self.lock:
+            journals = [journal for journal, state in self.active.values()]
+            self.active.clear()
+        for journal in journals:
+            journal.close()
+
+    def report(self):
+        """Summarize how often player states were loaded and evicted"""
+        return f"Profiles: {len(self.active)} loaded, {self.loads} loads, {self.evictions} evicted"
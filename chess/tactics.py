@@ -0,0 +1,244 @@
+from chess.fen import fen_to_board
+
+# Material values used to judge captures and threatened pieces
+PIECE_VALUES = {
+    "pawn": 1,
+    "knight": 3,
+    "bishop": 3,
+    "rook": 5,
+    "queen": 9,
+    "king": 0
+}
+
+KNIGHT_STEPS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_STEPS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+DIAGONALS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+LINES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Minor pieces still on their starting squares count as undeveloped
+HOME_SQUARES = {
+    "white": [(7, 1, "knight"), (7, 6, "knight"), (7, 2, "bishop"), (7, 5, "bishop")],
+    "black": [(0, 1, "knight"), (0, 6, "knight"), (0, 2, "bishop"), (0, 5, "bishop")]
+}
+
+def opponent(color):
+    return "black" if color == "white" else "white"
+
+def square_name(row, col):
+    """Algebraic name of a square, row 0 being rank 8"""
+    return "abcdefgh"[col] + str(8 - row)
+
+def piece_type(piece):
+    return piece.split("_")[1]
+
+def _on_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+def attackers(board, row, col, color):
+    """Squares of the pieces of color that attack (row, col)"""
+    found = []
+    # A white pawn attacks the squares diagonally above it (towards rank 8)
+    pawn_row = row + (1 if color == "white" else -1)
+    for dc in (-1, 1):
+        if _on_board(pawn_row, col + dc) and board[pawn_row][col + dc] == f"{color}_pawn":
+            found.append((pawn_row, col + dc))
+
+    for steps, name in ((KNIGHT_STEPS, "knight"), (KING_STEPS, "king")):
+        for dr, dc in steps:
+            r, c = row + dr, col + dc
+            if _on_board(r, c) and board[r][c] == f"{color}_{name}":
+                found.append((r, c))
+
+    for directions, sliders in ((DIAGONALS, ("bishop", "queen")), (LINES, ("rook", "queen"))):
+        for dr, dc in directions:
+            r, c = row + dr, col + dc
+            while _on_board(r, c):
+                piece = board[r][c]
+                if piece:
+                    if piece.startswith(color) and piece_type(piece) in sliders:
+                        found.append((r, c))
+                    break
+                r, c = r + dr, c + dc
+    return found
+
+def pseudo_moves(board, color):
+    """Moves for color as ((row, col), (row, col)) pairs, ignoring checks
+
+    Castling and en passant are left out; they never change which facts a
+    hint is built from.
+    """
+    moves = []
+    forward = -1 if color == "white" else 1
+    start_row = 6 if color == "white" else 1
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if not piece or not piece.startswith(color):
+                continue
+            kind = piece_type(piece)
+
+            if kind == "pawn":
+                r = row + forward
+                if _on_board(r, col) and not board[r][col]:
+                    moves.append(((row, col), (r, col)))
+                    if row == start_row and not board[r + forward][col]:
+                        moves.append(((row, col), (r + forward, col)))
+                for dc in (-1, 1):
+                    target = board[r][col + dc] if _on_board(r, col + dc) else None
+                    if target and not target.startswith(color):
+                        moves.append(((row, col), (r, col + dc)))
+                continue
+
+            if kind in ("knight", "king"):
+                for dr, dc in (KNIGHT_STEPS if kind == "knight" else KING_STEPS):
+                    r, c = row + dr, col + dc
+                    if _on_board(r, c) and not (board[r][c] or "").startswith(color):
+                        moves.append(((row, col), (r, c)))
+                continue
+
+            directions = {"bishop": DIAGONALS, "rook": LINES, "queen": DIAGONALS + LINES}[kind]
+            for dr, dc in directions:
+                r, c = row + dr, col + dc
+                while _on_board(r, c):
+                    target = board[r][c]
+                    if target and target.startswith(color):
+                        break
+                    moves.append(((row, col), (r, c)))
+                    if target:
+                        break
+                    r, c = r + dr, c + dc
+    return moves
+
+def apply_move(board, move):
+    """Board after move, promoting pawns that reach the last rank to queens"""
+    (src_row, src_col), (des_row, des_col) = move
+    new_board = [row[:] for row in board]
+    piece = new_board[src_row][src_col]
+    new_board[src_row][src_col] = None
+    if piece_type(piece) == "pawn" and des_row in (0, 7):
+        piece = piece.split("_")[0] + "_queen"
+    new_board[des_row][des_col] = piece
+    return new_board
+
+def find_king(board, color):
+    for row in range(8):
+        for col in range(8):
+            if board[row][col] == f"{color}_king":
+                return row, col
+    return None
+
+def in_check(board, color):
+    king = find_king(board, color)
+    return king is not None and bool(attackers(board, king[0], king[1], opponent(color)))
+
+def legal_moves(board, color):
+    return [move for move in pseudo_moves(board, color) if not in_check(apply_move(board, move), color)]
+
+def mate_in_one(board, color):
+    """A move for color that checkmates straight away, or None"""
+    for move in legal_moves(board, color):
+        after = apply_move(board, move)
+        if in_check(after, opponent(color)) and not legal_moves(after, opponent(color)):
+            return move
+    return None
+
+def _describe_move(board, move):
+    (src_row, src_col), (des_row, des_col) = move
+    return {
+        "piece": piece_type(board[src_row][src_col]),
+        "from": square_name(src_row, src_col),
+        "to": square_name(des_row, des_col)
+    }
+
+def best_capture(board, color):
+    """The legal capture that wins the most material, or None if none wins any"""
+    best = None
+    best_gain = 0
+    for move in legal_moves(board, color):
+        (src_row, src_col), (des_row, des_col) = move
+        target = board[des_row][des_col]
+        if not target:
+            continue
+        gain = PIECE_VALUES[piece_type(target)]
+        # If the capturing piece can be taken back, it is lost in exchange
+        if attackers(apply_move(board, move), des_row, des_col, opponent(color)):
+            gain -= PIECE_VALUES[piece_type(board[src_row][src_col])]
+        if gain > best_gain:
+            best, best_gain = move, gain
+    if best is None:
+        return None
+    fact = _describe_move(board, best)
+    fact["target"] = piece_type(board[best[1][0]][best[1][1]])
+    fact["gain"] = best_gain
+    return fact
+
+def hanging_piece(board, color):
+    """The most valuable piece of color that can be taken for free or for less"""
+    worst = None
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if not piece or not piece.startswith(color) or piece_type(piece) == "king":
+                continue
+            threats = attackers(board, row, col, opponent(color))
+            if not threats:
+                continue
+            value = PIECE_VALUES[piece_type(piece)]
+            cheapest = min(PIECE_VALUES[piece_type(board[r][c])] for r, c in threats)
+            defended = bool(attackers(board, row, col, color))
+            if (not defended or cheapest < value) and (worst is None or value > worst[0]):
+                worst = (value, row, col)
+    if worst is None:
+        return None
+    _, row, col = worst
+    return {"piece": piece_type(board[row][col]), "square": square_name(row, col)}
+
+def development(board, color, fullmove):
+    """Undeveloped minor pieces, for the first moves of the game"""
+    if fullmove > 12:
+        return None
+    undeveloped = [kind for row, col, kind in HOME_SQUARES[color] if board[row][col] == f"{color}_{kind}"]
+    if not undeveloped:
+        return None
+    return {"pieces": sorted(set(undeveloped)), "count": len(undeveloped)}
+
+def analyze(fen):
+    """Facts about the position for the side to move, keyed by fact name
+
+    Possible facts: mate (a mate in one), check (the king is attacked),
+    mate_threat (the opponent threatens mate in one), capture (material can
+    be won), hanging (a piece can be lost) and development.
+    """
+    board, info = fen_to_board(fen)
+    color = "white" if info["side_to_move"] == "w" else "black"
+    facts = {}
+
+    move = mate_in_one(board, color)
+    if move:
+        facts["mate"] = _describe_move(board, move)
+
+    king = find_king(board, color)
+    if king is not None:
+        checkers = attackers(board, king[0], king[1], opponent(color))
+        if checkers:
+            row, col = checkers[0]
+            facts["check"] = {"attacker": piece_type(board[row][col]), "square": square_name(row, col)}
+
+    if "check" not in facts:
+        # Would the opponent have a mate if it were their move?
+        move = mate_in_one(board, opponent(color))
+        if move:
+            facts["mate_threat"] = _describe_move(board, move)
+
+    capture = best_capture(board, color)
+    if capture:
+        facts["capture"] = capture
+
+    hanging = hanging_piece(board, color)
+    if hanging:
+        facts["hanging"] = hanging
+
+    developing = development(board, color, info["fullmove"])
+    if developing:
+        facts["development"] = developing
+    return facts
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+import pygame
+
+class TextCache:
+    """Shared fonts and recently rendered text surfaces
+
+    pygame.font.SysFont searches the system font list on every call, and
+    rendering text is much slower than blitting it, so UI code gets its
+    fonts and labels here instead of creating them every frame. Returned
+    surfaces are shared and must not be drawn on.
+    """
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, name, size, bold=False, italic=False):
+        """pygame.font.SysFont, created once per name, size and style"""
+        key = (name, size, bold, italic)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self.fonts[key] = pygame.font.SysFont(name, size, bold=bold, italic=italic)
+        return font
+
+    def render(self, font, text, antialias, color, background=None):
+        """font.render(text, antialias, color, background), reusing recent results"""
+        key = (font, text, antialias, tuple(color), tuple(background) if background else None)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, antialias, color, background)
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+# Shared by all UI code
+TEXT_CACHE = TextCache()
@@ -1,9 +1,13 @@
+import queue
+import time
 import pygame
+from ai.tracing import TRACER
+from chess.text_cache import TEXT_CACHE
 
 class ChessTooltip:
     def __init__(self, position=(200, 150), size=(400, 200)):
-        self.font = pygame.font.SysFont("Arial", 15)
-        self.title_font = pygame.font.SysFont("Arial", 16, bold=True)
+        self.font = TEXT_CACHE.font("Arial", 15)
+        self.title_font = TEXT_CACHE.font("Arial", 16, bold=True)
         self.show_tooltip = False
         self.tooltip_text = ""
         self.tooltip_rect = pygame.Rect(position[0], position[1], size[0], size[1])
@@ -15,12 +19,95 @@ class ChessTooltip:
         
         # Store screen dimensions for boundary checking
         self.screen_dimensions = (800, 670)  # Default, will be updated on first draw
+        
+        # For streamed text: chunks arrive from a worker thread and are
+        # appended on the render thread. The id lets an older stream be ignored.
+        self.stream_queue = queue.Queue()
+        self.stream_id = 0
+        self.streaming = False
+        # Trace of the current stream, for time-to-visible-text spans
+        self.stream_trace = None
+        self.stream_started = 0.0
+        
+        # The tooltip is drawn once into body_surface and only redrawn when
+        # its contents change; the word wrap of the text is kept as well
+        self.body_key = None
+        self.body_surface = None
+        self.wrap_text = ""
+        self.wrap_width = None
+        self.wrap_lines = []
+        self.wrap_words = 0
 
     def show(self, text):
+        # A full text replaces anything still streaming in
+        self.stream_id += 1
+        self.streaming = False
         self.tooltip_text = text
         self.show_tooltip = True
 
+    def start_stream(self, trace_id=None):
+        """Show an empty tooltip in its loading state and return the new stream id
+        
+        Text for the stream is added with push_chunk and end_stream, which are
+        safe to call from any thread.
+        """
+        self.stream_id += 1
+        self.streaming = True
+        self.stream_trace = trace_id
+        self.stream_started = time.perf_counter()
+        self.tooltip_text = ""
+        self.show_tooltip = True
+        return self.stream_id
+
+    def push_chunk(self, stream_id, chunk):
+        self.stream_queue.put((stream_id, chunk))
+
+    def end_stream(self, stream_id):
+        self.stream_queue.put((stream_id, None))
+
+    def is_loading(self):
+        """True while waiting for the first text of a streamed hint"""
+        return self.show_tooltip and self.streaming and not self.tooltip_text
+
+    def _drain_stream(self):
+        """Append any chunks that arrived since the last frame"""
+        while True:
+            try:
+                stream_id, chunk = self.stream_queue.get_nowait()
+            except queue.Empty:
+                return
+            if stream_id != self.stream_id:
+                continue
+            if chunk is None:
+                self.streaming = False
+                self._trace("tooltip.full_text")
+            else:
+                if not self.tooltip_text:
+                    self._trace("tooltip.first_text")
+                self.tooltip_text += chunk
+
+    def update(self):
+        """Take in streamed text; call once per frame even when nothing is drawn"""
+        self._drain_stream()
+
+    def render_state(self):
+        """Everything the tooltip shows, so the game can tell when to redraw it"""
+        if not self.show_tooltip:
+            return None
+        # The loading animation changes every 400ms
+        dots = pygame.time.get_ticks() // 400 % 4 if self.is_loading() else None
+        return (self.tooltip_text, dots)
+
+    def _trace(self, name):
+        """Record time since the stream started, as seen on screen"""
+        if TRACER.enabled:
+            TRACER.set_trace(self.stream_trace)
+            TRACER.record(name, time.perf_counter() - self.stream_started)
+
     def hide(self):
+        # Ignore any text still arriving for the hidden hint
+        self.stream_id += 1
+        self.streaming = False
         self.show_tooltip = False
 
     def handle_event(self, event):
@@ -57,6 +144,15 @@ class ChessTooltip:
             self.tooltip_close_rect.y = new_y + 10
 
     def draw(self, screen):
+        self._drain_stream()
+        if self.show_tooltip and self.streaming and TRACER.enabled:
+            # Time rendering while a hint is arriving
+            with TRACER.span("tooltip.draw"):
+                self._draw(screen)
+        else:
+            self._draw(screen)
+
+    def _draw(self, screen):
         if self.show_tooltip:
             # Update screen dimensions (in case of window resize)
             self.screen_dimensions = screen.get_size()
@@ -69,42 +165,89 @@ class ChessTooltip:
                 self.tooltip_rect.y = self.screen_dimensions[1] - self.tooltip_rect.height - 10
                 self.tooltip_close_rect.y = self.tooltip_rect.y + 10
             
-            # Semi-transparent background
-            bg_surface = pygame.Surface((self.tooltip_rect.width, self.tooltip_rect.height), pygame.SRCALPHA)
-            bg_surface.fill((50, 50, 50, 230))  # RGBA - semi-transparent
-            screen.blit(bg_surface, (self.tooltip_rect.x, self.tooltip_rect.y))
-            
-            # Border
-            pygame.draw.rect(screen, (200, 200, 200), self.tooltip_rect, 2, border_radius=10)
-            
-            # Title bar
-            title_bar_rect = pygame.Rect(self.tooltip_rect.x, self.tooltip_rect.y, 
-                                         self.tooltip_rect.width, 30)
-            pygame.draw.rect(screen, (30, 30, 80), title_bar_rect, border_radius=10)
-            
-            # Title
-            title_text = self.title_font.render("Chess Hint", True, (255, 255, 255))
-            screen.blit(title_text, (self.tooltip_rect.x + 10, self.tooltip_rect.y + 5))
-            
-            # Close "X" button
-            pygame.draw.rect(screen, (200, 50, 50), self.tooltip_close_rect, border_radius=5)
-            x_text = self.font.render('X', True, (255, 255, 255))
-            screen.blit(x_text, (self.tooltip_close_rect.x + 5, self.tooltip_close_rect.y + 2))
-
-            # Wrap and render the tooltip text
-            wrapped_lines = []
-            words = self.tooltip_text.split()
-            line = ""
-            for word in words:
-                test_line = line + word + " "
-                if self.font.size(test_line)[0] < self.tooltip_rect.width - 40:
-                    line = test_line
-                else:
-                    wrapped_lines.append(line)
-                    line = word + " "
-            wrapped_lines.append(line)
-
-            for idx, l in enumerate(wrapped_lines):
-                text_surf = self.font.render(l.strip(), True, (255, 255, 255))
-                screen.blit(text_surf, (self.tooltip_rect.x + 20, 
-                                        self.tooltip_rect.y + 40 + idx * 20)) 
\ No newline at end of file
+            # Dragging only moves the finished tooltip
+            screen.blit(self._body(), self.tooltip_rect.topleft)
+
+    def _body(self):
+        """The whole tooltip drawn at (0, 0), rebuilt only when its text, size or loading dots change"""
+        loading = self.is_loading()
+        # Loading state until the first words of the hint arrive
+        dots = pygame.time.get_ticks() // 400 % 4 if loading else None
+        key = (self.tooltip_text, self.tooltip_rect.size, dots)
+        if key != self.body_key:
+            self.body_key = key
+            self.body_surface = self._render_body(dots)
+        return self.body_surface
+
+    def _render_body(self, dots):
+        width, height = self.tooltip_rect.size
+        # Semi-transparent background
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((50, 50, 50, 230))  # RGBA - semi-transparent
+        
+        # Border
+        pygame.draw.rect(surface, (200, 200, 200), surface.get_rect(), 2, border_radius=10)
+        
+        # Title bar
+        pygame.draw.rect(surface, (30, 30, 80), pygame.Rect(0, 0, width, 30), border_radius=10)
+        
+        # Title
+        title_text = TEXT_CACHE.render(self.title_font, "Chess Hint", True, (255, 255, 255))
+        surface.blit(title_text, (10, 5))
+        
+        # Close "X" button
+        close_rect = self.tooltip_close_rect.move(-self.tooltip_rect.x, -self.tooltip_rect.y)
+        pygame.draw.rect(surface, (200, 50, 50), close_rect, border_radius=5)
+        x_text = TEXT_CACHE.render(self.font, 'X', True, (255, 255, 255))
+        surface.blit(x_text, (close_rect.x + 5, close_rect.y + 2))
+
+        if dots is not None:
+            loading_text = TEXT_CACHE.render(self.font, "Thinking" + "." * dots, True, (200, 200, 200))
+            surface.blit(loading_text, (20, 40))
+            return surface
+
+        # Wrap and render the tooltip text; unchanged lines come from the text cache
+        for idx, l in enumerate(self._wrap(self.tooltip_text, width - 40)):
+            text_surf = TEXT_CACHE.render(self.font, l.strip(), True, (255, 255, 255))
+            surface.blit(text_surf, (20, 40 + idx * 20))
+        return surface
+
+    def _wrap(self, text, max_width):
+        """Split text into lines narrower than max_width
+        
+        Streamed text only grows, so when text extends the previous one only
+        its last line is wrapped again; the lines before it can't change.
+        """
+        words = text.split()
+        if (max_width != self.wrap_width or not text.startswith(self.wrap_text)
+                or not self.wrap_lines):
+            done_lines, done_words = [], 0
+        else:
+            done_lines = self.wrap_lines[:-1]
+            done_words = self.wrap_words
+        
+        wrapped_lines = list(done_lines)
+        words_before_line = done_words
+        line = ""
+        start = done_words
+        if done_lines:
+            # A line after a break starts with its first word whatever its width
+            line = words[done_words] + " "
+            start += 1
+        for index in range(start, len(words)):
+            word = words[index]
+            test_line = line + word + " "
+            if self.font.size(test_line)[0] < max_width:
+                line = test_line
+            else:
+                wrapped_lines.append(line)
+                words_before_line = index
+                line = word + " "
+        wrapped_lines.append(line)
+        
+        self.wrap_text = text
+        self.wrap_width = max_width
+        self.wrap_lines = wrapped_lines
+        # Words on every line but the last, where wrapping resumes next time
+        self.wrap_words = words_before_line
+        return wrapped_lines
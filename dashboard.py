@@ -1,6 +1,9 @@
 import pygame
 import sys
 
+from chess.text_cache import TEXT_CACHE
+from chess.layers import LayerCache
+
 pygame.init()
 
 # Screen setup
@@ -9,8 +12,8 @@ screen = pygame.display.set_mode((screen_width, screen_height))
 pygame.display.set_caption("Game Dashboard")
 
 # Fonts and colors
-font = pygame.font.SysFont("Arial", 30, bold=True)
-title_font = pygame.font.SysFont("Arial", 48, bold=True)
+font = TEXT_CACHE.font("Arial", 30, bold=True)
+title_font = TEXT_CACHE.font("Arial", 48, bold=True)
 button_color = (220, 220, 250)
 hover_color = (180, 180, 255)
 text_color = (30, 30, 30)
@@ -25,39 +28,43 @@ buttons = [
     {"name": "Chess", "rect": pygame.Rect((screen_width - button_width) // 2, 150 + button_height + button_spacing, button_width, button_height), "action": None}
 ]
 
-def draw_gradient_background():
+# Pre-rendered background, drawn once instead of line by line every frame
+layers = LayerCache()
+
+def build_gradient_background():
     """Create a vertical gradient background."""
+    background = pygame.Surface((screen_width, screen_height)).convert()
     for y in range(screen_height):
         color = (
             int(bg_color_start[0] + (bg_color_end[0] - bg_color_start[0]) * y / screen_height),
             int(bg_color_start[1] + (bg_color_end[1] - bg_color_start[1]) * y / screen_height),
             int(bg_color_start[2] + (bg_color_end[2] - bg_color_start[2]) * y / screen_height)
         )
-        pygame.draw.line(screen, color, (0, y), (screen_width, y))
+        pygame.draw.line(background, color, (0, y), (screen_width, y))
+    return background
 
 def draw_rounded_rect(surface, color, rect, radius=15):
     """Draw a rounded rectangle."""
     pygame.draw.rect(surface, color, rect, border_radius=radius)
 
 def draw_dashboard():
-    screen.fill((0, 0, 0, 0))  # Transparent background to layer the gradient behind the buttons
-    draw_gradient_background()
+    screen.blit(layers.get("gradient", (screen_width, screen_height), build_gradient_background), (0, 0))
 
     # Title
-    title_text = title_font.render("Game Dashboard", True, text_color)
+    title_text = TEXT_CACHE.render(title_font, "Game Dashboard", True, text_color)
     screen.blit(title_text, ((screen_width - title_text.get_width()) // 2, 40))
 
     # Draw buttons
-    mouse_pos = pygame.mouse.get_pos()
+    hovered = hovered_button()
     for btn in buttons:
         # Add hover effect
-        if btn["rect"].collidepoint(mouse_pos):
+        if btn["name"] == hovered:
             draw_rounded_rect(screen, hover_color, btn["rect"])
         else:
             draw_rounded_rect(screen, button_color, btn["rect"])
 
         # Text for button
-        text = font.render(btn["name"], True, text_color)
+        text = TEXT_CACHE.render(font, btn["name"], True, text_color)
         screen.blit(
             text,
             (
@@ -68,20 +75,39 @@ def draw_dashboard():
 
     pygame.display.flip()
 
+def hovered_button():
+    """Name of the button under the mouse, or None"""
+    mouse_pos = pygame.mouse.get_pos()
+    for btn in buttons:
+        if btn["rect"].collidepoint(mouse_pos):
+            return btn["name"]
+    return None
+
 def dashboard_loop():
+    # The dashboard only looks different when the hovered button changes,
+    # so it is redrawn then and left alone otherwise
+    shown_hover = ()
     while True:
-        draw_dashboard()
+        if hovered_button() != shown_hover:
+            shown_hover = hovered_button()
+            draw_dashboard()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
 
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # the window was uncovered and needs drawing again
+                shown_hover = ()
+
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 for btn in buttons:
                     if btn["rect"].collidepoint(event.pos):
                         if btn["name"] == "Chess":
                             from chess.main import run
                             run()
+                            # the game used the window, so draw everything again
+                            shown_hover = ()
 
         pygame.time.delay(100)
 
@@ -0,0 +1,14 @@
+from chess.bulk_hints import read_positions
+
+def test_malformed_lines_are_skipped_and_reported(tmp_path):
+    path = tmp_path / "positions.jsonl"
+    path.write_text('{"board": "8/8/8/8/8/8/8/K6k w - - 0 1"}\n'
+                    '{"board": \n'
+                    '# a comment\n'
+                    '{"id": "no board"}\n'
+                    '8/8/8/8/8/8/8/K6k b - - 0 1\n')
+    errors = []
+    positions = list(read_positions(str(path), on_error=errors.append))
+    assert [position["id"] for position in positions] == [1, 5]
+    assert positions[1]["board"] == "8/8/8/8/8/8/8/K6k b - - 0 1"
+    assert errors == [2, 4]
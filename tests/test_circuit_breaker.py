@@ -0,0 +1,63 @@
+from ai.circuit_breaker import AdaptiveTimeout, CircuitBreaker
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    open_breaker(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.available()
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1 and breaker.times_opened == 1
+
+def test_probe_half_opens_and_one_trial_closes():
+    breaker = CircuitBreaker(failure_threshold=1, probe=lambda: True, probe_base_delay=0.01, probe_max_delay=0.01)
+    open_breaker(breaker)
+    breaker.probe_thread.join(2)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    # Only one trial at a time
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.state = CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_released_trial_lets_the_next_request_through():
+    breaker = CircuitBreaker()
+    breaker.state = CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    breaker.release_trial()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+def test_probe_keeps_trying_while_unhealthy():
+    answers = iter([False, False, True])
+    breaker = CircuitBreaker(failure_threshold=1, probe=lambda: next(answers),
+                             probe_base_delay=0.01, probe_max_delay=0.01)
+    open_breaker(breaker)
+    breaker.probe_thread.join(2)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+def test_adaptive_timeout_follows_latency():
+    timeout = AdaptiveTimeout(default=10.0, minimum=3.0, maximum=10.0, multiplier=2.0, min_samples=5)
+    assert timeout.timeout() == 10.0
+    for _ in range(5):
+        timeout.observe(1.0)
+    assert timeout.timeout() == 3.0
+    for _ in range(5):
+        timeout.observe(4.0)
+    assert timeout.timeout() == 8.0
@@ -0,0 +1,54 @@
+import json
+import os
+import time
+
+from chess.feedback_journal import FeedbackJournal
+
+def count_event(state, event):
+    state[event["kind"]] = state.get(event["kind"], 0) + 1
+
+def new_journal(directory, compact_every=50):
+    return FeedbackJournal(str(directory), count_event, dict, compact_every=compact_every)
+
+def write_lines(path, lines):
+    with open(path, "w") as f:
+        f.write("".join(lines))
+
+def test_appended_events_survive_a_restart(tmp_path):
+    journal = new_journal(tmp_path)
+    assert journal.recover() == {}
+    for kind in ("helpful", "helpful", "unhelpful"):
+        journal.append({"kind": kind})
+    journal.close()
+    assert new_journal(tmp_path).recover() == {"helpful": 2, "unhelpful": 1}
+
+def test_replays_only_events_after_the_snapshot(tmp_path):
+    journal = new_journal(tmp_path)
+    with open(journal.snapshot_path, "w") as f:
+        json.dump({"seq": 2, "state": {"helpful": 2}}, f)
+    write_lines(journal.journal_path, [json.dumps({"kind": "helpful", "seq": seq}) + "\n" for seq in (1, 2, 3, 3)])
+    assert journal.recover() == {"helpful": 3}
+    assert journal.seq == 3
+    journal.close()
+
+def test_torn_last_line_is_skipped(tmp_path):
+    journal = new_journal(tmp_path)
+    write_lines(journal.journal_path, [json.dumps({"kind": "helpful", "seq": 1}) + "\n", '{"kind": "unhel'])
+    assert journal.recover() == {"helpful": 1}
+    journal.append({"kind": "unhelpful"})
+    journal.close()
+    assert new_journal(tmp_path).recover() == {"helpful": 1, "unhelpful": 1}
+
+def test_failed_write_is_retried_and_kept_out_of_the_snapshot(tmp_path):
+    journal = new_journal(tmp_path)
+    journal.recover()
+    # A directory where the journal should be makes every append fail
+    os.mkdir(journal.journal_path)
+    journal.append({"kind": "helpful"})
+    time.sleep(0.2)
+    assert journal.replica == {} and journal.written == 0
+    os.rmdir(journal.journal_path)
+    journal.append({"kind": "unhelpful"})
+    journal.close()
+    assert journal.written == 2
+    assert new_journal(tmp_path).recover() == {"helpful": 1, "unhelpful": 1}
@@ -0,0 +1,31 @@
+import threading
+
+from chess.feedback_store import connect, player_id
+
+def test_concurrent_games_get_the_same_player(tmp_path):
+    path = str(tmp_path / "feedback.db")
+    connect(path).close()
+    ids, errors = [], []
+
+    def create():
+        conn = connect(path)
+        try:
+            ids.append(player_id(conn, "alice"))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not errors
+    assert len(set(ids)) == 1 and ids[0] is not None
+
+def test_unknown_player_is_not_created(tmp_path):
+    conn = connect(str(tmp_path / "feedback.db"))
+    assert player_id(conn, "bob", create=False) is None
+    assert conn.execute("SELECT COUNT(*) FROM players").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,69 @@
+import random
+
+from chess.chess import Chess
+from chess.fen import STARTING_FEN, board_to_fen, count_pieces, fen_to_board, is_fen, position_key
+
+def new_game(monkeypatch, first_mover):
+    """Chess rules and state without a screen, with the given side moving first"""
+    game = Chess.__new__(Chess)
+    game.turn = {"black": 0, "white": 0}
+    monkeypatch.setattr(random, "randint", lambda a, b: 1 if first_mover == "black" else 0)
+    game.reset()
+    return game
+
+def play(game, source, destination):
+    """Move the piece on source (e.g. "e2") to destination"""
+    game.piece_location[source[0]][int(source[1])][1] = True
+    game.validate_move((ord(destination[0]) - 97, 8 - int(destination[1])))
+
+def game_fen(game):
+    board = [[game.piece_location[chr(97 + col)][8 - row][0] or None for col in range(8)] for row in range(8)]
+    side_to_move = "b" if game.turn["black"] else "w"
+    return board_to_fen(board, side_to_move, game.castling, game.en_passant_square,
+                        game.halfmove_clock, game.fullmove_number)
+
+def test_round_trip():
+    board, info = fen_to_board(STARTING_FEN)
+    assert board[0][4] == "black_king"
+    assert board[7][3] == "white_queen"
+    assert board_to_fen(board, info["side_to_move"], info["castling"], info["en_passant"],
+                        info["halfmove"], info["fullmove"]) == STARTING_FEN
+
+def test_missing_fields_get_defaults():
+    board, info = fen_to_board("8/8/8/8/8/8/8/K6k")
+    assert info == {"side_to_move": "w", "castling": "-", "en_passant": "-", "halfmove": 0, "fullmove": 1}
+    assert board[7][0] == "white_king"
+
+def test_invalid_placement_raises():
+    for fen in ("8/8/8 w", "9/8/8/8/8/8/8/8 w", "8/8/8/8/8/8/8/7x w"):
+        try:
+            fen_to_board(fen)
+        except ValueError:
+            continue
+        raise AssertionError(f"{fen!r} was accepted")
+
+def test_helpers():
+    assert is_fen(STARTING_FEN)
+    assert not is_fen("r n b q k b n r\np p p p p p p p")
+    assert position_key("8/8/8/8/8/8/8/K6k b - - 12 40") == "8/8/8/8/8/8/8/K6k b - -"
+    assert count_pieces(STARTING_FEN) == 32
+
+def test_game_never_offers_castling_or_en_passant(monkeypatch):
+    game = new_game(monkeypatch, "white")
+    play(game, "e2", "e4")
+    assert game_fen(game) == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b - - 0 1"
+
+def test_fullmove_counts_from_white_moving_first(monkeypatch):
+    game = new_game(monkeypatch, "white")
+    play(game, "e2", "e4")
+    play(game, "e7", "e5")
+    assert game_fen(game) == "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w - - 0 2"
+
+def test_fullmove_counts_from_black_moving_first(monkeypatch):
+    game = new_game(monkeypatch, "black")
+    play(game, "e7", "e5")
+    assert game.fullmove_number == 1
+    play(game, "e2", "e4")
+    assert game.fullmove_number == 2
+    play(game, "g8", "f6")
+    assert game_fen(game) == "rnbqkb1r/pppp1ppp/5n2/4p3/4P3/8/PPPP1PPP/RNBQKBNR w - - 1 2"
@@ -0,0 +1,72 @@
+import json
+import threading
+
+from chess.hint_cache import HintCache
+
+def test_concurrent_puts_and_saves_leave_a_valid_file(tmp_path, capsys):
+    path = str(tmp_path / "hint_cache.json")
+    cache = HintCache(path, max_size=1000, autosave_every=1)
+    errors = []
+
+    def writer(worker):
+        try:
+            for i in range(50):
+                cache.put(f"key-{worker}-{i}", "hint " * 50)
+                cache.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert not errors
+    assert "Could not save" not in capsys.readouterr().out
+    with open(path) as f:
+        assert len(json.load(f)["entries"]) == 400
+    assert len(HintCache(path).entries) == 400
+
+def test_least_recently_used_hint_is_evicted(tmp_path):
+    cache = HintCache(str(tmp_path / "hint_cache.json"), max_size=2)
+    evicted = []
+    cache.on_evict = evicted.append
+    cache.put("a", "hint a")
+    cache.put("b", "hint b")
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == "hint a"
+    cache.put("c", "hint c")
+    assert evicted == ["b"]
+    assert cache.get("b") is None and cache.get("c") == "hint c"
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_expired_hints_are_dropped(tmp_path):
+    cache = HintCache(str(tmp_path / "hint_cache.json"), max_age=60)
+    evicted = []
+    cache.on_evict = evicted.append
+    cache.put("old", "hint")
+    cache.entries["old"]["created"] -= 120
+    assert "old" not in cache
+    assert cache.get("old") is None
+    assert evicted == ["old"] and not cache.entries
+
+def test_save_and_load_keep_order_and_skip_expired(tmp_path):
+    path = str(tmp_path / "data" / "hint_cache.json")
+    cache = HintCache(path, max_age=60)
+    for key in ("a", "b", "c"):
+        cache.put(key, f"hint {key}")
+    cache.entries["b"]["created"] -= 120
+    cache.save()
+    loaded = HintCache(path, max_age=60, max_size=1)
+    assert list(loaded.entries) == ["c"]
+    assert list(HintCache(path, max_age=60).entries) == ["a", "c"]
+
+def test_unreadable_file_starts_empty(tmp_path, capsys):
+    path = tmp_path / "hint_cache.json"
+    path.write_text('{"entries": [["a", ')
+    assert not HintCache(str(path)).entries
+    assert "Could not load hint cache" in capsys.readouterr().out
+
+def test_keys_ignore_move_clocks_and_whitespace():
+    assert HintCache.board_key("8/8/8/8/8/8/8/K6k w - - 3 40") == "8/8/8/8/8/8/8/K6k w - -"
+    assert HintCache.board_key("  r n b\n\n p  p \n") == "r n b/p p"
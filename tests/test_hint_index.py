@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from chess.fen import STARTING_FEN
+from chess.hint_cache import HintCache
+from chess.hint_index import HintIndex
+
+SETTINGS = "Intermediate|Strategic|llama2|v1"
+AFTER_C4_C5_B3_B6 = "rnbqkbnr/p1p1pppp/1p6/2p5/2P5/1P6/P2PPPPP/RNBQKBNR w - - 0 3"
+AFTER_E4_E5 = "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w - - 0 2"
+
+def key(fen, settings=SETTINGS):
+    return f"{fen}|{settings}"
+
+def test_pawn_moves_change_the_position():
+    index = HintIndex()
+    index.add(key(STARTING_FEN))
+    assert index.nearest(key(STARTING_FEN))[1] == 1.0
+    assert index.nearest(key(AFTER_C4_C5_B3_B6)) is None
+    assert index.nearest(key(AFTER_E4_E5)) is None
+
+def test_direct_hints_are_not_indexed():
+    index = HintIndex()
+    direct = "Intermediate|Direct|llama2|v1"
+    index.add(key(STARTING_FEN, direct))
+    assert index.size == 0
+    assert index.nearest(key(STARTING_FEN, direct)) is None
+
+def test_cache_eviction_removes_index_entries(tmp_path):
+    cache = HintCache(str(tmp_path / "hint_cache.json"), max_size=1)
+    index = HintIndex()
+    cache.on_evict = index.remove
+    for fen in (STARTING_FEN, AFTER_E4_E5):
+        cache.put(key(fen), "Control the centre")
+        index.add(key(fen))
+    assert index.size == 1
+    assert index.nearest(key(STARTING_FEN)) is None
+    assert index.nearest(key(AFTER_E4_E5))[0] == key(AFTER_E4_E5)
+    cache.clear()
+    assert index.size == 0
+
+def test_removing_keeps_the_other_rows_findable():
+    index = HintIndex()
+    fens = [STARTING_FEN, AFTER_E4_E5, AFTER_C4_C5_B3_B6]
+    for fen in fens:
+        index.add(key(fen))
+    index.remove(key(STARTING_FEN))
+    index.remove(key(STARTING_FEN))
+    assert index.size == 2
+    for fen in fens[1:]:
+        assert index.nearest(key(fen)) == (key(fen), 1.0)
+    index.remove(key(AFTER_C4_C5_B3_B6))
+    assert index.nearest(key(AFTER_E4_E5)) == (key(AFTER_E4_E5), 1.0)
@@ -0,0 +1,52 @@
+import chess.model_routing as model_routing
+from chess.model_routing import ModelRouter
+
+def test_refused_model_falls_back_until_the_list_says_otherwise(monkeypatch):
+    router = ModelRouter()
+    assert router.route("Beginner", "Strategic", "opening") == "tinyllama"
+    router.mark_missing("tinyllama")
+    assert router.route("Beginner", "Strategic", "opening") == "llama2"
+    monkeypatch.setattr(model_routing, "list_models", lambda: ["tinyllama:latest", "llama2:latest"])
+    router.refresh()
+    assert router.route("Beginner", "Strategic", "opening") == "tinyllama"
+
+def test_unlisted_models_are_asked_for_again(monkeypatch):
+    calls = []
+    monkeypatch.setattr(model_routing, "list_models", lambda: calls.append(1))
+    router = ModelRouter(retry_interval=0)
+    router.refresh()
+    router.route("Beginner", "Strategic", "opening")
+    router.refresh_thread.join(2)
+    assert len(calls) == 2
+
+def test_routes_by_difficulty_type_and_phase():
+    router = ModelRouter()
+    assert router.route("Intermediate", "Direct", "opening") == "tinyllama"
+    assert router.route("Intermediate", "Direct", "middle_game") == "llama2"
+    assert router.route("Hardcore", "Strategic", "opening") == "llama2:13b"
+    assert router.route("Hardcore", "Educational", "end_game") == "llama2:13b"
+
+def test_uninstalled_models_fall_back_to_smaller_ones(monkeypatch):
+    monkeypatch.setattr(model_routing, "list_models", lambda: ["llama2:latest", "tinyllama:latest"])
+    router = ModelRouter()
+    router.refresh()
+    assert router.route("Hardcore", "Strategic", "opening") == "llama2"
+    monkeypatch.setattr(model_routing, "list_models", lambda: ["mistral:latest"])
+    router.refresh()
+    assert router.route("Hardcore", "Strategic", "opening") == "llama2"
+
+def test_slow_models_fall_back_within_the_latency_budget():
+    router = ModelRouter(budgets={"Hardcore": 5.0})
+    for _ in range(3):
+        router.observe("llama2:13b", 8.0)
+    assert router.route("Hardcore", "Strategic", "opening") == "llama2"
+    for _ in range(3):
+        router.observe("llama2", 9.0)
+    assert router.route("Hardcore", "Strategic", "opening") == "tinyllama"
+
+def test_old_latency_samples_expire():
+    router = ModelRouter(budgets={"Hardcore": 5.0}, max_age=0)
+    for _ in range(3):
+        router.observe("llama2:13b", 8.0)
+    assert router.expected_latency("llama2:13b") is None
+    assert router.route("Hardcore", "Strategic", "opening") == "llama2:13b"
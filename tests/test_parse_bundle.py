@@ -0,0 +1,30 @@
+from chess.hint_manager import parse_bundle
+
+DIFFICULTIES = ["Beginner", "Intermediate", "Hardcore"]
+HINT_TYPES = ["Direct", "Strategic", "Educational"]
+
+def parse(text):
+    return parse_bundle(text, DIFFICULTIES, HINT_TYPES)
+
+def test_nested_object():
+    hints = parse('{"Beginner": {"Direct": "Move the knight.", "Strategic": " Control the centre. "}}')
+    assert hints == {("Beginner", "Direct"): "Move the knight.", ("Beginner", "Strategic"): "Control the centre."}
+
+def test_flat_keys_and_lists():
+    assert parse('{"hardcore_educational": "Think about outposts."}') == {
+        ("Hardcore", "Educational"): "Think about outposts."}
+    text = '{"hints": [{"difficulty": "intermediate", "type": "direct", "hint": "Take on e5."}]}'
+    assert parse(text) == {("Intermediate", "Direct"): "Take on e5."}
+
+def test_code_fences_and_trailing_commas():
+    text = 'Here you go:\n```json\n{"Beginner": {"Direct": "Castle soon.",},}\n```'
+    assert parse(text) == {("Beginner", "Direct"): "Castle soon."}
+
+def test_unusable_variants_are_left_out():
+    text = '{"Beginner": {"Direct": "", "Strategic": 3, "Sideways": "?"}, "Expert Direct": "x"}'
+    assert parse(text) == {}
+
+def test_malformed_or_partial_json_gives_nothing():
+    for text in ('{"Beginner": {"Direct": "Move the kn', '{"Beginner": {"Direct": "a" "Strategic": "b"}}',
+                 "No JSON at all", "", None, "Error: Could not connect to the AI service."):
+        assert parse(text) == {}
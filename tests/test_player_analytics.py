@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from chess.player_analytics import DIFFICULTIES, PHASES, skill_trajectories
+
+def game_skill(events):
+    """Skill after each event, one event at a time as the game updates it"""
+    skill = 1.0
+    levels = []
+    for difficulty, helpful in events:
+        if helpful and difficulty == "Hardcore":
+            skill = min(10.0, skill + 0.2)
+        elif not helpful and difficulty == "Beginner":
+            skill = min(10.0, skill + 0.1)
+        elif not helpful and difficulty == "Hardcore":
+            skill = max(1.0, skill - 0.1)
+        levels.append(skill)
+    return levels
+
+def test_trajectories_match_the_step_by_step_rule():
+    rng = random.Random(7)
+    players = []
+    for _ in range(20):
+        # Long runs of one kind of feedback push players to both bounds and back
+        events = []
+        for _ in range(rng.randint(1, 8)):
+            kind = rng.choice([("Hardcore", True), ("Hardcore", False), ("Beginner", False), ("Intermediate", True)])
+            events.extend([kind] * rng.randint(1, 80))
+        players.append(events)
+
+    flat = [event for events in players for event in events]
+    columns = {
+        "player": np.repeat(np.arange(len(players)), [len(events) for events in players]),
+        "difficulty": np.array([DIFFICULTIES.index(difficulty) for difficulty, _ in flat]),
+        "helpful": np.array([helpful for _, helpful in flat]),
+        "phase": np.full(len(flat), PHASES.index("opening"))
+    }
+    starts = np.cumsum([0] + [len(events) for events in players[:-1]])
+    expected = [level for events in players for level in game_skill(events)]
+    assert np.allclose(skill_trajectories(columns, starts), expected)
+
+def test_reaching_the_top_and_coming_down():
+    events = [("Hardcore", True)] * 60 + [("Hardcore", False)] * 5
+    columns = {
+        "player": np.zeros(len(events), dtype=int),
+        "difficulty": np.full(len(events), DIFFICULTIES.index("Hardcore")),
+        "helpful": np.array([helpful for _, helpful in events]),
+        "phase": np.zeros(len(events), dtype=int)
+    }
+    assert skill_trajectories(columns, np.array([0]))[-1] == pytest.approx(9.5)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from ai.scheduler import BATCH, INTERACTIVE, PREFETCH, RequestExpired, RequestScheduler
+
+def test_reserved_slot_is_kept_for_interactive():
+    scheduler = RequestScheduler(max_concurrent=2, reserved=1)
+    batch = scheduler.acquire(BATCH)
+    with pytest.raises(RequestExpired):
+        scheduler.acquire(BATCH, deadline=time.monotonic() + 0.05)
+    interactive = scheduler.acquire(INTERACTIVE, deadline=time.monotonic() + 0.05)
+    scheduler.release(batch)
+    scheduler.release(interactive)
+    assert scheduler.dropped[BATCH] == 1
+
+def test_prefetch_runs_one_at_a_time():
+    scheduler = RequestScheduler(max_concurrent=4, reserved=0)
+    prefetch = scheduler.acquire(PREFETCH)
+    with pytest.raises(RequestExpired):
+        scheduler.acquire(PREFETCH, deadline=time.monotonic() + 0.05)
+    scheduler.release(prefetch)
+    scheduler.release(scheduler.acquire(PREFETCH, deadline=time.monotonic() + 0.05))
+
+def test_configure_lets_batch_use_every_slot():
+    scheduler = RequestScheduler(max_concurrent=2, reserved=1)
+    scheduler.configure(4, reserved=0)
+    tickets = [scheduler.acquire(BATCH, deadline=time.monotonic() + 0.05) for _ in range(4)]
+    assert scheduler.running[BATCH] == 4
+    for ticket in tickets:
+        scheduler.release(ticket)
+    assert scheduler.class_limits == {INTERACTIVE: 4, PREFETCH: 1, BATCH: 4}
+
+def test_interactive_is_admitted_before_older_batch():
+    scheduler = RequestScheduler(max_concurrent=1, reserved=0)
+    running = scheduler.acquire(INTERACTIVE)
+    order = []
+
+    def wait_for(priority):
+        ticket = scheduler.acquire(priority)
+        order.append(priority)
+        scheduler.release(ticket)
+
+    threads = [threading.Thread(target=wait_for, args=(BATCH,))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=wait_for, args=(INTERACTIVE,)))
+    threads[1].start()
+    time.sleep(0.05)
+    scheduler.release(running)
+    for thread in threads:
+        thread.join(2)
+    assert order == [INTERACTIVE, BATCH]
+
+def test_cancelled_request_is_dropped():
+    scheduler = RequestScheduler(max_concurrent=1)
+    running = scheduler.acquire(INTERACTIVE)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RequestExpired):
+        scheduler.acquire(INTERACTIVE, cancel_event=cancel)
+    scheduler.release(running)
+    assert scheduler.dropped[INTERACTIVE] == 1
+
+def test_promoted_request_drops_the_background_deadline():
+    scheduler = RequestScheduler(max_concurrent=1, reserved=0)
+    running = scheduler.acquire(INTERACTIVE)
+    results = []
+
+    def prefetch():
+        try:
+            results.append(scheduler.acquire(PREFETCH, deadline=time.monotonic() + 0.2, key="hint"))
+        except RequestExpired:
+            results.append(None)
+
+    thread = threading.Thread(target=prefetch)
+    thread.start()
+    time.sleep(0.05)
+    scheduler.promote("hint", INTERACTIVE)
+    time.sleep(0.3)
+    scheduler.release(running)
+    thread.join(2)
+    assert results[0] is not None and results[0].admitted_as == INTERACTIVE
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from ai.single_flight import SingleFlight
+
+def gated_stream(gate, chunks, cancels):
+    """start() for a stream that waits for gate before producing chunks, like a queued request"""
+    def start(cancel_event):
+        cancels.append(cancel_event)
+        while not gate.is_set() and not cancel_event.is_set():
+            time.sleep(0.01)
+        for chunk in chunks:
+            if cancel_event.is_set():
+                return
+            yield chunk
+    return start
+
+def consume(stream, into):
+    thread = threading.Thread(target=lambda: into.extend(stream), daemon=True)
+    thread.start()
+    return thread
+
+def test_subscribers_share_one_stream():
+    flights = SingleFlight()
+    gate = threading.Event()
+    cancels = []
+    start = gated_stream(gate, ["a", "b", "c"], cancels)
+    first, second = [], []
+    threads = [consume(flights.stream("key", start), first), consume(flights.stream("key", start), second)]
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join(2)
+    assert first == second == ["a", "b", "c"]
+    assert flights.calls == 1 and flights.saved == 1
+    assert not cancels[0].is_set()
+
+def test_abandoned_stream_is_cancelled_before_its_first_chunk():
+    flights = SingleFlight(grace_period=0.1)
+    cancels = []
+    leave = threading.Event()
+    thread = consume(flights.stream("key", gated_stream(threading.Event(), ["late"], cancels), leave), [])
+    time.sleep(0.05)
+    leave.set()
+    thread.join(2)
+    time.sleep(0.3)
+    assert cancels[0].is_set()
+    # A new request starts a fresh call instead of joining the cancelled one
+    assert "key" not in [key for _, key in flights.flights]
+
+def test_rejoining_within_grace_period_keeps_the_stream():
+    flights = SingleFlight(grace_period=0.3)
+    gate = threading.Event()
+    cancels = []
+    start = gated_stream(gate, ["a", "b"], cancels)
+    leave = threading.Event()
+    consume(flights.stream("key", start, leave), []).join(0.05)
+    leave.set()
+    time.sleep(0.15)
+    result = []
+    thread = consume(flights.stream("key", start), result)
+    time.sleep(0.4)
+    gate.set()
+    thread.join(2)
+    assert result == ["a", "b"]
+    assert flights.calls == 1
+    assert not cancels[0].is_set()
+
+def test_call_runs_once_for_concurrent_callers():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        release.wait(2)
+        return "hint"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.call("key", slow))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert results == ["hint"] * 3
+    assert len(runs) == 1
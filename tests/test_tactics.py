@@ -0,0 +1,26 @@
+from chess.fen import STARTING_FEN
+from chess.tactics import analyze
+
+def test_finds_mate_in_one():
+    facts = analyze("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 30")
+    assert facts["mate"] == {"piece": "rook", "from": "a1", "to": "a8"}
+
+def test_finds_winning_capture():
+    facts = analyze("4k3/8/8/3q4/8/4N3/8/4K3 w - - 0 30")
+    capture = facts["capture"]
+    assert (capture["piece"], capture["from"], capture["to"], capture["target"]) == ("knight", "e3", "d5", "queen")
+    assert capture["gain"] > 0
+
+def test_defended_piece_is_not_worth_taking_with_a_queen():
+    # The pawn on d5 is defended by the pawn on e6
+    assert "capture" not in analyze("4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 30")
+
+def test_finds_hanging_piece():
+    facts = analyze("4k3/8/8/8/8/2b5/8/R4K2 w - - 0 30")
+    assert facts["hanging"] == {"piece": "rook", "square": "a1"}
+
+def test_check_and_development():
+    facts = analyze("4k3/8/8/8/8/8/8/R3K2r w - - 0 30")
+    assert facts["check"] == {"attacker": "rook", "square": "h1"}
+    assert set(analyze(STARTING_FEN)) == {"development"}
+    assert analyze(STARTING_FEN)["development"]["count"] == 4
@@ -0,0 +1,35 @@
+import os
+import random
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from chess.tooltip import ChessTooltip
+
+TEXT = ("Control the centre with your pawns before you launch an attack on the kingside, "
+        "and keep an eye on the long diagonal where the opponent's bishop is waiting. "
+        "Supercalifragilisticexpialidociouslylongwordthatdoesnotfit goes on its own line.")
+
+@pytest.fixture(scope="module", autouse=True)
+def fonts():
+    pygame.font.init()
+
+def test_streamed_wrap_matches_wrapping_the_whole_text():
+    rng = random.Random(3)
+    for _ in range(20):
+        streaming = ChessTooltip()
+        text = ""
+        while len(text) < len(TEXT):
+            # Chunks end anywhere, including in the middle of a word
+            text = TEXT[:len(text) + rng.randint(1, 12)]
+            lines = streaming._wrap(text, 200)
+            assert lines == ChessTooltip()._wrap(text, 200)
+
+def test_new_width_or_text_wraps_from_scratch():
+    tooltip = ChessTooltip()
+    narrow = tooltip._wrap(TEXT, 150)
+    assert tooltip._wrap(TEXT, 300) == ChessTooltip()._wrap(TEXT, 300)
+    assert tooltip._wrap("A different hint.", 150) == ["A different hint. "]
+    assert len(narrow) > len(ChessTooltip()._wrap(TEXT, 300))